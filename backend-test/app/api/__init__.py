@@ -3,10 +3,14 @@ from .pdf_extract import router as extract_router
 from .pdf_status import router as status_router
 from .pdf_highlight import router as highlight_router
 from .authentication import router as auth_router
+from .metrics import router as metrics_router
+from .pdf_profile import router as profile_router
 
 
 api_router = APIRouter()
 api_router.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(extract_router, prefix="/pdf", tags=["PDF Extraction"])
 api_router.include_router(status_router, prefix="/pdf", tags=["PDF Status"])
-api_router.include_router(highlight_router, prefix="/pdf", tags=["PDF Highlight"])
\ No newline at end of file
+api_router.include_router(profile_router, prefix="/pdf", tags=["Monitoring"])
+api_router.include_router(highlight_router, prefix="/pdf", tags=["PDF Highlight"])
+api_router.include_router(metrics_router, tags=["Monitoring"])
\ No newline at end of file
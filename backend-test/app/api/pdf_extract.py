@@ -1,8 +1,8 @@
 import uuid
 import hashlib
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
 
 from app.utils import (
     MAX_FILE_SIZE_BYTES,
@@ -12,6 +12,9 @@ from app.utils import (
     load_jobs_from_file,
     save_jobs_to_file,
 )
+from app.utils.llm_usage import LLMUsageLedger, llm_stage, merge_usage, track_llm_usage
+from app.utils.metrics import JOBS_IN_FLIGHT, JOBS_TOTAL
+from app.api.pdf_profile import RequestProfile, request_profile
 from app.workflows import run_pipeline_on_pdf
 
 router = APIRouter()
@@ -27,8 +30,19 @@ def file_hash(content: bytes) -> str:
     """Generate sha256 hash for deduplication."""
     return hashlib.sha256(content).hexdigest()
 
+def record_llm_usage(job_id: str, usage: LLMUsageLedger):
+    """Add the LLM calls of a request made after extraction (e.g. highlights) to a job's llm_usage."""
+    job = processing_jobs.get(job_id)
+    if job is None or not usage.calls:
+        return
+    job["llm_usage"] = merge_usage(job.get("llm_usage"), usage)
+    save_jobs_to_file(processing_jobs)
+
 @router.post("/extract-and-format/")
-async def extract_and_format_pdf(file: UploadFile = File(...)):
+async def extract_and_format_pdf(
+    file: UploadFile = File(...),
+    profiler: Optional[RequestProfile] = Depends(request_profile),
+):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
 
@@ -69,16 +83,27 @@ async def extract_and_format_pdf(file: UploadFile = File(...)):
             "file_path": file_path,
         }
     save_jobs_to_file(processing_jobs)
+    if profiler:
+        profiler.job_id = job_id
 
+    usage = LLMUsageLedger()
     try:
-        run = await run_pipeline_on_pdf(temp_file_path)
+        with JOBS_IN_FLIGHT.track(), track_llm_usage(usage), llm_stage("extraction"):
+            run = await run_pipeline_on_pdf(temp_file_path)
 
         processing_jobs[job_id].update({
             "status": "completed",
             "result": run["schema"],
             "pages": run["pages"],
+            "boilerplate": run["boilerplate"],
+            "ocr": run["ocr"],
+            "tables": run["tables"],
+            "table_stats": run["table_stats"],
+            "prompt_stats": run["prompt_stats"],
+            "llm_usage": merge_usage(processing_jobs[job_id].get("llm_usage"), usage),
         })
         save_jobs_to_file(processing_jobs)
+        JOBS_TOTAL.inc(outcome="completed")
 
         await delete_temp_file(file)
 
@@ -96,7 +121,9 @@ async def extract_and_format_pdf(file: UploadFile = File(...)):
         processing_jobs[job_id].update({
             "status": "failed",
             "result": str(e),
+            "llm_usage": merge_usage(processing_jobs[job_id].get("llm_usage"), usage),
         })
         save_jobs_to_file(processing_jobs)
+        JOBS_TOTAL.inc(outcome="failed")
         await delete_temp_file(file)
         raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
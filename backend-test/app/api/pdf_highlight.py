@@ -2,7 +2,10 @@ import os
 import difflib
 import fitz
 from fastapi import APIRouter, HTTPException
-from app.utils import client, load_jobs_from_file
+from app.utils import llm, load_jobs_from_file, MATCH_NORMALIZER
+from app.utils.llm_usage import llm_stage, track_llm_usage
+from app.utils.metrics import HIGHLIGHT_SECONDS
+from app.api.pdf_extract import record_llm_usage
 
 router = APIRouter()
 
@@ -11,7 +14,7 @@ UPLOADS_DIR = "uploads"
 
 def normalize_text(text: str) -> str:
     """Lowercase and collapse whitespace for comparison."""
-    return " ".join(text.lower().split())
+    return MATCH_NORMALIZER.normalize(text)
 
 
 def fetch_passage_with_ai(page_text: str, query: str) -> str:
@@ -30,54 +33,85 @@ def fetch_passage_with_ai(page_text: str, query: str) -> str:
     """
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-        )
+        ai_text = llm.generate(prompt, model="gemini-2.5-flash")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI request failed: {e}")
 
-    if not response:
-        raise HTTPException(status_code=500, detail="AI did not return any response")
-
-    # Some SDKs return response.candidates[0].content.parts
-    ai_text = getattr(response, "text", None)
     if not ai_text:
         raise HTTPException(status_code=500, detail="AI response missing text field")
 
     return ai_text.strip()
 
 
+def normalize_blocks(blocks):
+    """
+    Normalize the text of all blocks in one pass.
+    Returns (page_norm, block_norms, spans): page_norm is the NormalizedText of
+    the block texts joined by newlines, block_norms[i] the normalized text of
+    block i and spans[i] its (start, end) in the joined original text.
+    """
+    spans = []
+    position = 0
+    for b in blocks:
+        spans.append((position, position + len(b[4])))
+        position += len(b[4]) + 1
+    page_norm = MATCH_NORMALIZER.normalize_with_offsets("\n".join(b[4] for b in blocks))
+    block_norms = [
+        page_norm.text[page_norm.normalized_index(start):page_norm.normalized_index(end)].strip()
+        for start, end in spans
+    ]
+    return page_norm, block_norms, spans
+
+
+def find_spanning_blocks(page_norm, spans, phrase_norm: str):
+    """Indexes of the blocks covered by the first occurrence of phrase_norm in the page."""
+    if not phrase_norm:
+        return []
+    found = page_norm.text.find(phrase_norm)
+    if found < 0:
+        return []
+    start, end = page_norm.original_span(found, found + len(phrase_norm))
+    return [i for i, (block_start, block_end) in enumerate(spans) if block_start < end and block_end > start]
+
+
+def is_similar(a: str, b: str, threshold: float) -> bool:
+    """difflib ratio above threshold, ruling out clear misses with its cheap upper bounds first."""
+    matcher = difflib.SequenceMatcher(None, a, b)
+    return (
+        matcher.real_quick_ratio() > threshold
+        and matcher.quick_ratio() > threshold
+        and matcher.ratio() > threshold
+    )
+
+
 def find_phrase_coords_from_ai(page, ai_passage: str, query: str, threshold: float = 0.6):
     """
     Given AI's extracted passage and original query, find matching blocks in PDF.
     Works even if the paragraph is split across multiple blocks.
     """
-    blocks = page.get_text("blocks")  # (x0, y0, x1, y1, "text", block_no)
+    blocks = [b for b in page.get_text("blocks") if len(b) >= 5]  # (x0, y0, x1, y1, "text", block_no)
     ai_norm = normalize_text(ai_passage)
     query_norm = normalize_text(query)
 
-    matched_coords = []
+    # The page is normalized once; block texts are slices of it
+    page_norm, block_norms, spans = normalize_blocks(blocks)
+    matched = set()
 
     # Pass 1: fuzzy compare each block against AI passage
-    for b in blocks:
-        if len(b) < 5:
-            continue
-        block_text = b[4]
-        block_norm = normalize_text(block_text)
-
-        score = difflib.SequenceMatcher(None, ai_norm, block_norm).ratio()
-        if score > threshold or ai_norm in block_norm or block_norm in ai_norm:
-            matched_coords.append((b[0], b[1], b[2], b[3]))
+    for i, block_norm in enumerate(block_norms):
+        if ai_norm in block_norm or block_norm in ai_norm or is_similar(ai_norm, block_norm, threshold):
+            matched.add(i)
+    # Passage found verbatim across several blocks: take every block it covers
+    matched.update(find_spanning_blocks(page_norm, spans, ai_norm))
 
     # Pass 2: if nothing found, try using query as anchor
-    if not matched_coords and query_norm:
-        for b in blocks:
-            if len(b) < 5:
-                continue
-            block_text = normalize_text(b[4])
-            if query_norm in block_text:
-                matched_coords.append((b[0], b[1], b[2], b[3]))
+    if not matched and query_norm:
+        for i, block_norm in enumerate(block_norms):
+            if query_norm and query_norm in block_norm:
+                matched.add(i)
+        matched.update(find_spanning_blocks(page_norm, spans, query_norm))
+
+    matched_coords = [(blocks[i][0], blocks[i][1], blocks[i][2], blocks[i][3]) for i in sorted(matched)]
 
     if not matched_coords:
         return None
@@ -113,10 +147,13 @@ async def highlight_text(job_id: str, page_number: int, query: str):
         page_text = page.get_text("text")
 
         # Step 1: Ask AI for best passage
-        ai_passage = fetch_passage_with_ai(page_text, query)
+        with HIGHLIGHT_SECONDS.time(step="llm"), track_llm_usage() as usage, llm_stage("highlight"):
+            ai_passage = fetch_passage_with_ai(page_text, query)
+        record_llm_usage(job_id, usage)
 
         # Step 2: Map passage to PDF coords
-        coords = find_phrase_coords_from_ai(page, ai_passage, query)
+        with HIGHLIGHT_SECONDS.time(step="local"):
+            coords = find_phrase_coords_from_ai(page, ai_passage, query)
         if not coords:
             raise HTTPException(status_code=404, detail="Passage not found in PDF")
 
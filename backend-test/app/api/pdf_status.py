@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from app.utils import load_jobs_from_file
 from pydantic import BaseModel, RootModel
 from fastapi import APIRouter, HTTPException
@@ -27,6 +27,12 @@ class JobStatusResponse(BaseModel):
     file_path: Optional[str] = None
     result: Optional[JobResult] = None
     pages: Optional[Dict[int, str]] = None
+    boilerplate: Optional[Dict[str, Any]] = None  # running headers/footers stripped from the LLM input
+    ocr: Optional[Dict[str, Any]] = None  # page classification and per-page OCR zoom, time, image size
+    tables: Optional[Dict[int, List[Dict[str, Any]]]] = None  # detected tables per page: {"bbox", "rows"}
+    table_stats: Optional[Dict[str, Any]] = None
+    prompt_stats: Optional[Dict[str, Any]] = None  # fixed prompt tokens (instructions, schema) per LLM request
+    llm_usage: Optional[Dict[str, Any]] = None  # LLM calls, tokens and latency of the job, by stage
 
 
 class JobSummary(BaseModel):
@@ -54,6 +60,12 @@ async def get_job_status(job_id: str):
         file_path=job.get("file_path"),
         result=job.get("result"),
         pages=job.get("pages"),
+        boilerplate=job.get("boilerplate"),
+        ocr=job.get("ocr"),
+        tables=job.get("tables"),
+        table_stats=job.get("table_stats"),
+        prompt_stats=job.get("prompt_stats"),
+        llm_usage=job.get("llm_usage"),
     )
 
 
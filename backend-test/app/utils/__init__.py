@@ -1,14 +1,26 @@
-from .config import client, MAX_FILE_SIZE_MB, MAX_FILE_SIZE_BYTES, GOOGLE_API_KEY
+from .config import MAX_FILE_SIZE_MB, MAX_FILE_SIZE_BYTES, GOOGLE_API_KEY
+from .llm import LLMProvider, LLMError, GeminiProvider, CassetteProvider, SyntheticProvider, create_provider, llm
 from .file_utils import sanitize_filename
 from .jobs import save_jobs_to_file, load_jobs_from_file
 from .storage import save_file_permanent, delete_temp_file
 from .schema import MASTER_SCHEMA, ensure_schema_keys
-from .ocr_utils import extract_text_with_ocr
+from .schema_prompt import SchemaPrompt, compile_schema
+from .text_normalizer import TextNormalizer, NormalizedText, OCR_CLEANER, MATCH_NORMALIZER
+from .ocr_utils import extract_text_with_ocr, extract_raw_text, clean_ocr_text
+from .boilerplate import find_boilerplate, strip_boilerplate
+from .llm_usage import estimate_tokens
+from .table_utils import extract_tables, render_table
 from .merge_utils import merge_page_structs_into_master
 
 
 __all__ = [
-    "client",
+    "llm",
+    "LLMProvider",
+    "LLMError",
+    "GeminiProvider",
+    "CassetteProvider",
+    "SyntheticProvider",
+    "create_provider",
     "MAX_FILE_SIZE_MB",
     "MAX_FILE_SIZE_BYTES",
     "sanitize_filename",
@@ -18,7 +30,20 @@ __all__ = [
     "delete_temp_file",
     "MASTER_SCHEMA",
     "ensure_schema_keys",
+    "SchemaPrompt",
+    "compile_schema",
     "extract_text_with_ocr",
+    "extract_raw_text",
+    "clean_ocr_text",
+    "TextNormalizer",
+    "NormalizedText",
+    "OCR_CLEANER",
+    "MATCH_NORMALIZER",
+    "find_boilerplate",
+    "strip_boilerplate",
+    "estimate_tokens",
+    "extract_tables",
+    "render_table",
     "merge_page_structs_into_master",
     "GOOGLE_API_KEY"
 ]
\ No newline at end of file
@@ -0,0 +1,113 @@
+# app/utils/boilerplate.py
+"""
+Running header / footer detection.
+
+Loan agreements repeat the same header ("Senior Facilities Agreement -
+Execution Version"), footer and page number on every page.
+
+- Only the first / last few non-empty lines of each page are candidates.
+- Candidates are normalized (case, digits, spacing, punctuation) so that
+  "Page 3 of 90" and "Page 4 of 90" compare equal. Lines without letters
+  (years, amounts, clause numbers) are content, never candidates.
+- A normalized line that occurs on enough pages is boilerplate and is
+  removed from the text sent to the LLM; stored page text is not changed.
+- A bare page number ("12", "- 12 -") is only boilerplate as the single
+  first or last non-empty line of its page, and only where it increases
+  from each page to the next on enough pages.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Set
+
+EDGE_LINES = 3          # lines at the top and at the bottom of a page to consider
+MIN_PAGE_RATIO = 0.3    # a line must recur on at least this share of pages...
+MIN_PAGES = 3           # ...and on at least this many pages
+MAX_LINE_LENGTH = 160   # longer lines are body text, not running headers
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+_LETTER_RE = re.compile(r"[a-z]")
+_EDGE_PUNCT = " \t-–—_.,:;|*•·()[]"
+# Clause / list markers ("(a)", "ii", "iv.") open many pages but are content
+_LIST_MARKER_RE = re.compile(r"^\(?[a-z]{1,4}(\.#)*[.)]?$")
+# A page number, possibly decorated: "12", "- 12 -", "[12]"
+_PAGE_NUMBER_RE = re.compile(r"^[-–—|(\[\s]*(\d{1,4})[-–—|)\]\s]*$")
+
+
+def normalize_line(line: str) -> str:
+    """Canonical form of a line for frequency counting ('' if it is not a candidate)."""
+    line = line.strip().lower()
+    if not line or len(line) > MAX_LINE_LENGTH or not _LETTER_RE.search(line):
+        return ""
+    line = _DIGITS_RE.sub("#", line)
+    line = _SPACE_RE.sub(" ", line)
+    if _LIST_MARKER_RE.match(line):
+        return ""
+    return line.strip(_EDGE_PUNCT)
+
+
+def _page_number_lines(raw_pages: Dict[int, str], threshold: float) -> Set[str]:
+    """
+    Bare numbers that are the first (or last) non-empty line of a page and
+    higher than the one at the same edge of the previous page, on at least
+    `threshold` pages.
+    """
+    numbered: Dict[str, Dict[int, tuple]] = {"first": {}, "last": {}}
+    for num, text in raw_pages.items():
+        filled = [line.strip() for line in (text or "").splitlines() if line.strip()]
+        for edge, line in (("first", filled[:1]), ("last", filled[-1:])):
+            match = _PAGE_NUMBER_RE.match(line[0]) if line else None
+            if match:
+                numbered[edge][num] = (int(match.group(1)), line[0])
+
+    lines: Set[str] = set()
+    for entries in numbered.values():
+        in_sequence = {
+            page
+            for num, (value, _) in entries.items()
+            if num - 1 in entries and entries[num - 1][0] < value
+            for page in (num - 1, num)
+        }
+        if len(in_sequence) >= threshold:
+            lines.update(entries[page][1] for page in in_sequence)
+    return lines
+
+
+def _edge_indexes(lines: List[str], edge_lines: int) -> Iterable[int]:
+    """Indexes of the first and last `edge_lines` non-empty lines."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:edge_lines] + filled[-edge_lines:]))
+
+
+def find_boilerplate(
+    raw_pages: Dict[int, str],
+    edge_lines: int = EDGE_LINES,
+    min_ratio: float = MIN_PAGE_RATIO,
+    min_pages: int = MIN_PAGES,
+) -> Set[str]:
+    """
+    Return the normalized lines that recur at the top or bottom of many pages,
+    and the page-number lines (as they appear, e.g. "12", "13", ...).
+    raw_pages must keep the page's line breaks (i.e. before clean_ocr_text).
+    """
+    counts: Counter = Counter()
+    for text in raw_pages.values():
+        lines = (text or "").splitlines()
+        counts.update({normalize_line(lines[i]) for i in _edge_indexes(lines, edge_lines)} - {""})
+
+    threshold = max(min_pages, min_ratio * len(raw_pages))
+    boilerplate = {line for line, count in counts.items() if count >= threshold}
+    return boilerplate | _page_number_lines(raw_pages, threshold)
+
+
+def strip_boilerplate(text: str, boilerplate: Set[str], edge_lines: int = EDGE_LINES) -> str:
+    """Remove boilerplate lines from the top and bottom edge of one raw page."""
+    if not text or not boilerplate:
+        return text or ""
+    lines = text.splitlines()
+    edges = list(_edge_indexes(lines, edge_lines))
+    drop = {i for i in edges if normalize_line(lines[i]) in boilerplate}
+    # Page numbers only as the first or last non-empty line
+    drop.update(i for i in edges[:1] + edges[-1:] if lines[i].strip() in boilerplate)
+    return "\n".join(line for i, line in enumerate(lines) if i not in drop)
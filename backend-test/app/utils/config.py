@@ -1,28 +1,55 @@
 # app/utils/config.py
 """
 Configuration for the backend.
-Includes Gemini API client and optional Tesseract path.
+Includes LLM provider settings and optional Tesseract path.
 """
 
 import os
+import logging
 from pathlib import Path
-from dotenv import load_dotenv
-from google import genai  # Google Gemini API client
+from dotenv import dotenv_values, load_dotenv
 
 # Load .env from project root
 env_path = Path(__file__).parent.parent.parent / ".env"
 load_dotenv(env_path)
 
+# Settings written by benchmarks/autotune.py; .env and the environment take
+# precedence, so say when they shadow a tuned value
+PIPELINE_TUNING_FILE = os.getenv("PIPELINE_TUNING_FILE", "pipeline_tuning.env")
+for _key, _value in dotenv_values(PIPELINE_TUNING_FILE).items():
+    if _key in os.environ and os.environ[_key] != _value:
+        logging.getLogger(__name__).warning(
+            f"{_key}={os.environ[_key]} from .env or the environment overrides {_key}={_value} from {PIPELINE_TUNING_FILE}"
+        )
+load_dotenv(PIPELINE_TUNING_FILE)
+
 # ---------------- File size limits ---------------- #
 MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
-# ---------------- Gemini API Client ---------------- #
+# ---------------- LLM provider ---------------- #
+# gemini | cassette (replay only) | record (Gemini, recorded) | synthetic (offline)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+# Only required by the gemini / record providers, checked on the first call
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # <-- store raw key
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable not set in .env")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join("cassettes", "llm.jsonl"))
+LLM_SYNTHETIC_LATENCY_MS = float(os.getenv("LLM_SYNTHETIC_LATENCY_MS", 0))
+LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS = float(os.getenv("LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS", 0))
+LLM_SYNTHETIC_ERROR_RATE = float(os.getenv("LLM_SYNTHETIC_ERROR_RATE", 0))
+LLM_SYNTHETIC_FILL_RATIO = float(os.getenv("LLM_SYNTHETIC_FILL_RATIO", 0.3))
+LLM_SYNTHETIC_SEED = int(os.getenv("LLM_SYNTHETIC_SEED", 0))
+
+# ---------------- Extraction pipeline ---------------- #
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", 2))          # pages per LLM request
+PIPELINE_MAX_CONCURRENT = int(os.getenv("PIPELINE_MAX_CONCURRENT", 3))  # LLM requests in flight per document
+OCR_ZOOM = float(os.getenv("OCR_ZOOM", 2.5))                            # OCR render zoom of pages without a raster scan
 
-client = genai.Client(api_key=GOOGLE_API_KEY)
+# ---------------- Request profiling ---------------- #
+# Admins profile a request with ?profile=true or "X-Profile: 1" plus this token
+# in X-Admin-Token; profiling is disabled while it is unset
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
 
 # ---------------- Optional Tesseract ---------------- #
 TESSERACT_CMD = os.getenv("TESSERACT_CMD")  # Windows path to tesseract.exe
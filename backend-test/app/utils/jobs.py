@@ -2,14 +2,18 @@ import json
 import os
 from typing import Dict, Any
 
+from .metrics import JOB_STORE_BYTES, JOB_STORE_SECONDS
+
 JOB_FILE = "jobs.json"
 
 
 def save_jobs_to_file(processing_jobs: Dict[str, Any]) -> None:
     """Save jobs safely to a JSON file."""
     try:
-        with open(JOB_FILE, "w", encoding="utf-8") as f:
-            json.dump(processing_jobs, f, ensure_ascii=False, indent=2)
+        with JOB_STORE_SECONDS.time(op="write"):
+            with open(JOB_FILE, "w", encoding="utf-8") as f:
+                json.dump(processing_jobs, f, ensure_ascii=False, indent=2)
+            JOB_STORE_BYTES.set(os.path.getsize(JOB_FILE))
     except OSError as e:
         # Log or raise depending on your needs
         print(f"[ERROR] Failed to save jobs: {e}")
@@ -21,11 +25,13 @@ def load_jobs_from_file() -> Dict[str, Any]:
         return {}
 
     try:
-        with open(JOB_FILE, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if not content:
-                return {}
-            return json.loads(content)
+        with JOB_STORE_SECONDS.time(op="read"):
+            with open(JOB_FILE, "r", encoding="utf-8") as f:
+                JOB_STORE_BYTES.set(os.fstat(f.fileno()).st_size)
+                content = f.read().strip()
+                if not content:
+                    return {}
+                return json.loads(content)
     except (json.JSONDecodeError, OSError) as e:
         print(f"[WARN] Failed to load jobs: {e}")
         return {}
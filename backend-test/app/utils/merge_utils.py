@@ -1,6 +1,6 @@
 # app/utils/merge_utils.py
 from typing import Dict, List, Any
-from .schema import MASTER_SCHEMA, ensure_schema_keys
+from .schema import FIELD_COUNT, merge_slots, to_schema, to_slots
 
 
 def _take_first_non_null(a: Dict[str, Any] | None, b: Dict[str, Any] | None) -> Dict[str, Any]:
@@ -27,17 +27,9 @@ def merge_page_structs_into_master(page_structs: List[Dict[str, Any]]) -> Dict[s
     Merge multiple per-page structured dicts into a single MASTER_SCHEMA-shaped dict.
     
     - Keeps the first non-null occurrence across pages for each field.
-    - Ensures all schema keys exist (using ensure_schema_keys).
+    - Ensures all schema keys exist (structs are merged as slot lists, see schema.py).
     """
-    # Initialize with a skeleton schema
-    merged = ensure_schema_keys({})
-
+    merged = [None] * FIELD_COUNT
     for struct in page_structs or []:
-        normalized = ensure_schema_keys(struct)
-        for section, fields in normalized.items():
-            for key, obj in fields.items():
-                merged[section][key] = _take_first_non_null(
-                    merged[section].get(key), obj
-                )
-
-    return merged
+        merge_slots(merged, to_slots(struct))
+    return to_schema(merged)
@@ -3,86 +3,246 @@
 OCR Utilities for PDF text extraction.
 
 - Uses PyMuPDF (fitz) to grab native text where available.
-- Falls back to Tesseract OCR on image-only pages.
+- Classifies each page and OCRs scanned pages, or only the scanned images
+  of mixed pages, with Tesseract; pages are rendered in grayscale at a
+  resolution matched to the scan and handed over without a PNG round trip.
 - Cleans OCR output to reduce noise.
 - Returns per-page text as a dictionary: {page_number: text}.
 """
 
-import io
-import re
-from typing import Dict
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
-from .config import TESSERACT_CMD
+from .config import OCR_ZOOM, TESSERACT_CMD
+from .text_normalizer import OCR_CLEANER
 
 # Configure pytesseract binary if provided in .env
 if TESSERACT_CMD:
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
+# OCR render resolution bounds for scanned pages (see choose_ocr_zoom).
+# Tesseract is most accurate at around 300 DPI.
+MIN_OCR_DPI = 150
+MAX_OCR_DPI = 300
 
-def page_to_image(page: fitz.Page, zoom: float = 2.0) -> Image.Image:
+# Page classification thresholds (see classify_page)
+MIN_IMAGE_RATIO = 0.1       # smaller images (logos, signatures) are never OCR'd
+COVERED_IMAGE_RATIO = 0.3   # an image this much covered by text blocks already has a text layer
+SPARSE_TEXT_CHARS = 200     # fewer native characters next to an uncovered scan: OCR the whole page
+
+
+def render_page_gray(page: fitz.Page, zoom: float = 2.0, clip: Optional[fitz.Rect] = None) -> fitz.Pixmap:
     """
-    Render a PDF page to a PIL Image using PyMuPDF.
+    Render a PDF page (or the clip region of it) to a grayscale pixmap
+    without alpha (one byte per pixel).
     """
     mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
-    img_bytes = pix.tobytes("png")
-    return Image.open(io.BytesIO(img_bytes))
+    return page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False, clip=clip)
 
 
-def clean_ocr_text(text: str) -> str:
+def pixmap_to_image(pix: fitz.Pixmap) -> Image.Image:
     """
-    Clean OCR text by removing noise, redundant spaces,
-    and common header/footer patterns.
+    Wrap a grayscale pixmap's sample buffer as a PIL Image without copying.
+    The image shares the pixmap's memory: close it before pix is freed.
     """
-    if not text:
-        return ""
+    image = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+    # pytesseract writes the image to a temp file in image.format (PNG when
+    # unset); uncompressed PGM skips the PNG encode on the way to Tesseract
+    image.format = "PPM"
+    return image
+
+
+def page_images(page: fitz.Page) -> List[Tuple[fitz.Rect, float]]:
+    """
+    Raster images placed on the page as (area on the page, dpi as placed),
+    ignoring those smaller than MIN_IMAGE_RATIO of the page (logos, signatures).
+    """
+    # Listing the page's image resources is cheap; placing them means
+    # interpreting the page, so only do that when there are any
+    if not page.get_images():
+        return []
+    page_rect = page.rect
+    min_area = MIN_IMAGE_RATIO * abs(page_rect)
+    images = []
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"])
+        rect = bbox & page_rect
+        if rect.is_empty or abs(rect) < min_area or not info.get("width"):
+            continue
+        images.append((rect, info["width"] / (bbox.width / 72)))
+    return images
 
-    # Normalize line breaks
-    text = text.replace("\r", "\n")
 
-    # Remove multiple consecutive newlines
-    text = re.sub(r"\n{2,}", "\n", text)
+def ocr_zoom_for_dpi(dpi: Optional[float], default_zoom: float = OCR_ZOOM) -> float:
+    """
+    Render zoom for OCR of a scan: its own resolution clamped to
+    MIN_OCR_DPI..MAX_OCR_DPI (rendering above it only interpolates pixels,
+    below it loses detail). default_zoom when there is no scan.
+    """
+    if dpi is None:
+        return default_zoom
+    return min(max(dpi, MIN_OCR_DPI), MAX_OCR_DPI) / 72
 
-    # Remove page numbers like "Page 12", "12/400"
-    text = re.sub(r"(Page\s*\d+)|(\d+\s*/\s*\d+)", "", text, flags=re.IGNORECASE)
 
-    # Remove extra non-ASCII junk characters
-    text = re.sub(r"[^\x00-\x7F]+", " ", text)
+def choose_ocr_zoom(page: fitz.Page, default_zoom: float = OCR_ZOOM) -> Tuple[float, Optional[float]]:
+    """
+    Pick the render zoom for OCR of a whole page from its largest image.
+    Pages without a raster image use default_zoom.
+    Returns (zoom, scan dpi or None).
+    """
+    images = page_images(page)
+    dpi = max(images, key=lambda image: abs(image[0]))[1] if images else None
+    return ocr_zoom_for_dpi(dpi, default_zoom), dpi
 
-    # Collapse multiple spaces
-    text = re.sub(r"\s{2,}", " ", text)
 
-    return text.strip()
+def classify_page(page: fitz.Page, text: str) -> Tuple[str, List[Tuple[fitz.Rect, float]]]:
+    """
+    Decide how to read a page from its text layer and images:
 
+    - "native": use the text layer (no large image, or every large image is
+      covered by text, as in a searchable scan)
+    - "ocr": OCR the whole page (no text layer, or a scan whose only text is
+      a stray stamp such as a Bates number)
+    - "ocr_images": keep the text layer and OCR only the large images it
+      does not cover
 
-def extract_text_with_ocr(pdf_path: str, ocr_zoom: float = 2.5) -> Dict[int, str]:
+    Returns (mode, image regions to OCR with their dpi). Nothing is rendered.
     """
-    Extract text from a PDF, using native text where possible,
-    and Tesseract OCR for image-only pages.
-    Cleans OCR output before returning.
+    chars = len(text.strip())
+    if not chars:
+        return "ocr", []
+
+    images = page_images(page)
+    if not images:
+        return "native", []
+
+    text_rects = [
+        fitz.Rect(block[:4])
+        for block in page.get_text("blocks")
+        if block[6] == 0 and block[4].strip()
+    ]
+    uncovered = []
+    for rect, dpi in images:
+        covered = sum(abs(rect & text_rect) for text_rect in text_rects)
+        if covered < COVERED_IMAGE_RATIO * abs(rect):
+            uncovered.append((rect, dpi))
+
+    if not uncovered:
+        return "native", []
+    if chars < SPARSE_TEXT_CHARS:
+        return "ocr", []
+    return "ocr_images", uncovered
+
+
+def ocr_page(page: fitz.Page, zoom: float, clip: Optional[fitz.Rect] = None) -> str:
     """
-    doc = fitz.open(pdf_path)
-    results: Dict[int, str] = {}
+    OCR a page (or the clip region of it) rendered at zoom, handing the
+    pixmap's pixels straight to Tesseract.
+    """
+    pix = render_page_gray(page, zoom, clip=clip)
+    image = pixmap_to_image(pix)
+    try:
+        return pytesseract.image_to_string(image)
+    finally:
+        # Release the view on pix's samples before pix itself is freed
+        image.close()
+        del image
 
-    for page_number, page in enumerate(doc, start=1):
-        text = ""
-        try:
-            text = page.get_text("text") or ""
-        except Exception:
-            pass  # fallback to OCR if PyMuPDF fails
 
-        if text.strip():
-            results[page_number] = clean_ocr_text(text)
-            continue
+def clean_ocr_text(text: str) -> str:
+    """
+    Clean OCR text by removing noise, redundant spaces,
+    and common header/footer patterns.
+
+    Line breaks are normalized, page numbers like "Page 12" / "12/400"
+    removed, non-ASCII junk replaced and whitespace runs collapsed, all in
+    one pass (see text_normalizer.OCR_CLEANER).
+    """
+    return OCR_CLEANER.normalize(text)
+
+
+def extract_raw_text(
+    pdf_path: str,
+    ocr_zoom: float = OCR_ZOOM,
+    ocr_stats: Optional[Dict[int, Dict[str, Any]]] = None,
+    page_modes: Optional[Dict[int, str]] = None,
+    doc: Optional[fitz.Document] = None,
+) -> Dict[int, str]:
+    """
+    Extract the uncleaned text of every page (line breaks kept). Each page is
+    classified (see classify_page) and read from its text layer, by OCR, or
+    from its text layer plus OCR of the images it does not cover.
 
-        # Fallback to OCR
-        try:
-            image = page_to_image(page, zoom=ocr_zoom)
-            ocr_text = pytesseract.image_to_string(image)
-            results[page_number] = clean_ocr_text(ocr_text)
-        except Exception:
-            results[page_number] = ""
+    ocr_zoom is used for OCR of pages without a raster scan. If page_modes
+    is given, it is filled with {page_number: mode} for every page; if
+    ocr_stats is given, with {page_number: {"mode", "zoom", "dpi", "ms",
+    "image_kb"}} for every page that needed OCR.
+
+    doc, if given, is the already open document of pdf_path; it is read
+    instead of opening the file again and left open.
+    """
+    owned = doc is None
+    if owned:
+        doc = fitz.open(pdf_path)
+    results: Dict[int, str] = {}
+    try:
+        for page_number, page in enumerate(doc, start=1):
+            text = ""
+            try:
+                text = page.get_text("text") or ""
+            except Exception:
+                pass  # fallback to OCR if PyMuPDF fails
+
+            mode, regions = classify_page(page, text)
+            if page_modes is not None:
+                page_modes[page_number] = mode
+            if mode == "native":
+                results[page_number] = text
+                continue
+
+            # Whole page, or each uncovered image region, rendered at its scan resolution
+            if mode == "ocr":
+                zoom, dpi = choose_ocr_zoom(page, ocr_zoom)
+                targets = [(None, zoom, dpi)]
+            else:
+                targets = [(rect, ocr_zoom_for_dpi(dpi), dpi) for rect, dpi in regions]
+
+            started = time.perf_counter()
+            parts = [text] if mode == "ocr_images" else []
+            for clip, zoom, _ in targets:
+                try:
+                    parts.append(ocr_page(page, zoom, clip=clip))
+                except Exception:
+                    pass
+            results[page_number] = "\n".join(parts)
+
+            if ocr_stats is not None:
+                # The grayscale pixel buffer is the page's peak OCR allocation on our side
+                area = max(abs(clip or page.rect) * zoom * zoom for clip, zoom, _ in targets)
+                dpis = [dpi for _, _, dpi in targets if dpi]
+                ocr_stats[page_number] = {
+                    "mode": mode,
+                    "zoom": round(max(zoom for _, zoom, _ in targets), 3),
+                    "dpi": round(max(dpis)) if dpis else None,
+                    "ms": round((time.perf_counter() - started) * 1000, 1),
+                    "image_kb": round(area / 1024),
+                }
+    finally:
+        if owned:
+            doc.close()
 
     return results
+
+
+def extract_text_with_ocr(pdf_path: str, ocr_zoom: float = OCR_ZOOM) -> Dict[int, str]:
+    """
+    Extract text from a PDF, using native text where possible,
+    and Tesseract OCR for image-only pages.
+    Cleans OCR output before returning.
+    """
+    return {
+        page_number: clean_ocr_text(text)
+        for page_number, text in extract_raw_text(pdf_path, ocr_zoom=ocr_zoom).items()
+    }
@@ -5,13 +5,22 @@ Master schema definition and helpers to normalize/ensure keys.
 Each final field value is always an object of shape:
     { "value": <str or None>, "page_number": <int or None> }
 
+At import the schema is also compiled into a flat field table: field i
+is FIELDS[i] = (section, key) and SECTION_SLICES[section] is the range of
+indices of a section's fields. Per-page LLM results are normalized into
+slot lists (one entry per field: a (value, page_number) tuple, or None
+when the field has no value) and merged as such; the nested dict is only
+built for the final result.
+
 Functions:
-- get_empty_schema(): returns a deep copy of MASTER_SCHEMA
+- get_empty_schema(): returns a fresh copy of MASTER_SCHEMA
 - ensure_schema_keys(): normalizes an incoming structure to match MASTER_SCHEMA
+- to_slots(): normalizes an incoming structure into a slot list
+- merge_slots(): fills the empty slots of one slot list from another
+- to_schema(): builds the MASTER_SCHEMA-shaped dict of a slot list
 """
 
-from typing import Dict, Any, Optional
-import copy
+from typing import Dict, Any, List, Optional, Tuple
 
 # ---------------- Master Schema ---------------- #
 MASTER_SCHEMA: Dict[str, Dict[str, Dict[str, Optional[Any]]]] = {
@@ -119,11 +128,38 @@ MASTER_SCHEMA: Dict[str, Dict[str, Dict[str, Optional[Any]]]] = {
 }
 
 
+# ---------------- Flat field table ---------------- #
+FIELDS: Tuple[Tuple[str, str], ...] = tuple(
+    (section, key) for section, fields in MASTER_SCHEMA.items() for key in fields
+)
+FIELD_COUNT = len(FIELDS)
+
+
+def _section_slices() -> Dict[str, slice]:
+    slices, start = {}, 0
+    for section, fields in MASTER_SCHEMA.items():
+        slices[section] = slice(start, start + len(fields))
+        start += len(fields)
+    return slices
+
+
+SECTION_SLICES: Dict[str, slice] = _section_slices()
+_FIELD_INDEX: Dict[str, Dict[str, int]] = {
+    section: {FIELDS[i][1]: i for i in range(fields.start, fields.stop)}
+    for section, fields in SECTION_SLICES.items()
+}
+
+Slot = Optional[Tuple[Any, Any]]  # (value, page_number), None when the field has no value
+
+
 # ---------------- Helper Functions ---------------- #
 
 def get_empty_schema() -> Dict[str, Dict[str, Dict[str, Optional[Any]]]]:
-    """Return a deep copy of the empty schema so it can be safely mutated."""
-    return copy.deepcopy(MASTER_SCHEMA)
+    """Return a fresh copy of the empty schema so it can be safely mutated."""
+    return {
+        section: {key: {"value": None, "page_number": None} for key in fields}
+        for section, fields in MASTER_SCHEMA.items()
+    }
 
 
 def ensure_schema_keys(
@@ -145,17 +181,68 @@ def ensure_schema_keys(
             val = str(val)
         return {"value": val, "page_number": None}
 
-    out = get_empty_schema()
-
     if not isinstance(struct, dict):
-        return out
+        return get_empty_schema()
 
-    for section, fields in out.items():
-        incoming_section = struct.get(section, {})
+    out = {}
+    for section, fields in MASTER_SCHEMA.items():
+        incoming_section = struct.get(section)
         if not isinstance(incoming_section, dict):
-            continue
-        for key in fields.keys():
-            if key in incoming_section:
-                out[section][key] = normalize_field(incoming_section[key])
+            incoming_section = {}
+        out[section] = {
+            key: normalize_field(incoming_section[key]) if key in incoming_section else {"value": None, "page_number": None}
+            for key in fields
+        }
 
     return out
+
+
+def _slot(val: Any) -> Slot:
+    """ensure_schema_keys' normalization of one field, as a slot."""
+    if isinstance(val, dict):
+        value = val.get("value")
+        return None if value is None or value == "" else (value, val.get("page_number"))
+    if val is None or val == "":
+        return None
+    if isinstance(val, (int, float, list)):
+        val = str(val)
+    return (val, None)
+
+
+def to_slots(struct: Any) -> List[Slot]:
+    """
+    Normalize an incoming structure like ensure_schema_keys() into a slot
+    list. Fields with an empty value ("" or None) become None, as they
+    never win a merge.
+    """
+    slots: List[Slot] = [None] * FIELD_COUNT
+    if not isinstance(struct, dict):
+        return slots
+    for section, incoming_section in struct.items():
+        index = _FIELD_INDEX.get(section)
+        if index is None or not isinstance(incoming_section, dict):
+            continue
+        for key, val in incoming_section.items():
+            i = index.get(key)
+            if i is not None:
+                slots[i] = _slot(val)
+    return slots
+
+
+def merge_slots(merged: List[Slot], slots: List[Slot]) -> List[Slot]:
+    """Fill the empty slots of merged (in place) from slots: the first non-null value wins."""
+    for i, slot in enumerate(slots):
+        if slot is not None and merged[i] is None:
+            merged[i] = slot
+    return merged
+
+
+def to_schema(slots: List[Slot]) -> Dict[str, Dict[str, Dict[str, Optional[Any]]]]:
+    """The MASTER_SCHEMA-shaped dict of a slot list."""
+    return {
+        section: {
+            key: {"value": None, "page_number": None} if slot is None else {"value": slot[0], "page_number": slot[1]}
+            for (_, key), slot in zip(FIELDS[fields], slots[fields])
+        }
+        for section, fields in SECTION_SLICES.items()
+    }
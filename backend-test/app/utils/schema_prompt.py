@@ -0,0 +1,64 @@
+# app/utils/schema_prompt.py
+"""
+Compact prompt form of MASTER_SCHEMA.
+
+Rendering the schema as JSON repeats {"value": null, "page_number": null}
+and the indentation for every field. compile_schema() describes the field
+shape once and lists the fields of each section on one line:
+
+    Every field is an object {"value": <exact text from the document or null>, "page_number": <int or null>}.
+    Fields by section:
+    dates: agreement_date, effective_date, ...
+    general: borrower, agent, ...
+
+A subset of the fields (a sub-schema) is compiled the same way, and each
+compiled form is built once and cached.
+
+Functions:
+- compile_schema(): the instructions for the whole schema or some of its fields
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .llm_usage import estimate_tokens
+from .schema import MASTER_SCHEMA
+
+FIELD_SHAPE = '{"value": <exact text from the document or null>, "page_number": <int or null>}'
+FIELDS_HEADER = "Fields by section:"
+
+
+class SchemaPrompt(NamedTuple):
+    text: str
+    sections: Dict[str, List[str]]
+    fields: int
+    tokens: int  # estimated tokens of text
+
+
+@lru_cache(maxsize=64)
+def _compile(paths: Optional[Tuple[str, ...]]) -> SchemaPrompt:
+    wanted = None if paths is None else set(paths)
+    sections: Dict[str, List[str]] = {}
+    for section, fields in MASTER_SCHEMA.items():
+        if wanted is None or section in wanted:
+            selected = list(fields)
+        else:
+            selected = [key for key in fields if f"{section}.{key}" in wanted]
+        if selected:
+            sections[section] = selected
+    lines = [
+        "Return these sections and fields only; use null when a field is not found.",
+        f"Every field is an object {FIELD_SHAPE}.",
+        FIELDS_HEADER,
+    ]
+    lines.extend(f"{section}: {', '.join(fields)}" for section, fields in sections.items())
+    text = "\n".join(lines)
+    return SchemaPrompt(text, sections, sum(len(fields) for fields in sections.values()), estimate_tokens(text))
+
+
+def compile_schema(fields: Optional[Iterable[str]] = None) -> SchemaPrompt:
+    """
+    Compile MASTER_SCHEMA (or the given "section" / "section.field" paths of
+    it) into prompt instructions. Unknown paths are ignored.
+    """
+    return _compile(None if fields is None else tuple(sorted(set(fields))))
@@ -0,0 +1,115 @@
+# app/utils/table_utils.py
+"""
+Table extraction for ruled grids (margin ratchets, covenant levels,
+commitment schedules).
+
+get_text("text") reads such grids cell by cell, so the LLM sees a column
+soup. Tables are detected with PyMuPDF's find_tables, stored as rows of
+cells and rendered into prompts as one delimited line per row.
+
+find_tables costs 100-300 ms per page, so it only runs on pages with
+enough vector ruling lines to hold a grid.
+
+Functions:
+- has_ruling_lines(): cheap pre-check on the page's vector drawings
+- extract_page_tables(): tables of a page as {"bbox", "rows"}
+- extract_tables(): tables of every page of an open PDF, plus the page
+  text outside the tables
+- render_table(): compact text form of a table for prompts
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import fitz  # PyMuPDF
+
+# A page needs at least this many line / rectangle drawing items to be
+# checked for tables (a 2x2 ruled grid alone has 6)
+MIN_TABLE_LINES = 8
+
+
+def has_ruling_lines(page: fitz.Page, min_lines: int = MIN_TABLE_LINES) -> bool:
+    """True if the page draws at least min_lines lines or rectangles."""
+    count = 0
+    for path in page.get_cdrawings():
+        for item in path["items"]:
+            if item[0] in ("l", "re"):
+                count += 1
+                if count >= min_lines:
+                    return True
+    return False
+
+
+def _clean_cell(cell: Optional[str]) -> str:
+    return " ".join(cell.split()) if cell else ""
+
+
+def extract_page_tables(page: fitz.Page) -> List[Dict[str, Any]]:
+    """
+    Tables of a page as {"bbox": [x0, y0, x1, y1], "rows": [[cell, ...], ...]}.
+    Cell text has its whitespace collapsed; empty cells are "", empty rows
+    and columns are dropped. Grids with a single row or column are skipped
+    (ruled boxes and underlines).
+    """
+    if not has_ruling_lines(page):
+        return []
+    tables = []
+    for table in page.find_tables().tables:
+        if table.row_count < 2 or table.col_count < 2:
+            continue
+        rows = [[_clean_cell(cell) for cell in row] for row in table.extract()]
+        rows = [row for row in rows if any(row)]
+        # Spacer columns from merged cells are empty in every row
+        keep = [i for i in range(table.col_count) if any(row[i] for row in rows)]
+        rows = [[row[i] for i in keep] for row in rows]
+        if len(rows) < 2 or len(keep) < 2:
+            continue
+        tables.append({"bbox": [round(v, 1) for v in table.bbox], "rows": rows})
+    return tables
+
+
+def _inside(block: Tuple, bboxes: Iterable[fitz.Rect]) -> bool:
+    center = fitz.Point((block[0] + block[2]) / 2, (block[1] + block[3]) / 2)
+    return any(center in bbox for bbox in bboxes)
+
+
+def text_outside_tables(page: fitz.Page, tables: List[Dict[str, Any]]) -> str:
+    """Page text without the text blocks that sit inside a table."""
+    bboxes = [fitz.Rect(table["bbox"]) for table in tables]
+    return "".join(
+        block[4] for block in page.get_text("blocks")
+        if block[6] == 0 and not _inside(block, bboxes)
+    )
+
+
+def extract_tables(
+    doc: fitz.Document, page_numbers: Optional[Iterable[int]] = None
+) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[int, str]]:
+    """
+    Detect tables on the given pages (1-based, default all) of an open
+    document. The outside text comes from the text layer, so only pass
+    pages that were read from it (not OCR'd ones).
+    Returns (tables, outside_text): both keyed by page number and only
+    holding pages where tables were found.
+    """
+    numbers = range(1, len(doc) + 1) if page_numbers is None else page_numbers
+    tables: Dict[int, List[Dict[str, Any]]] = {}
+    outside_text: Dict[int, str] = {}
+    for page_number in numbers:
+        page = doc[page_number - 1]
+        try:
+            page_tables = extract_page_tables(page)
+        except Exception:
+            continue  # keep the flat text for pages the detector fails on
+        if page_tables:
+            tables[page_number] = page_tables
+            outside_text[page_number] = text_outside_tables(page, page_tables)
+    return tables, outside_text
+
+
+def render_table(rows: List[List[str]], index: int = 1) -> str:
+    """
+    Compact text form of a table: a "[TABLE n]" line, then one line per row
+    with cells separated by "|" (first row is usually the column headings).
+    """
+    lines = [f"[TABLE {index}]"]
+    lines.extend("|".join(cell.replace("|", "/") for cell in row) for row in rows)
+    return "\n".join(lines)
@@ -1,12 +1,37 @@
 import json
 import re
+import time
 import asyncio
 import logging
-from typing import Dict, Any, List
-from langchain.schema import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from collections import Counter
+from typing import Dict, Any, List, Optional
 
-from app.utils import extract_text_with_ocr, ensure_schema_keys, MASTER_SCHEMA, GOOGLE_API_KEY
+import fitz  # PyMuPDF
+
+from app.utils import (
+    extract_raw_text,
+    clean_ocr_text,
+    find_boilerplate,
+    strip_boilerplate,
+    estimate_tokens,
+    extract_tables,
+    render_table,
+    compile_schema,
+    LLMProvider,
+    llm,
+)
+from app.utils.config import OCR_ZOOM, PIPELINE_BATCH_SIZE, PIPELINE_MAX_CONCURRENT
+from app.utils.llm_usage import llm_stage
+from app.utils.schema import FIELD_COUNT, merge_slots, to_schema, to_slots
+from app.utils.metrics import (
+    LLM_BATCHES,
+    LLM_JSON_REPAIRS,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_SECONDS,
+    OCR_PAGE_SECONDS,
+    PAGES_PROCESSED,
+    PIPELINE_STAGE_SECONDS,
+)
 
 # -----------------------------
 # Setup logging
@@ -15,7 +40,7 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 
-def safe_json_parse(raw_text: str, retries: int = 2) -> Dict[str, Any]:
+def safe_json_parse(raw_text: str, retries: int = 2, provider: Optional[LLMProvider] = None) -> Dict[str, Any]:
     try:
         return json.loads(raw_text)
     except json.JSONDecodeError:
@@ -27,93 +52,187 @@ def safe_json_parse(raw_text: str, retries: int = 2) -> Dict[str, Any]:
         Fix it and return ONLY valid JSON with no extra commentary:
         {raw_text}
         """
-        model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=GOOGLE_API_KEY
-        )
+        LLM_JSON_REPAIRS.inc()
         try:
-            resp = model.invoke([HumanMessage(content=fix_prompt)])
-            fixed_text = getattr(resp, "content", str(resp)).strip()
+            with llm_stage("repair"):
+                fixed_text = (provider or llm).generate(fix_prompt).strip()
             fixed_text = re.sub(r"^```(json)?\s*|\s*```$", "", fixed_text, flags=re.MULTILINE).strip()
-            return safe_json_parse(fixed_text, retries=retries - 1)
+            return safe_json_parse(fixed_text, retries=retries - 1, provider=provider)
         except Exception as e:
-            raise ValueError(f"Gemini failed to fix JSON: {e}")
+            raise ValueError(f"LLM failed to fix JSON: {e}")
 
 
 def merge_schemas(page_schemas: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
-    from app.utils.merge_utils import _take_first_non_null
-    merged = ensure_schema_keys({})
-    for _, schema in page_schemas.items():
-        normalized = ensure_schema_keys(schema)
-        for section, fields in normalized.items():
-            for key, obj in fields.items():
-                merged[section][key] = _take_first_non_null(merged[section].get(key), obj)
-    return merged
-
-
-async def process_batch(model, batch, schema_text, batch_id: int):
-    """Process a batch of pages asynchronously"""
-    combined_text = "\n\n".join(f"--- PAGE {num} ---\n{text}" for num, text in batch)
+    """Merge per-page schema dicts in page order; the first non-null value of a field wins."""
+    merged = [None] * FIELD_COUNT
+    for schema in page_schemas.values():
+        merge_slots(merged, to_slots(schema))
+    return to_schema(merged)
 
-    prompt = (
+
+def build_batch_prompt(batch, schema_text: str) -> str:
+    """The extraction prompt for a batch of (page number, text) pairs."""
+    combined_text = "\n\n".join(f"--- PAGE {num} ---\n{text}" for num, text in batch)
+    return (
         "You are a strict JSON formatter. "
         "Return ONLY valid JSON with no markdown fences or commentary. "
         "Extract every possible field even if unclear; "
         "guess sensibly but never omit required keys.\n\n"
         "For each page, return results in a dictionary keyed by the page number.\n"
-        f"Strict JSON schema for each page:\n{schema_text}\n\n"
+        "Tables are given as [TABLE n] blocks: one row per line, cells separated by '|', "
+        "the first row holding the column headings.\n"
+        f"Schema for each page:\n{schema_text}\n\n"
         f"Document text:\n{combined_text}"
     )
 
+
+async def process_batch(provider: LLMProvider, batch, schema_text, batch_id: int):
+    """Process a batch of pages asynchronously; returns {page number: slot list} (see schema.py)"""
+    prompt = build_batch_prompt(batch, schema_text)
+
     page_nums = [num for num, _ in batch]
     logger.info(f"[BATCH {batch_id}] Starting pages {page_nums}")
 
     try:
-        resp = await model.ainvoke([HumanMessage(content=prompt)])
-        raw_output = getattr(resp, "content", str(resp))
-        parsed = safe_json_parse(raw_output)
+        raw_output = await provider.agenerate(prompt)
+        parsed = safe_json_parse(raw_output, provider=provider)
 
+        LLM_BATCHES.inc(outcome="ok")
         logger.info(f"[BATCH {batch_id}] ✅ Success for pages {page_nums}")
-        return {num: ensure_schema_keys(parsed.get(str(num), {})) for num, _ in batch}
+        return {num: to_slots(parsed.get(str(num), {})) for num, _ in batch}
 
     except Exception as e:
+        LLM_BATCHES.inc(outcome="failed")
         logger.warning(f"[BATCH {batch_id}] ❌ Failed for pages {page_nums}: {e}")
-        return {num: ensure_schema_keys({}) for num, _ in batch}
+        return {num: [None] * FIELD_COUNT for num, _ in batch}
 
 
 async def run_pipeline_on_pdf(
     pdf_path: str,
     max_pages: int = 0,        # 0 = all pages
-    batch_size: int = 2,
-    max_concurrent: int = 3
+    batch_size: int = PIPELINE_BATCH_SIZE,
+    max_concurrent: int = PIPELINE_MAX_CONCURRENT,
+    provider: Optional[LLMProvider] = None,
+    ocr_zoom: float = OCR_ZOOM,
 ):
     """
-    Async pipeline with parallel Gemini requests.
+    Async pipeline with parallel LLM requests.
     max_pages=0 -> process all pages
+    provider defaults to the configured LLM provider (LLM_PROVIDER)
+    batch_size, max_concurrent and ocr_zoom default to PIPELINE_BATCH_SIZE,
+    PIPELINE_MAX_CONCURRENT and OCR_ZOOM (see config.py, benchmarks/autotune.py)
     """
     logger.info(f"📄 Starting pipeline for {pdf_path}")
 
-    pages = extract_text_with_ocr(pdf_path)
-    total_pages = len(pages)
+    ocr_pages: Dict[int, Dict[str, Any]] = {}
+    page_modes: Dict[int, str] = {}
+    # The PDF is opened once for the text and the tables
+    with fitz.open(pdf_path) as doc:
+        with PIPELINE_STAGE_SECONDS.time(stage="extract"):
+            raw_pages = extract_raw_text(
+                pdf_path, ocr_zoom=ocr_zoom, ocr_stats=ocr_pages, page_modes=page_modes, doc=doc
+            )
+            pages = {num: clean_ocr_text(text) for num, text in raw_pages.items()}
+        total_pages = len(pages)
+
+        # Limit to first N pages if set
+        limited_pages = pages if max_pages == 0 else dict(list(pages.items())[:max_pages])
+
+        # Ruled grids (margin ratchets, covenant levels) go to the LLM as compact
+        # rows instead of their flattened cell-by-cell text. Only on pages read
+        # from the text layer: for OCR'd pages it would drop the OCR text.
+        with PIPELINE_STAGE_SECONDS.time(stage="tables"):
+            tables, outside_text = extract_tables(
+                doc, [num for num in limited_pages if page_modes.get(num) == "native"]
+            )
 
-    # Limit to first N pages if set
-    limited_pages = pages if max_pages == 0 else dict(list(pages.items())[:max_pages])
+    for mode, count in Counter(page_modes.values()).items():
+        PAGES_PROCESSED.inc(count, mode=mode)
+    for stats in ocr_pages.values():
+        OCR_PAGE_SECONDS.observe(stats["ms"] / 1000, mode=stats["mode"])
     logger.info(f"Processing {len(limited_pages)}/{total_pages} pages")
 
-    model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=GOOGLE_API_KEY
+    # Running headers/footers are detected over the whole document but only
+    # removed from the LLM input; the stored pages keep them
+    boilerplate_lines = find_boilerplate(raw_pages)
+    prompt_pages = {
+        num: clean_ocr_text(strip_boilerplate(raw_pages[num], boilerplate_lines)) for num in limited_pages
+    }
+    tokens_before = sum(estimate_tokens(text) for text in limited_pages.values())
+    tokens_after = sum(estimate_tokens(text) for text in prompt_pages.values())
+    boilerplate = {
+        "lines": sorted(boilerplate_lines),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    logger.info(
+        f"Boilerplate: {len(boilerplate_lines)} recurring lines, "
+        f"~{boilerplate['tokens_saved']} of ~{tokens_before} page tokens saved"
     )
 
-    schema_text = json.dumps(MASTER_SCHEMA, indent=2)
-    page_items = list(limited_pages.items())
+    tokens_flat = sum(estimate_tokens(prompt_pages[num]) for num in tables)
+    for num, page_tables in tables.items():
+        body = clean_ocr_text(strip_boilerplate(outside_text[num], boilerplate_lines))
+        rendered = "\n".join(render_table(table["rows"], i) for i, table in enumerate(page_tables, start=1))
+        prompt_pages[num] = f"{body}\n{rendered}" if body else rendered
+    table_stats = {
+        "pages": len(tables),
+        "tables": sum(len(page_tables) for page_tables in tables.values()),
+        "tokens_flat": tokens_flat,
+        "tokens_compact": sum(estimate_tokens(prompt_pages[num]) for num in tables),
+    }
+    if tables:
+        logger.info(
+            f"Tables: {table_stats['tables']} on {table_stats['pages']} pages, "
+            f"~{table_stats['tokens_flat']} -> ~{table_stats['tokens_compact']} tokens"
+        )
+
+    ocr = {
+        "modes": dict(Counter(page_modes.values())),
+        "page_modes": page_modes,
+        "pages": len(ocr_pages),
+        "total_ms": round(sum(stats["ms"] for stats in ocr_pages.values()), 1),
+        "peak_image_kb": max((stats["image_kb"] for stats in ocr_pages.values()), default=0),
+        "per_page": ocr_pages,
+    }
+    if ocr_pages:
+        logger.info(
+            f"OCR: {ocr['pages']} pages {ocr['modes']} in {ocr['total_ms']} ms, "
+            f"largest image {ocr['peak_image_kb']} KB"
+        )
+
+    provider = provider or llm
+    schema = compile_schema()
+    page_items = list(prompt_pages.items())
+
+    # Fixed prompt cost: instructions and schema, sent once per batch request
+    requests = -(-len(page_items) // batch_size)
+    overhead_tokens = estimate_tokens(build_batch_prompt([], schema.text))
+    page_tokens = sum(estimate_tokens(text) for text in prompt_pages.values())
+    prompt_stats = {
+        "schema_tokens": schema.tokens,
+        "overhead_tokens_per_request": overhead_tokens,
+        "requests": requests,
+        "overhead_tokens": overhead_tokens * requests,
+        "page_tokens": page_tokens,
+    }
+    logger.info(
+        f"Prompt: ~{overhead_tokens} fixed tokens x {requests} requests, ~{page_tokens} page tokens"
+    )
 
     tasks: List[asyncio.Task] = []
     semaphore = asyncio.Semaphore(max_concurrent)  # limit concurrent requests
 
     async def sem_task(batch, batch_id: int):
-        async with semaphore:
-            return await process_batch(model, batch, schema_text, batch_id)
+        queued = time.perf_counter()
+        with LLM_QUEUE_DEPTH.track():
+            await semaphore.acquire()
+        LLM_QUEUE_SECONDS.observe(time.perf_counter() - queued)
+        try:
+            return await process_batch(provider, batch, schema.text, batch_id)
+        finally:
+            semaphore.release()
 
     # schedule all batches
     for i in range(0, len(page_items), batch_size):
@@ -121,20 +240,26 @@ async def run_pipeline_on_pdf(
         batch_id = i // batch_size + 1
         tasks.append(asyncio.create_task(sem_task(batch, batch_id)))
 
-    results = await asyncio.gather(*tasks)
-
-    # merge all results
-    page_results: Dict[int, Dict[str, Any]] = {}
-    for r in results:
-        page_results.update(r)
+    with PIPELINE_STAGE_SECONDS.time(stage="llm"):
+        results = await asyncio.gather(*tasks)
 
-    merged_schema = merge_schemas(page_results)
-    final_schema = ensure_schema_keys(merged_schema)
+    # merge all results (slot lists, in page order)
+    with PIPELINE_STAGE_SECONDS.time(stage="merge"):
+        merged_slots = [None] * FIELD_COUNT
+        for r in results:
+            for slots in r.values():
+                merge_slots(merged_slots, slots)
+        final_schema = to_schema(merged_slots)
 
     logger.info("✅ Pipeline finished successfully")
 
     return {
         "pages": limited_pages,
         "schema": final_schema,
-        "full_text": "\n\n".join(limited_pages.values())
+        "full_text": "\n\n".join(limited_pages.values()),
+        "boilerplate": boilerplate,
+        "ocr": ocr,
+        "tables": tables,
+        "table_stats": table_stats,
+        "prompt_stats": prompt_stats,
     }
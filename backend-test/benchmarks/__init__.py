@@ -0,0 +1,5 @@
+"""
+Benchmarks for the backend-test pipeline. Run from the backend-test folder, e.g.:
+
+    python -m benchmarks.bench_ocr
+"""
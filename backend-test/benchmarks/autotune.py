@@ -0,0 +1,273 @@
+"""
+Autotune PIPELINE_BATCH_SIZE, PIPELINE_MAX_CONCURRENT and OCR_ZOOM.
+
+Runs run_pipeline_on_pdf over a corpus (the PDFs in uploads/) for each
+candidate setting with a simulated LLM and writes the fastest setting
+within budget to a dotenv file that config.py loads (PIPELINE_TUNING_FILE,
+pipeline_tuning.env by default; values in .env or the environment win).
+
+The simulated LLM answers like the synthetic provider after
+--llm-latency-ms plus --llm-latency-per-kchar-ms per 1000 prompt
+characters, fails with --llm-error-rate, and rejects requests beyond
+--llm-max-in-flight concurrent ones (a provider rate limit). With
+--profile-from jobs.json the latency is instead fitted to the LLM calls
+recorded in the jobs' llm_usage.
+
+Each setting is scored on:
+- pages_per_s: pages through the whole pipeline per second of wall time
+- error_rate: share of LLM batches that failed (their pages get no fields)
+- accuracy: similarity of the OCR'd page texts to an OCR at MAX_OCR_DPI
+  (1.0 when the corpus needs no OCR)
+
+Settings over --max-error-rate or under --min-accuracy are rejected. How
+batch size affects the LLM's answers themselves cannot be simulated; check
+a tuned batch size against a real model before relying on it.
+
+The default adaptive search changes one setting at a time, starting from
+the current configuration, for as long as that makes the pipeline faster;
+--search grid tries every combination.
+
+    python -m benchmarks.autotune --llm-latency-ms 1500 --llm-max-in-flight 8
+    python -m benchmarks.autotune --profile-from jobs.json --search grid --report tuning.json
+"""
+
+import argparse
+import asyncio
+import difflib
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils import LLMError, SyntheticProvider, clean_ocr_text, extract_raw_text  # noqa: E402
+from app.utils.config import OCR_ZOOM, PIPELINE_BATCH_SIZE, PIPELINE_MAX_CONCURRENT, PIPELINE_TUNING_FILE  # noqa: E402
+from app.utils.metrics import LLM_BATCHES  # noqa: E402
+from app.utils.ocr_utils import MAX_OCR_DPI  # noqa: E402
+from app.workflows.pdf_pipeline import run_pipeline_on_pdf  # noqa: E402
+
+KNOBS = ("batch_size", "max_concurrent", "ocr_zoom")
+
+
+class LimitedProvider(SyntheticProvider):
+    """Synthetic LLM that rejects requests beyond max_in_flight concurrent ones."""
+
+    name = "synthetic"
+
+    def __init__(self, max_in_flight: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def _agenerate(self, prompt: str, model: str) -> str:
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise LLMError("rate limited")
+        self.in_flight += 1
+        try:
+            return await super()._agenerate(prompt, model)
+        finally:
+            self.in_flight -= 1
+
+
+def fit_latency_profile(job_file: str) -> Tuple[float, float]:
+    """(latency_ms, latency_per_kchar_ms) fitted by least squares to the recorded LLM calls."""
+    with open(job_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    points = [
+        (call["prompt_chars"] / 1000, call["latency_ms"])
+        for job in jobs.values()
+        for call in ((job.get("llm_usage") or {}).get("requests") or [])
+        if call.get("ok") and not call.get("cached") and call.get("stage") == "extraction"
+    ]
+    if len(points) < 2:
+        raise SystemExit(f"Fewer than 2 recorded extraction calls in {job_file} (llm_usage.requests)")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x if var_x else 0.0
+    slope = max(slope, 0.0)
+    return max(mean_y - slope * mean_x, 0.0), slope
+
+
+def reference_texts(pdf_path: str) -> Dict[int, str]:
+    """Page texts with every OCR'd page rendered at MAX_OCR_DPI."""
+    ocr_pages: Dict[int, Dict[str, Any]] = {}
+    raw = extract_raw_text(pdf_path, ocr_zoom=MAX_OCR_DPI / 72, ocr_stats=ocr_pages)
+    return {num: clean_ocr_text(raw[num]) for num in ocr_pages}
+
+
+def text_similarity(pages: Dict[int, str], reference: Dict[int, str]) -> float:
+    compared = [num for num in reference if num in pages]
+    if not compared:
+        return 1.0
+    ratios = [difflib.SequenceMatcher(None, pages[num], reference[num], autojunk=False).ratio() for num in compared]
+    return sum(ratios) / len(ratios)
+
+
+class Tuner:
+    def __init__(self, documents: List[str], args, latency: Tuple[float, float]):
+        self.documents = documents
+        self.args = args
+        self.latency_ms, self.latency_per_kchar_ms = latency
+        self.references = {path: reference_texts(path) for path in documents}
+        self.trials: Dict[Tuple, Dict[str, Any]] = {}
+
+    def provider(self) -> LimitedProvider:
+        return LimitedProvider(
+            max_in_flight=self.args.llm_max_in_flight,
+            latency_ms=self.latency_ms,
+            latency_per_kchar_ms=self.latency_per_kchar_ms,
+            error_rate=self.args.llm_error_rate,
+            seed=self.args.seed,
+        )
+
+    def within_budget(self, trial: Dict[str, Any]) -> bool:
+        return trial["error_rate"] <= self.args.max_error_rate and trial["accuracy"] >= self.args.min_accuracy
+
+    async def trial(self, batch_size: int, max_concurrent: int, ocr_zoom: float) -> Dict[str, Any]:
+        key = (batch_size, max_concurrent, ocr_zoom)
+        if key in self.trials:
+            return self.trials[key]
+
+        provider = self.provider()
+        ok_before, failed_before = LLM_BATCHES.value(outcome="ok"), LLM_BATCHES.value(outcome="failed")
+        pages, similarities = 0, []
+        started = time.perf_counter()
+        for path in self.documents:
+            run = await run_pipeline_on_pdf(
+                path,
+                max_pages=self.args.max_pages,
+                batch_size=batch_size,
+                max_concurrent=max_concurrent,
+                provider=provider,
+                ocr_zoom=ocr_zoom,
+            )
+            pages += len(run["pages"])
+            similarities.append(text_similarity(run["pages"], self.references[path]))
+        elapsed = time.perf_counter() - started
+
+        failed = LLM_BATCHES.value(outcome="failed") - failed_before
+        batches = LLM_BATCHES.value(outcome="ok") - ok_before + failed
+        trial = {
+            "batch_size": batch_size,
+            "max_concurrent": max_concurrent,
+            "ocr_zoom": ocr_zoom,
+            "pages": pages,
+            "seconds": round(elapsed, 3),
+            "pages_per_s": round(pages / elapsed, 3),
+            "error_rate": round(failed / batches, 4) if batches else 0.0,
+            "rate_limited": provider.rejected,
+            "accuracy": round(sum(similarities) / len(similarities), 4),
+        }
+        trial["within_budget"] = self.within_budget(trial)
+        self.trials[key] = trial
+        print(" ".join(f"{k}={v}" for k, v in trial.items()), flush=True)
+        return trial
+
+    def better(self, trial: Dict[str, Any], best: Optional[Dict[str, Any]]) -> bool:
+        if best is None:
+            return True
+        if trial["within_budget"] != best["within_budget"]:
+            return trial["within_budget"]
+        return trial["pages_per_s"] > best["pages_per_s"]
+
+    async def grid(self, space: Dict[str, List]) -> Optional[Dict[str, Any]]:
+        best = None
+        for values in itertools.product(*(space[knob] for knob in KNOBS)):
+            trial = await self.trial(*values)
+            if self.better(trial, best):
+                best = trial
+        return best
+
+    async def adaptive(self, space: Dict[str, List], start: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Coordinate search: try each value of one setting with the others fixed, keep the best, repeat."""
+        current = dict(start)
+        best = await self.trial(*(current[knob] for knob in KNOBS))
+        for _ in range(self.args.rounds):
+            improved = False
+            for knob in KNOBS:
+                for value in space[knob]:
+                    trial = await self.trial(*({**current, knob: value}[k] for k in KNOBS))
+                    if self.better(trial, best):
+                        best, improved = trial, True
+                current = {knob: best[knob] for knob in KNOBS}
+            if not improved:
+                break
+        return best
+
+
+def write_tuning(path: str, best: Dict[str, Any], documents: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f"# benchmarks/autotune.py over {len(documents)} documents: {best['pages_per_s']} pages/s, "
+            f"error rate {best['error_rate']}, accuracy {best['accuracy']}\n"
+        )
+        f.write(f"PIPELINE_BATCH_SIZE={best['batch_size']}\n")
+        f.write(f"PIPELINE_MAX_CONCURRENT={best['max_concurrent']}\n")
+        f.write(f"OCR_ZOOM={best['ocr_zoom']}\n")
+
+
+async def main_async(args):
+    documents = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+        if name.endswith(".pdf") and "_highlighted" not in name
+    )
+    if not documents:
+        raise SystemExit(f"No PDFs found in {args.corpus}")
+    latency = fit_latency_profile(args.profile_from) if args.profile_from else (args.llm_latency_ms, args.llm_latency_per_kchar_ms)
+    print(f"documents={len(documents)} llm_latency_ms={latency[0]:.1f} llm_latency_per_kchar_ms={latency[1]:.1f}", flush=True)
+
+    tuner = Tuner(documents, args, latency)
+    space = {"batch_size": args.batch_sizes, "max_concurrent": args.concurrency, "ocr_zoom": args.zooms}
+    if not any(tuner.references.values()):
+        space["ocr_zoom"] = [OCR_ZOOM]  # no page needs OCR, the zoom makes no difference
+    start = {"batch_size": PIPELINE_BATCH_SIZE, "max_concurrent": PIPELINE_MAX_CONCURRENT, "ocr_zoom": OCR_ZOOM}
+
+    best = await (tuner.grid(space) if args.search == "grid" else tuner.adaptive(space, start))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"latency_profile": latency, "best": best, "trials": list(tuner.trials.values())}, f, indent=2)
+    if best is None or not best["within_budget"]:
+        raise SystemExit("No setting met the error-rate and accuracy budget; nothing written")
+
+    baseline = tuner.trials.get(tuple(start[knob] for knob in KNOBS))
+    if baseline:
+        print(f"baseline pages_per_s={baseline['pages_per_s']} best pages_per_s={best['pages_per_s']}", flush=True)
+    write_tuning(args.output, best, documents)
+    print(f"wrote {args.output}: batch_size={best['batch_size']} max_concurrent={best['max_concurrent']} ocr_zoom={best['ocr_zoom']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="uploads")
+    parser.add_argument("--max-pages", type=int, default=0, help="pages per document sent to the LLM (0 = all)")
+    parser.add_argument("--search", choices=("adaptive", "grid"), default="adaptive")
+    parser.add_argument("--rounds", type=int, default=3, help="adaptive search rounds")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 3, 4, 6, 8, 12])
+    parser.add_argument("--zooms", type=float, nargs="+", default=[1.5, 2.0, 2.5, 3.0])
+    parser.add_argument("--llm-latency-ms", type=float, default=1000.0)
+    parser.add_argument("--llm-latency-per-kchar-ms", type=float, default=20.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-max-in-flight", type=int, default=0, help="provider concurrency limit (0 = none)")
+    parser.add_argument("--profile-from", help="fit the LLM latency to the llm_usage calls recorded in this job file")
+    parser.add_argument("--max-error-rate", type=float, default=0.02)
+    parser.add_argument("--min-accuracy", type=float, default=0.98)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=PIPELINE_TUNING_FILE)
+    parser.add_argument("--report", help="write every trial as JSON to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("app.workflows.pdf_pipeline").setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Merge cost per 1,000 pages: nested dicts (deepcopy) vs slot lists.
+
+Builds --pages synthetic per-page LLM results (every schema field present,
+--fill of them with a value, as the LLM returns them) and times turning
+them into the final result:
+
+- "dicts": the former path, kept here as the reference: ensure_schema_keys
+  on a deepcopy of MASTER_SCHEMA per page, a field-by-field merge of the
+  nested dicts and ensure_schema_keys on the merged result
+- "slots": the pipeline's path: to_slots per page (in process_batch),
+  merge_slots and to_schema once (see app/utils/schema.py)
+- "merge_schemas" / "merge_page_structs_into_master": the dict-in,
+  dict-out helpers, now backed by slot lists
+
+Both paths must produce the same result; times are the best of --repeat
+runs, reported in ms per 1,000 pages.
+
+    python -m benchmarks.bench_merge
+    python -m benchmarks.bench_merge --pages 5000 --fill 0.1 --output merge.json
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.merge_utils import _take_first_non_null, merge_page_structs_into_master  # noqa: E402
+from app.utils.schema import FIELD_COUNT, MASTER_SCHEMA, merge_slots, to_schema, to_slots  # noqa: E402
+from app.workflows.pdf_pipeline import merge_schemas  # noqa: E402
+
+
+def page_results(pages: int, fill: float, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    results = []
+    for page in range(1, pages + 1):
+        result = {}
+        for section, fields in MASTER_SCHEMA.items():
+            result[section] = {}
+            for key in fields:
+                if rng.random() < fill:
+                    result[section][key] = {"value": f"{key} on page {page}", "page_number": page}
+                else:
+                    result[section][key] = {"value": None, "page_number": None}
+        results.append(result)
+    return results
+
+
+def dict_ensure_schema_keys(struct):
+    """ensure_schema_keys as it was: normalize into a deepcopy of MASTER_SCHEMA."""
+    out = copy.deepcopy(MASTER_SCHEMA)
+    if not isinstance(struct, dict):
+        return out
+    for section, fields in out.items():
+        incoming_section = struct.get(section, {})
+        if not isinstance(incoming_section, dict):
+            continue
+        for key in fields.keys():
+            if key in incoming_section:
+                val = incoming_section[key]
+                if isinstance(val, dict):
+                    out[section][key] = {"value": val.get("value"), "page_number": val.get("page_number")}
+                elif val is None:
+                    out[section][key] = {"value": None, "page_number": None}
+                else:
+                    out[section][key] = {"value": str(val) if isinstance(val, (int, float, list)) else val, "page_number": None}
+    return out
+
+
+def dict_path(results):
+    per_page = [dict_ensure_schema_keys(result) for result in results]  # process_batch
+    merged = dict_ensure_schema_keys({})
+    for schema in per_page:  # merge_schemas
+        normalized = dict_ensure_schema_keys(schema)
+        for section, fields in normalized.items():
+            for key, obj in fields.items():
+                merged[section][key] = _take_first_non_null(merged[section].get(key), obj)
+    return dict_ensure_schema_keys(merged)
+
+
+def slot_path(results):
+    per_page = [to_slots(result) for result in results]  # process_batch
+    merged = [None] * FIELD_COUNT
+    for slots in per_page:
+        merge_slots(merged, slots)
+    return to_schema(merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--fill", type=float, default=0.05, help="share of fields with a value on a page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = page_results(args.pages, args.fill)
+    if dict_path(results) != slot_path(results):
+        raise SystemExit("The slot path does not produce the same result as the dict path")
+
+    cases = {
+        "dicts": lambda: dict_path(results),
+        "slots": lambda: slot_path(results),
+        "merge_schemas": lambda: merge_schemas(dict(enumerate(results, 1))),
+        "merge_page_structs_into_master": lambda: merge_page_structs_into_master(results),
+    }
+    timings = {}
+    for name, func in cases.items():
+        best_s = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        timings[name] = round(best_s * 1000 * 1000 / args.pages, 2)
+        print(f"case={name} pages={args.pages} fields={FIELD_COUNT} ms_per_1000_pages={timings[name]}", flush=True)
+    print(f"speedup={timings['dicts'] / timings['slots']:.1f}x", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pages": args.pages, "fill": args.fill, "ms_per_1000_pages": timings}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
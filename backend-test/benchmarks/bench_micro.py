@@ -0,0 +1,183 @@
+"""
+Microbenchmarks for the per-page hot paths, with regression budgets.
+
+Fixtures come from the completed jobs in jobs.json: the stored result is
+split into one schema-shaped struct per page (the shape the LLM returns
+per page), the stored field values are located again on their pages of
+the uploaded PDF, and the raw page text of that PDF is cleaned and
+normalized.
+
+Each case reports its best time per item over several rounds. Budgets
+are in calibration units (cu): the best time of a fixed pure-Python
+workload measured in the same run, so they hold on faster or slower
+machines. A case over budget is reported as "slow" and the script exits
+with status 1. Budgets sit at about twice the times measured when they
+were set; lower them when a change makes a case faster.
+
+    python -m benchmarks.bench_micro
+    python -m benchmarks.bench_micro --filter merge --output micro.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # noqa: E402
+
+from app.api.pdf_highlight import find_phrase_coords_from_ai, normalize_text  # noqa: E402
+from app.utils.merge_utils import _take_first_non_null, merge_page_structs_into_master  # noqa: E402
+from app.utils.ocr_utils import clean_ocr_text  # noqa: E402
+from app.utils.schema import MASTER_SCHEMA, ensure_schema_keys, get_empty_schema, to_slots  # noqa: E402
+from app.workflows.pdf_pipeline import merge_schemas  # noqa: E402
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], Any]
+    items: int  # items handled by one call of func; times are reported per item
+    budget_cu: float
+
+
+def calibration_workload():
+    """Fixed dict / string work in the style of the code under test."""
+    rows = [{"value": str(i), "page_number": i} for i in range(200)]
+    return "|".join(row["value"] for row in rows if row["page_number"] % 3)
+
+
+def measure(func: Callable[[], Any], repeat: int = 7, min_round_s: float = 0.02) -> float:
+    """Seconds per call: best of repeat rounds of at least min_round_s each."""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_round_s:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def local_path(file_path: str, uploads: str) -> str:
+    # Stored paths may use Windows separators
+    return os.path.join(uploads, os.path.basename(file_path.replace("\\", "/")))
+
+
+def load_fixture(job_file: str, uploads: str) -> Dict[str, Any]:
+    """The first completed job with a result whose PDF is in uploads/."""
+    with open(job_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    for job in jobs.values():
+        if job.get("status") != "completed" or not isinstance(job.get("result"), dict):
+            continue
+        pdf_path = local_path(job.get("file_path") or job["filename"], uploads)
+        if os.path.exists(pdf_path):
+            return {"filename": job["filename"], "result": job["result"], "pdf_path": pdf_path}
+    raise SystemExit(f"No completed job in {job_file} with its PDF in {uploads}")
+
+
+def page_structs(result: Dict[str, Any], pages: int) -> List[Dict[str, Any]]:
+    """One full schema-shaped struct per page, holding the stored values found on that page."""
+    structs = []
+    for page in range(1, pages + 1):
+        struct = {}
+        for section, fields in MASTER_SCHEMA.items():
+            struct[section] = {}
+            stored = result.get(section) or {}
+            for key in fields:
+                obj = stored.get(key) or {}
+                if obj.get("value") and obj.get("page_number") == page:
+                    struct[section][key] = {"value": obj["value"], "page_number": page}
+                else:
+                    struct[section][key] = {"value": None, "page_number": None}
+        structs.append(struct)
+    return structs
+
+
+def build_cases(fixture: Dict[str, Any]) -> Tuple[List[Case], fitz.Document]:
+    doc = fitz.open(fixture["pdf_path"])
+    raw_pages = [page.get_text("text") for page in doc]
+    structs = page_structs(fixture["result"], len(doc))
+
+    located = []
+    for section in fixture["result"].values():
+        for obj in (section or {}).values():
+            if isinstance(obj, dict) and obj.get("value") and isinstance(obj.get("page_number"), int):
+                if 1 <= obj["page_number"] <= len(doc):
+                    page = doc[obj["page_number"] - 1]
+                    page.get_text("blocks")
+                    located.append((page, str(obj["value"]), " ".join(str(obj["value"]).split()[:4])))
+    if not located:
+        raise SystemExit(f"No stored values to locate in {fixture['filename']}")
+
+    pairs = [
+        (a[section][key], b[section][key])
+        for a, b in zip(structs, structs[1:])
+        for section, fields in a.items()
+        for key in fields
+    ]
+
+    def run_each(func, args_list):
+        def run():
+            for args in args_list:
+                func(*args)
+        return run
+
+    return [
+        Case("schema.get_empty_schema", get_empty_schema, 1, 0.8),
+        Case("schema.ensure_schema_keys", run_each(ensure_schema_keys, [(s,) for s in structs]), len(structs), 1.6),
+        Case("schema.to_slots", run_each(to_slots, [(s,) for s in structs]), len(structs), 0.8),
+        Case("merge_utils._take_first_non_null", run_each(_take_first_non_null, pairs), len(pairs), 0.012),
+        Case("merge_utils.merge_page_structs_into_master", lambda: merge_page_structs_into_master(structs), 1, 80.0),
+        Case("pdf_pipeline.merge_schemas", lambda: merge_schemas(dict(enumerate(structs, 1))), 1, 80.0),
+        Case("ocr_utils.clean_ocr_text", run_each(clean_ocr_text, [(t,) for t in raw_pages]), len(raw_pages), 7.0),
+        Case("pdf_highlight.normalize_text", run_each(normalize_text, [(t,) for t in raw_pages]), len(raw_pages), 1.6),
+        Case("pdf_highlight.find_phrase_coords_from_ai", run_each(find_phrase_coords_from_ai, located), len(located), 120.0),
+    ], doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", default="jobs.json")
+    parser.add_argument("--uploads", default="uploads")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.jobs, args.uploads)
+    cases, doc = build_cases(fixture)
+    try:
+        calibration_s = measure(calibration_workload, args.repeat)
+        print(f"fixture={fixture['filename']} calibration_us={calibration_s * 1e6:.1f}", flush=True)
+
+        results, slow = [], []
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            per_item_s = measure(case.func, args.repeat) / case.items
+            units = per_item_s / calibration_s
+            status = "ok" if units <= case.budget_cu else "slow"
+            if status == "slow":
+                slow.append(case.name)
+            results.append({
+                "case": case.name,
+                "items": case.items,
+                "us_per_item": round(per_item_s * 1e6, 3),
+                "cu_per_item": round(units, 4),
+                "budget_cu": case.budget_cu,
+                "status": status,
+            })
+            print(" ".join(f"{k}={v}" for k, v in results[-1].items()), flush=True)
+    finally:
+        doc.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"calibration_us": round(calibration_s * 1e6, 3), "results": results}, f, indent=2)
+    if slow:
+        raise SystemExit(f"Over budget: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+OCR rendering benchmark.
+
+Builds scanned copies of a few pages of a PDF (the page rendered at a given
+DPI and placed back as an image, so there is no text layer) and compares the
+previous OCR handoff (RGB render at a fixed zoom, PNG encode, PIL decode,
+PNG temp file for Tesseract) with the current one (grayscale render at the
+scan's resolution, image built on the pixmap samples, PGM temp file).
+
+Each mode runs in its own process and reports per-page time and peak RSS.
+When the tesseract binary is installed the time includes OCR itself;
+otherwise it stops after writing Tesseract's input file.
+
+    python -m benchmarks.bench_ocr --dpi 150 200 300 --pages 10
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # noqa: E402
+import pytesseract  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.utils.ocr_utils import choose_ocr_zoom, pixmap_to_image, render_page_gray  # noqa: E402
+
+LEGACY_ZOOM = 2.5
+
+
+def make_scanned_pdf(source: str, output: str, dpi: int, pages: int):
+    src = fitz.open(source)
+    doc = fitz.open()
+    try:
+        for page in list(src)[:pages]:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            scanned = doc.new_page(width=page.rect.width, height=page.rect.height)
+            scanned.insert_image(scanned.rect, pixmap=pix)
+        doc.save(output, deflate=True)
+    finally:
+        doc.close()
+        src.close()
+
+
+def hand_to_tesseract(image, have_tesseract: bool):
+    if have_tesseract:
+        return pytesseract.image_to_string(image)
+    with pytesseract.pytesseract.save(image):
+        return ""
+
+
+def legacy_page(page, have_tesseract: bool):
+    pix = page.get_pixmap(matrix=fitz.Matrix(LEGACY_ZOOM, LEGACY_ZOOM), alpha=False)
+    image = Image.open(io.BytesIO(pix.tobytes("png")))
+    hand_to_tesseract(image, have_tesseract)
+    return LEGACY_ZOOM, pix.width * pix.height * pix.n
+
+
+def current_page(page, have_tesseract: bool):
+    zoom, _ = choose_ocr_zoom(page)
+    pix = render_page_gray(page, zoom)
+    image = pixmap_to_image(pix)
+    try:
+        hand_to_tesseract(image, have_tesseract)
+    finally:
+        image.close()
+        del image
+    return zoom, pix.width * pix.height * pix.n
+
+
+def run_mode(pdf_path: str, mode: str):
+    """Runs in a child process so peak RSS belongs to one mode only."""
+    have_tesseract = shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+    handler = legacy_page if mode == "legacy" else current_page
+    doc = fitz.open(pdf_path)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies, zooms, pixel_bytes = [], set(), 0
+    for page in doc:
+        started = time.perf_counter()
+        zoom, size = handler(page, have_tesseract)
+        latencies.append((time.perf_counter() - started) * 1000)
+        zooms.add(round(zoom, 2))
+        pixel_bytes = max(pixel_bytes, size)
+    doc.close()
+    return {
+        "mode": mode,
+        "tesseract": have_tesseract,
+        "zoom": sorted(zooms),
+        "page_p50_ms": round(statistics.median(latencies), 1),
+        "page_max_ms": round(max(latencies), 1),
+        "pixels_kb": round(pixel_bytes / 1024),
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", default="uploads/Senior-Facilities-Agreement-Ares-Management-Limited-1.pdf")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[150, 200, 300])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", nargs=2, metavar=("PDF", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(*args.child)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for dpi in args.dpi:
+            scanned = os.path.join(tmp, f"scan-{dpi}.pdf")
+            make_scanned_pdf(args.pdf, scanned, dpi, args.pages)
+            for mode in ("legacy", "current"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ocr", "--child", scanned, mode],
+                    check=True, capture_output=True, text=True,
+                    cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+                )
+                result = {"scan_dpi": dpi, **json.loads(out.stdout.strip().splitlines()[-1])}
+                results.append(result)
+                print(" ".join(f"{k}={v}" for k, v in result.items()), flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
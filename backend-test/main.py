@@ -26,6 +26,7 @@ app = FastAPI(
         {"name": "PDF Extraction", "description": "Extract and format content from PDFs"},
         {"name": "PDF Highlight", "description": "Highlight text in PDF files"},
         {"name": "PDF Status", "description": "Check status of PDF extraction jobs"},
+        {"name": "Monitoring", "description": "Prometheus metrics and request profiles of the extraction pipeline"},
     ],
 )
 
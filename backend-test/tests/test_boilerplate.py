@@ -0,0 +1,32 @@
+import sys
+import os
+# Ensure 'backend-test' is in sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.utils.boilerplate import find_boilerplate, normalize_line, strip_boilerplate
+
+WORDS = ["Repayment", "Prepayment", "Interest", "Fees", "Tax", "Costs", "Guarantee", "Security"]
+
+def test_page_numbers_are_boilerplate():
+    pages = {num: f"{word} clause\nThe Borrower shall pay the {word}.\n{num + 11}" for num, word in enumerate(WORDS, 1)}
+    boilerplate = find_boilerplate(pages)
+    assert boilerplate == {str(num + 11) for num in pages}
+    assert strip_boilerplate(pages[4], boilerplate) == "Fees clause\nThe Borrower shall pay the Fees."
+
+def test_recurring_years_and_amounts_are_kept():
+    pages = {
+        num: f"2024\n{word} clause\nThe Borrower shall pay the {word}.\n1,000,000\n$ 5,000"
+        for num, word in enumerate(WORDS, 1)
+    }
+    boilerplate = find_boilerplate(pages)
+    assert boilerplate == set()
+    assert strip_boilerplate(pages[4], boilerplate) == pages[4]
+
+def test_numbers_off_the_outer_line_are_not_page_numbers():
+    # The number increases but is not the last line of the page
+    pages = {num: f"{word} clause\n{num}\nThe Borrower shall pay the {word}." for num, word in enumerate(WORDS, 1)}
+    assert find_boilerplate(pages) == set()
+
+def test_list_markers_and_numbers_are_not_candidates():
+    for marker in ("(a)", "ii", "12.3", "1.", "(4)", "12", "2024", "1,000,000"):
+        assert normalize_line(marker) == ""
+    assert normalize_line("Page 3 of 90") == "page # of #"
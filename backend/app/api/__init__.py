@@ -1,8 +1,10 @@
-from . import pdf_extract, pdf_status, authentication, pdf_highlight
+from . import pdf_extract, pdf_status, authentication, pdf_highlight, pdf_pages, pdf_search
 
 __all__ = [
     "authentication",
     "pdf_extract",
     "pdf_highlight",
+    "pdf_pages",
+    "pdf_search",
     "pdf_status",
 ]
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.utils.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def metrics():
+    """Counters and latency histograms of this process in the Prometheus text format."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,20 +1,26 @@
 import re
 import uuid
 import json
-import fitz
+import asyncio
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
 
 from app.utils import (
-    client,
     delete_temp_file,
+    document_pool,
+    llm,
     load_jobs_from_file,
     MAX_FILE_SIZE_BYTES,
     MAX_FILE_SIZE_MB,
     save_file_permanent,
     save_jobs_to_file,
+    utc_now,
 )
+from app.api.pdf_profile import RequestProfile, request_profile
+from app.utils.llm_usage import LLMUsageLedger, estimate_tokens, llm_stage, merge_usage, track_llm_usage
+from app.utils.schema_prompt import compile_schema
+from app.utils.metrics import JOBS_IN_FLIGHT, JOBS_TOTAL, LLM_JSON_REPAIRS, PAGES_PROCESSED, PIPELINE_STAGE_SECONDS
 
 router = APIRouter()
 processing_jobs = load_jobs_from_file()
@@ -130,7 +136,7 @@ class ExtractResponse(BaseModel):
 # -------------------------------
 
 def safe_json_parse(raw_text: str) -> Any:
-    """Try to parse JSON, if fails, ask Gemini to fix it."""
+    """Try to parse JSON, if fails, ask the LLM to fix it."""
     try:
         return json.loads(raw_text)
     except json.JSONDecodeError:
@@ -139,14 +145,13 @@ def safe_json_parse(raw_text: str) -> Any:
         Fix it and return ONLY valid JSON with no extra commentary:
         {raw_text}
         """
-        fix_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[fix_prompt],
-        )
+        LLM_JSON_REPAIRS.inc()
+        with llm_stage("repair"):
+            fix_response = llm.generate(fix_prompt, model="gemini-2.5-flash")
         fixed_text = re.sub(
             r"^```json\s*|\s*```$",
             "",
-            fix_response.text.strip(),
+            fix_response.strip(),
             flags=re.MULTILINE
         ).strip()
         return json.loads(fixed_text)
@@ -163,126 +168,54 @@ def find_null_fields(data, prefix=""):
                 null_fields.extend(find_null_fields(v, path))
     return null_fields
 
+async def track_in_flight():
+    """Count the request in loanbook_jobs_in_flight while it is handled."""
+    with JOBS_IN_FLIGHT.track():
+        yield
+
+def prompt_stats(prompt: str, document_text: str) -> Dict[str, int]:
+    """Estimated tokens of a prompt's fixed part (instructions, schema) and of the document text in it."""
+    page_tokens = estimate_tokens(document_text)
+    return {"overhead_tokens": estimate_tokens(prompt) - page_tokens, "page_tokens": page_tokens}
+
+def read_page_texts(file_path: str) -> Dict[int, str]:
+    """
+    Text layer of every page, read from the pooled document (which stays
+    open for highlights). Blocks while another request holds the document,
+    so async endpoints run it in a worker thread.
+    """
+    with document_pool.checkout(file_path) as doc:
+        return {page_number + 1: doc[page_number].get_text("text") for page_number in range(len(doc))}
+
+def record_llm_usage(job_id: str, usage: LLMUsageLedger):
+    """Add the LLM calls of a request made after extraction (e.g. highlights) to a job's llm_usage."""
+    job = processing_jobs.get(job_id)
+    if job is None or not usage.calls:
+        return
+    job["llm_usage"] = merge_usage(job.get("llm_usage"), usage)
+    # Not updated_at: that dates the extraction (indexed as extracted_at); this
+    # only renews the job signature, so cached status responses are rebuilt
+    job["usage_updated_at"] = utc_now()
+    save_jobs_to_file(processing_jobs)
+
 
 # -------------------------------
 # Endpoint
 # -------------------------------
 
-@router.post("/extract-and-format/", response_model=ExtractResponse)
+@router.post("/extract-and-format/", response_model=ExtractResponse, dependencies=[Depends(track_in_flight)])
 async def extract_and_format_pdf(
     file: UploadFile = File(...),
-    format_instructions: str = (
-    "Extract information into the following strict JSON schema. "
-    "For each category, return its fields as key-value pairs. "
-    "Each field must be represented as an object with: "
-    "{ 'value': str, 'page_number': int }. "
-    "Schema:\n"
-    "{ "
-    "'dates': {"
-    "  'agreement_date': { 'value': str, 'page_number': int }, "
-    "  'effective_date': { 'value': str, 'page_number': int }, "
-    "  'maturity_date': { 'value': str, 'page_number': int }, "
-    "  'end_date_of_respective_facility': { 'value': str, 'page_number': int }, "
-    "  'start_date_of_facility_availability_period_facility_a': { 'value': str, 'page_number': int }, "
-    "  'end_date_of_facility_availability_period_facility_a': { 'value': str, 'page_number': int }, "
-    "  'start_date_of_facility_availability_period_facility_b': { 'value': str, 'page_number': int }, "
-    "  'end_date_of_facility_availability_period_facility_b': { 'value': str, 'page_number': int } "
-    "}, "
-    "'general': {"
-    "  'borrower': { 'value': str, 'page_number': int }, "
-    "  'agent': { 'value': str, 'page_number': int }, "
-    "  'security_agent': { 'value': str, 'page_number': int }, "
-    "  'sponsor_name': { 'value': str, 'page_number': int }, "
-    "  'majority_lenders': { 'value': str, 'page_number': int } "
-    "}, "
-    "'definitions': {"
-    "  'lma_defined_term': { 'value': str, 'page_number': int }, "
-    "  'reference_bank_definition': { 'value': str, 'page_number': int }, "
-    "  'base_currency': { 'value': str, 'page_number': int }, "
-    "  'optional_currencies': { 'value': str, 'page_number': int }, "
-    "  'disqualified_lender_definition': { 'value': str, 'page_number': int } "
-    "}, "
-    "'credit_facilities': {"
-    "  'stated_term_of_facility': { 'value': str, 'page_number': int }, "
-    "  'facility_name': { 'value': str, 'page_number': int }, "
-    "  'facility_type': { 'value': str, 'page_number': int }, "
-    "  'facility_size_term': { 'value': str, 'page_number': int }, "
-    "  'facility_size_revolver': { 'value': str, 'page_number': int }, "
-    "  'total_facility_size': { 'value': str, 'page_number': int }, "
-    "  'total_commitments': { 'value': str, 'page_number': int }, "
-    "  'loan_commitments': { 'value': str, 'page_number': int }, "
-    "  'term_loan_commitments': { 'value': str, 'page_number': int }, "
-    "  'revolving_loan_commitments': { 'value': str, 'page_number': int }, "
-    "  'repayment_provision': { 'value': str, 'page_number': int }, "
-    "  'repayment_type': { 'value': str, 'page_number': int }, "
-    "  'mandatory_repayment': { 'value': str, 'page_number': int }, "
-    "  'mandatory_prepayment_due_to_change_of_control': { 'value': str, 'page_number': int }, "
-    "  'voluntary_prepayment': { 'value': str, 'page_number': int }, "
-    "  'call_protection_prepayment_clause': { 'value': str, 'page_number': int }, "
-    "  'facility_extension_options': { 'value': str, 'page_number': int }, "
-    "  'facility_extension_option_how_many_years': { 'value': str, 'page_number': int }, "
-    "  'amend_to_extend_clause': { 'value': str, 'page_number': int }, "
-    "  'number_of_extension_options': { 'value': str, 'page_number': int }, "
-    "  'lender_discretion': { 'value': str, 'page_number': int }, "
-    "  'calculation_of_interest': { 'value': str, 'page_number': int }, "
-    "  'initial_margin_text': { 'value': str, 'page_number': int }, "
-    "  'initial_margin_tables': { 'value': str, 'page_number': int }, "
-    "  'interest_rate_convention': { 'value': str, 'page_number': int }, "
-    "  'interest_rate_floor': { 'value': str, 'page_number': int }, "
-    "  'libor_definition': { 'value': str, 'page_number': int }, "
-    "  'arrangement_fees': { 'value': str, 'page_number': int }, "
-    "  'agency_fees': { 'value': str, 'page_number': int } "
-    "}, "
-    "'representations_and_warranties': {"
-    "  'use_of_proceeds': { 'value': str, 'page_number': int }, "
-    "  'material_adverse_change_clause': { 'value': str, 'page_number': int } "
-    "}, "
-    "'covenants': {"
-    "  'interest_coverage_covenant': { 'value': str, 'page_number': int }, "
-    "  'interest_coverage_text': { 'value': str, 'page_number': int }, "
-    "  'interest_coverage_tables': { 'value': str, 'page_number': int }, "
-    "  'total_leverage_covenant': { 'value': str, 'page_number': int }, "
-    "  'total_leverage_text': { 'value': str, 'page_number': int }, "
-    "  'total_leverage_tables': { 'value': str, 'page_number': int }, "
-    "  'restricted_asset_sales_permitted_transfers': { 'value': str, 'page_number': int }, "
-    "  'permitted_acquisitions_clause_text': { 'value': str, 'page_number': int }, "
-    "  'permitted_indebtedness_basket': { 'value': str, 'page_number': int }, "
-    "  'permitted_financial_indebtedness_text': { 'value': str, 'page_number': int }, "
-    "  'prepayment_from_asset_sales_proceeds_clause': { 'value': str, 'page_number': int }, "
-    "  'percent_of_net_cash_proceeds': { 'value': str, 'page_number': int }, "
-    "  'permitted_reinvestment_period': { 'value': str, 'page_number': int }, "
-    "  'equity_cure_provision': { 'value': str, 'page_number': int }, "
-    "  'number_of_equity_cures': { 'value': str, 'page_number': int }, "
-    "  'subsidiary_guarantees': { 'value': str, 'page_number': int }, "
-    "  'transfer_provisions': { 'value': str, 'page_number': int }, "
-    "  'amendment_clause': { 'value': str, 'page_number': int }, "
-    "  'snooze_lose_clause': { 'value': str, 'page_number': int }, "
-    "  'disqualified_lender_list': { 'value': str, 'page_number': int } "
-    "}, "
-    "'defaults': {"
-    "  'events_of_default': { 'value': str, 'page_number': int }, "
-    "  'payment_default_provision': { 'value': str, 'page_number': int }, "
-    "  'insolvency_default': { 'value': str, 'page_number': int }, "
-    "  'misrepresentation_default': { 'value': str, 'page_number': int }, "
-    "  'market_disruption_clause': { 'value': str, 'page_number': int }, "
-    "  'cross_default': { 'value': str, 'page_number': int }, "
-    "  'cross_acceleration': { 'value': str, 'page_number': int }, "
-    "  'no_set_off': { 'value': str, 'page_number': int }, "
-    "  'set_off_prohibited_for_borrower': { 'value': str, 'page_number': int } "
-    "}, "
-    "'miscellaneous': {"
-    "  'bilateral_or_syndicated': { 'value': str, 'page_number': int }, "
-    "  'business_days_convention_calendar': { 'value': str, 'page_number': int }, "
-    "  'business_days_payments_non_business_day_rule': { 'value': str, 'page_number': int }, "
-    "  'business_days_rate_setting_quotation_day': { 'value': str, 'page_number': int }, "
-    "  'governing_law': { 'value': str, 'page_number': int }, "
-    "  'confidentiality_clause': { 'value': str, 'page_number': int }, "
-    "  'language_for_client_communication': { 'value': str, 'page_number': int } "
-    "} "
-    "}"
-)
-
+    format_instructions: Optional[str] = None,
+    profiler: Optional[RequestProfile] = Depends(request_profile),
 ):
+    """
+    Extract the MASTER_SCHEMA fields of a PDF with the LLM.
+
+    The prompt describes the schema in the compact form of compile_schema();
+    a re-upload of a known file only asks for the fields that are still null.
+    format_instructions replaces the compiled schema instructions.
+    """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
 
@@ -300,12 +233,22 @@ async def extract_and_format_pdf(
     existing_job_id = next((jid for jid, job in processing_jobs.items() if job.get("filename") == original_filename), None)
 
     if existing_job_id:
+        if profiler:
+            profiler.job_id = existing_job_id
         job = processing_jobs[existing_job_id]
         result = job.get("result")
         if result:
             null_fields = find_null_fields(result)
+            refill_schema = None
+            if null_fields and format_instructions is None:
+                # Sub-schema of the sections/fields that are still null; paths
+                # MASTER_SCHEMA does not have compile to nothing and are not asked for
+                refill_schema = compile_schema(".".join(path.split(".")[:2]) for path in null_fields)
+                if not refill_schema.fields:
+                    null_fields = []
             if not null_fields:
                 await delete_temp_file(file)
+                JOBS_TOTAL.inc(outcome="cached")
                 return ExtractResponse(
                     job_id=existing_job_id,
                     text_content=json.dumps(result, ensure_ascii=False),
@@ -313,31 +256,36 @@ async def extract_and_format_pdf(
                 )
             else:
                 # Prompt LLM for only null fields
-                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-                page_texts = {page_number + 1: doc[page_number].get_text("text") for page_number in range(len(doc))}
+                with PIPELINE_STAGE_SECONDS.time(stage="extract"):
+                    page_texts = await asyncio.to_thread(read_page_texts, file_path)
+                PAGES_PROCESSED.inc(len(page_texts), mode="native")
                 full_text_with_pages = "\n".join(
                     f"--- PAGE {page_num} ---\n{text}"
                     for page_num, text in page_texts.items()
                 )
+                if refill_schema is not None:
+                    instructions = refill_schema.text
+                else:
+                    instructions = f"Extract ONLY the following fields (return null for others): {null_fields}\n{format_instructions}"
                 prompt = f"""
                 You are a strict JSON formatter. Return ONLY valid JSON with no markdown fences or extra commentary.
-                Extract ONLY the following fields (return null for others): {null_fields}
-                {format_instructions}
+                {instructions}
                 Document text with page numbers:
                 {full_text_with_pages}
                 """
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=[prompt],
-                )
-                raw_output = response.text.strip()
-                clean_output = re.sub(
-                    r"^```json\s*|\s*```$",
-                    "",
-                    raw_output,
-                    flags=re.MULTILINE
-                ).strip()
-                parsed_json = safe_json_parse(clean_output)
+                job.setdefault("prompt_stats", {})["refill"] = prompt_stats(prompt, full_text_with_pages)
+                usage = LLMUsageLedger()
+                with track_llm_usage(usage), llm_stage("refill"):
+                    with PIPELINE_STAGE_SECONDS.time(stage="llm"):
+                        raw_output = llm.generate(prompt, model="gemini-2.5-flash").strip()
+                    with PIPELINE_STAGE_SECONDS.time(stage="parse"):
+                        clean_output = re.sub(
+                            r"^```json\s*|\s*```$",
+                            "",
+                            raw_output,
+                            flags=re.MULTILINE
+                        ).strip()
+                        parsed_json = safe_json_parse(clean_output)
                 # Merge new fields into result
                 def merge_nulls(orig, new):
                     for k, v in new.items():
@@ -349,8 +297,11 @@ async def extract_and_format_pdf(
                 merged_result = merge_nulls(result, parsed_json)
                 job["result"] = merged_result
                 job["status"] = "completed"
+                job["llm_usage"] = merge_usage(job.get("llm_usage"), usage)
+                job["updated_at"] = utc_now()
                 save_jobs_to_file(processing_jobs)
                 await delete_temp_file(file)
+                JOBS_TOTAL.inc(outcome="refilled")
                 return ExtractResponse(
                     job_id=existing_job_id,
                     text_content=json.dumps(merged_result, ensure_ascii=False),
@@ -359,24 +310,28 @@ async def extract_and_format_pdf(
         else:
             job_id = existing_job_id
             processing_jobs[job_id]["status"] = "re-processing"
+            processing_jobs[job_id]["updated_at"] = utc_now()
     else:
         job_id = str(uuid.uuid4())
         processing_jobs[job_id] = {
             "status": "processing",
             "result": None,
             "filename": original_filename,
-            "pages": {}
+            "pages": {},
+            "created_at": utc_now(),
+            "updated_at": utc_now(),
         }
+        if profiler:
+            profiler.job_id = job_id
 
     save_jobs_to_file(processing_jobs)
 
+    usage = LLMUsageLedger()
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-
         # Extract text per page
-        page_texts = {}
-        for page_number in range(len(doc)):
-            page_texts[page_number + 1] = doc[page_number].get_text("text")
+        with PIPELINE_STAGE_SECONDS.time(stage="extract"):
+            page_texts = await asyncio.to_thread(read_page_texts, file_path)
+        PAGES_PROCESSED.inc(len(page_texts), mode="native")
 
         # Build prompt with page-specific text
         full_text_with_pages = "\n".join(
@@ -384,36 +339,38 @@ async def extract_and_format_pdf(
             for page_num, text in page_texts.items()
         )
 
+        instructions = compile_schema().text if format_instructions is None else format_instructions
         prompt = f"""
         You are a strict JSON formatter. Return ONLY valid JSON with no markdown fences or extra commentary.
-        {format_instructions}
+        {instructions}
 
         Document text with page numbers:
         {full_text_with_pages}
         """
+        processing_jobs[job_id]["prompt_stats"] = {"extraction": prompt_stats(prompt, full_text_with_pages)}
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-        )
-
-        raw_output = response.text.strip()
-        clean_output = re.sub(
-            r"^```json\s*|\s*```$",
-            "",
-            raw_output,
-            flags=re.MULTILINE
-        ).strip()
-
-        parsed_json = safe_json_parse(clean_output)
+        with track_llm_usage(usage), llm_stage("extraction"):
+            with PIPELINE_STAGE_SECONDS.time(stage="llm"):
+                raw_output = llm.generate(prompt, model="gemini-2.5-flash").strip()
+            with PIPELINE_STAGE_SECONDS.time(stage="parse"):
+                clean_output = re.sub(
+                    r"^```json\s*|\s*```$",
+                    "",
+                    raw_output,
+                    flags=re.MULTILINE
+                ).strip()
+                parsed_json = safe_json_parse(clean_output)
 
         # Save job result & pages
         processing_jobs[job_id]["status"] = "completed"
         processing_jobs[job_id]["result"] = parsed_json
         processing_jobs[job_id]["pages"] = page_texts
         processing_jobs[job_id]["file_path"] = file_path
+        processing_jobs[job_id]["llm_usage"] = merge_usage(processing_jobs[job_id].get("llm_usage"), usage)
+        processing_jobs[job_id]["updated_at"] = utc_now()
         save_jobs_to_file(processing_jobs)
         await delete_temp_file(file)
+        JOBS_TOTAL.inc(outcome="completed")
 
         return ExtractResponse(
             job_id=job_id,
@@ -425,5 +382,8 @@ async def extract_and_format_pdf(
         await delete_temp_file(file)
         processing_jobs[job_id]["status"] = "failed"
         processing_jobs[job_id]["result"] = str(e)
+        processing_jobs[job_id]["llm_usage"] = merge_usage(processing_jobs[job_id].get("llm_usage"), usage)
+        processing_jobs[job_id]["updated_at"] = utc_now()
         save_jobs_to_file(processing_jobs)
+        JOBS_TOTAL.inc(outcome="failed")
         raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
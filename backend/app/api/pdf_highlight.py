@@ -1,14 +1,38 @@
-import os, difflib, fitz
+import os, re, json, time, difflib, hashlib, fitz
+from collections import Counter, defaultdict
 from fastapi import APIRouter, HTTPException
-from app.utils import client, load_jobs_from_file
+from app.utils import document_pool, llm, load_jobs_from_file, MATCH_NORMALIZER
+from app.utils.llm_usage import llm_stage, track_llm_usage
+from app.utils.metrics import HIGHLIGHT_SECONDS
+from app.api.pdf_extract import record_llm_usage
 
 router = APIRouter()
 
 UPLOADS_DIR = "uploads"
 
+# Sub-folder of UPLOADS_DIR for annotated exports. One file is written per
+# job/page/passage so concurrent highlights never overwrite each other.
+HIGHLIGHTS_DIR = "highlights"
+
+# Minimum share of the query's words that must be found together on a page
+# before a local match is trusted instead of asking the LLM.
+LOCAL_MATCH_THRESHOLD = 0.8
+
+# How much longer than the query a window of page words may be
+# (line numbers, footnote markers and hyphenation add a few extra tokens).
+LOCAL_MATCH_SLACK = 1.5
+
+HIGHLIGHT_MODES = ("local", "ai")
+
+_TOKEN_RE = re.compile(r"\w+")
+
 def normalize_text(text: str) -> str:
     """Lowercase and collapse whitespace for comparison."""
-    return " ".join(text.lower().split())
+    return MATCH_NORMALIZER.normalize(text)
+
+def tokenize(text: str) -> list:
+    """Split text into lowercase word tokens, dropping punctuation."""
+    return _TOKEN_RE.findall(text.lower())
 
 def fetch_passage_with_ai(page_text: str, query: str) -> str:
     prompt = f"""
@@ -22,44 +46,106 @@ def fetch_passage_with_ai(page_text: str, query: str) -> str:
     Return ONLY the passage text.
     """
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[prompt],
-    )
-    fetched_passage = response.text.strip()
+    fetched_passage = llm.generate(prompt, model="gemini-2.5-flash").strip()
     # print(f"Fetched Passage: {fetched_passage}")
     return fetched_passage
 
+def fetch_passages_with_ai(page_text: str, queries: list) -> list:
+    """
+    Ask AI for the best matching passage of several queries on the same page
+    in a single request. Returns one passage (or None) per query, in order.
+    """
+    numbered = "\n".join(f"{i + 1}. {query}" for i, query in enumerate(queries))
+    prompt = f"""
+    You are given the following page text:
+
+    {page_text}
+
+    For each numbered item below, find the passage (sentence or paragraph)
+    of the page text that best matches it:
+    {numbered}
+
+    Return ONLY a JSON array of strings with one passage per item, in order.
+    Use null when no passage matches.
+    """
+
+    raw_output = llm.generate(prompt, model="gemini-2.5-flash").strip()
+    raw_output = re.sub(r"^```json\s*|\s*```$", "", raw_output, flags=re.MULTILINE).strip()
+    try:
+        passages = json.loads(raw_output)
+    except json.JSONDecodeError:
+        return [None] * len(queries)
+    if not isinstance(passages, list):
+        return [None] * len(queries)
+    passages = [p if isinstance(p, str) and p.strip() else None for p in passages]
+    return (passages + [None] * len(queries))[:len(queries)]
+
+def normalize_blocks(blocks):
+    """
+    Normalize the text of all blocks in one pass.
+    Returns (page_norm, block_norms, spans): page_norm is the NormalizedText of
+    the block texts joined by newlines, block_norms[i] the normalized text of
+    block i and spans[i] its (start, end) in the joined original text.
+    """
+    spans = []
+    position = 0
+    for b in blocks:
+        spans.append((position, position + len(b[4])))
+        position += len(b[4]) + 1
+    page_norm = MATCH_NORMALIZER.normalize_with_offsets("\n".join(b[4] for b in blocks))
+    block_norms = [
+        page_norm.text[page_norm.normalized_index(start):page_norm.normalized_index(end)].strip()
+        for start, end in spans
+    ]
+    return page_norm, block_norms, spans
+
+def find_spanning_blocks(page_norm, spans, phrase_norm: str):
+    """Indexes of the blocks covered by the first occurrence of phrase_norm in the page."""
+    if not phrase_norm:
+        return []
+    found = page_norm.text.find(phrase_norm)
+    if found < 0:
+        return []
+    start, end = page_norm.original_span(found, found + len(phrase_norm))
+    return [i for i, (block_start, block_end) in enumerate(spans) if block_start < end and block_end > start]
+
+def is_similar(a: str, b: str, threshold: float) -> bool:
+    """difflib ratio above threshold, ruling out clear misses with its cheap upper bounds first."""
+    matcher = difflib.SequenceMatcher(None, a, b)
+    return (
+        matcher.real_quick_ratio() > threshold
+        and matcher.quick_ratio() > threshold
+        and matcher.ratio() > threshold
+    )
+
 def find_phrase_coords_from_ai(page, ai_passage: str, query: str, threshold: float = 0.6):
     """
     Given AI's extracted passage and original query, find matching blocks in PDF.
     Works even if the paragraph is split across multiple blocks.
     """
-    blocks = page.get_text("blocks")  # (x0, y0, x1, y1, "text", block_no)
+    blocks = [b for b in page.get_text("blocks") if len(b) >= 5]  # (x0, y0, x1, y1, "text", block_no)
     ai_norm = normalize_text(ai_passage)
     query_norm = normalize_text(query)
 
-    matched_coords = []
+    # The page is normalized once; block texts are slices of it
+    page_norm, block_norms, spans = normalize_blocks(blocks)
+    matched = set()
 
     # Pass 1: fuzzy compare each block against AI passage
-    for b in blocks:
-        if len(b) < 5:
-            continue
-        block_text = b[4]
-        block_norm = normalize_text(block_text)
-
-        score = difflib.SequenceMatcher(None, ai_norm, block_norm).ratio()
-        if score > threshold or ai_norm in block_norm or block_norm in ai_norm:
-            matched_coords.append((b[0], b[1], b[2], b[3]))
+    for i, block_norm in enumerate(block_norms):
+        if ai_norm in block_norm or block_norm in ai_norm or is_similar(ai_norm, block_norm, threshold):
+            matched.add(i)
+    # Passage found verbatim across several blocks: take every block it covers
+    matched.update(find_spanning_blocks(page_norm, spans, ai_norm))
 
     # Pass 2: if nothing found, try using query as anchor
-    if not matched_coords:
-        for b in blocks:
-            if len(b) < 5:
-                continue
-            block_text = normalize_text(b[4])
-            if query_norm and query_norm in block_text:
-                matched_coords.append((b[0], b[1], b[2], b[3]))
+    if not matched:
+        for i, block_norm in enumerate(block_norms):
+            if query_norm and query_norm in block_norm:
+                matched.add(i)
+        matched.update(find_spanning_blocks(page_norm, spans, query_norm))
+
+    matched_coords = [(blocks[i][0], blocks[i][1], blocks[i][2], blocks[i][3]) for i in sorted(matched)]
 
     if not matched_coords:
         return None
@@ -68,13 +154,157 @@ def find_phrase_coords_from_ai(page, ai_passage: str, query: str, threshold: flo
     matched_coords = sorted(matched_coords, key=lambda r: (r[1], r[0]))
     return matched_coords
 
-@router.get("/highlight/")
-async def highlight_text(job_id: str, page_number: int, query: str):
+def load_page_words(page):
     """
-    Highlight the passage that AI finds for a given query string.
+    Read a page's words once for local matching.
+    Returns (words, tokens, owners) where owners[i] is the index of the word
+    token i came from.
     """
-    print(f"Job Request: Highlighting for job {job_id}, page {page_number}, query: {query}")
+    words = page.get_text("words")  # (x0, y0, x1, y1, "word", block_no, line_no, word_no)
+    tokens, owners = [], []
+    for index, word in enumerate(words):
+        for token in tokenize(word[4]):
+            tokens.append(token)
+            owners.append(index)
+    return words, tokens, owners
+
+def find_passage_coords_locally(page, passage: str, slack: float = LOCAL_MATCH_SLACK, page_words=None):
+    """
+    Locate a stored passage on a page without the LLM.
+
+    Slides a window slightly longer than the passage over the page's words and
+    keeps the window containing the most passage words. Returns
+    (confidence, coords) where confidence is the share of passage words found in
+    that window and coords are line rectangles covering it (None if nothing matched).
+    Pass page_words from load_page_words() to reuse them across passages.
+    """
+    query_tokens = tokenize(passage)
+    if not query_tokens:
+        return 0.0, None
+
+    words, tokens, owners = page_words or load_page_words(page)
+    if not tokens:
+        return 0.0, None
+
+    needed = Counter(query_tokens)
+    window = max(len(query_tokens), int(len(query_tokens) * slack))
+    seen = Counter()
+    hits, best_hits, best_end = 0, 0, 0
+
+    for i, token in enumerate(tokens):
+        if token in needed:
+            seen[token] += 1
+            if seen[token] <= needed[token]:
+                hits += 1
+        j = i - window
+        if j >= 0 and tokens[j] in needed:
+            if seen[tokens[j]] <= needed[tokens[j]]:
+                hits -= 1
+            seen[tokens[j]] -= 1
+        if hits > best_hits:
+            best_hits, best_end = hits, i
+
+    if not best_hits:
+        return 0.0, None
+
+    # Trim the winning window to its first and last matching token
+    start = max(0, best_end - window + 1)
+    while tokens[start] not in needed:
+        start += 1
+
+    # Merge the covered words into one rectangle per text line
+    lines = {}
+    for word in words[owners[start]:owners[best_end] + 1]:
+        key = (word[5], word[6])
+        if key in lines:
+            x0, y0, x1, y1 = lines[key]
+            lines[key] = (min(x0, word[0]), min(y0, word[1]), max(x1, word[2]), max(y1, word[3]))
+        else:
+            lines[key] = (word[0], word[1], word[2], word[3])
+
+    coords = sorted(lines.values(), key=lambda r: (r[1], r[0]))
+    return best_hits / len(query_tokens), coords
 
+def find_coords_near_page(doc, page_number: int, passage: str, words_cache=None):
+    """
+    Resolve a passage locally on its stored page, then on the adjacent pages.
+    Returns (page_number, confidence, coords) for the best candidate found.
+    words_cache maps page numbers to load_page_words() results and is filled
+    as pages are read, so callers resolving many passages parse each page once.
+    """
+    if words_cache is None:
+        words_cache = {}
+    best = (page_number, 0.0, None)
+    for candidate in (page_number, page_number - 1, page_number + 1):
+        if candidate < 1 or candidate > len(doc):
+            continue
+        page = doc[candidate - 1]
+        if candidate not in words_cache:
+            words_cache[candidate] = load_page_words(page)
+        confidence, coords = find_passage_coords_locally(page, passage, page_words=words_cache[candidate])
+        if confidence > best[1]:
+            best = (candidate, confidence, coords)
+        if confidence >= LOCAL_MATCH_THRESHOLD:
+            break
+    return best
+
+def build_overlay(page, page_number: int, coords) -> dict:
+    """
+    Describe highlight rectangles for client-side drawing.
+
+    Rectangles are converted to the displayed (rotated) page space and
+    normalized to 0..1 of the page width/height, so the viewer can scale them
+    to any zoom level.
+    """
+    width, height = page.rect.width, page.rect.height
+    rects = []
+    for (x0, y0, x1, y1) in coords:
+        rect = fitz.Rect(x0, y0, x1, y1) * page.rotation_matrix
+        rects.append([
+            round(rect.x0 / width, 5),
+            round(rect.y0 / height, 5),
+            round(rect.x1 / width, 5),
+            round(rect.y1 / height, 5),
+        ])
+    return {"page_number": page_number, "page_width": width, "page_height": height, "rects": rects}
+
+def export_highlighted_pdf(file_path: str, job_id: str, highlights: dict) -> str:
+    """
+    Write a copy of the PDF with highlight annotations and return its path.
+
+    highlights maps page numbers to lists of rectangles. The file name is
+    derived from them, so repeating the same highlights reuses the existing
+    export instead of writing it again.
+    """
+    pages = sorted(highlights.items())
+    digest = hashlib.sha1(repr(pages).encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    label = f"p{pages[0][0]}" if len(pages) == 1 else "all"
+    output_dir = os.path.join(UPLOADS_DIR, HIGHLIGHTS_DIR, job_id)
+    output_path = os.path.join(output_dir, f"{stem}_{label}_{digest}.pdf")
+    if os.path.exists(output_path):
+        return output_path
+
+    os.makedirs(output_dir, exist_ok=True)
+    doc = fitz.open(file_path)
+    try:
+        for page_number, coords in pages:
+            page = doc[page_number - 1]
+            # Add highlight for each block instead of one giant rectangle
+            for (x0, y0, x1, y1) in coords:
+                highlight = page.add_highlight_annot(fitz.Rect(x0, y0, x1, y1))
+                highlight.update()
+
+        # Write under a temporary name so readers never see a partial file
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        doc.save(temp_path, garbage=1, deflate=True)
+        os.replace(temp_path, output_path)
+    finally:
+        doc.close()
+    return output_path
+
+def get_job_pdf_path(job_id: str):
+    """Return (job, file_path) for a job, raising 404 if either is missing."""
     jobs = load_jobs_from_file()
     job = jobs.get(job_id)
     if not job:
@@ -83,32 +313,194 @@ async def highlight_text(job_id: str, page_number: int, query: str):
     file_path = os.path.join(UPLOADS_DIR, f"{job['filename']}")
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="PDF not found")
+    return job, file_path
 
-    doc = fitz.open(file_path)
-    if page_number < 1 or page_number > len(doc):
-        raise HTTPException(status_code=400, detail="Invalid page number")
+def iter_result_fields(result):
+    """Yield (section, field, value, page_number) for every located field of a job result."""
+    if not isinstance(result, dict):
+        return
+    for section, fields in result.items():
+        if not isinstance(fields, dict):
+            continue
+        for field, obj in fields.items():
+            if not isinstance(obj, dict):
+                continue
+            value, page_number = obj.get("value"), obj.get("page_number")
+            if isinstance(page_number, str) and page_number.isdigit():
+                page_number = int(page_number)
+            if not value or not isinstance(value, str) or not isinstance(page_number, int):
+                continue
+            yield section, field, value, page_number
+
+@router.get("/highlight/")
+def highlight_text(
+    job_id: str,
+    page_number: int,
+    query: str,
+    mode: str = "local",
+    export: bool = False,
+):
+    """
+    Locate the passage for a given query string and return it as an overlay.
+
+    In "local" mode the stored value is matched against the page text (and the
+    adjacent pages) first; the LLM is only asked when the local match confidence
+    is below LOCAL_MATCH_THRESHOLD. "ai" mode always asks the LLM.
+
+    The response carries the page size and normalized rectangles for the viewer
+    to draw. An annotated PDF is only written when export=true.
+    """
+    print(f"Job Request: Highlighting for job {job_id}, page {page_number}, query: {query}")
 
-    page = doc[page_number - 1]
+    if mode not in HIGHLIGHT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode. Use one of: {', '.join(HIGHLIGHT_MODES)}")
 
-    # Extract text from page
-    page_text = page.get_text("text")
+    _, file_path = get_job_pdf_path(job_id)
 
-    # Step 1: Ask AI for best passage
-    ai_passage = fetch_passage_with_ai(page_text, query)
+    match_source = "ai"
+    confidence = None
+    coords = None
 
-    # Step 2: Map passage to PDF coords
-    coords = find_phrase_coords_from_ai(page, ai_passage, query)
-    if not coords:
-        raise HTTPException(status_code=404, detail="Passage not found in PDF")
+    # The pooled document is only held while reading it, never across the LLM call
+    with document_pool.checkout(file_path) as doc:
+        if page_number < 1 or page_number > len(doc):
+            raise HTTPException(status_code=400, detail="Invalid page number")
 
-    # Add highlight for each block instead of one giant rectangle
-    for (x0, y0, x1, y1) in coords:
-        rect = fitz.Rect(x0, y0, x1, y1)
-        highlight = page.add_highlight_annot(rect)
-        highlight.update()
+        # Step 1: Try the stored value against the page text
+        if mode == "local":
+            with HIGHLIGHT_SECONDS.time(step="local"):
+                matched_page, confidence, local_coords = find_coords_near_page(doc, page_number, query)
+            if confidence >= LOCAL_MATCH_THRESHOLD:
+                page_number, coords, match_source = matched_page, local_coords, "local"
+
+        page_text = None if coords else doc[page_number - 1].get_text("text")
+
+    # Step 2: Ask AI for best passage
+    llm_started = time.perf_counter()
+    with track_llm_usage() as usage, llm_stage("highlight"):
+        ai_passage = fetch_passage_with_ai(page_text, query) if page_text is not None else None
+    record_llm_usage(job_id, usage)
+
+    with document_pool.checkout(file_path) as doc:
+        page = doc[page_number - 1]
+
+        # Step 3: Map passage to PDF coords
+        if coords is None:
+            coords = find_phrase_coords_from_ai(page, ai_passage, query)
+            HIGHLIGHT_SECONDS.observe(time.perf_counter() - llm_started, step="llm")
+            if not coords:
+                raise HTTPException(status_code=404, detail="Passage not found in PDF")
+
+        overlay = build_overlay(page, page_number, coords)
+
+    response = {
+        "message": "Highlight located",
+        "match_source": match_source,
+        "confidence": confidence,
+        **overlay,
+    }
+    if export:
+        response["message"] = "Highlight added"
+        response["output_file"] = export_highlighted_pdf(file_path, job_id, {page_number: coords})
+    return response
+
+@router.get("/jobs/{job_id}/highlights")
+def highlight_job_fields(job_id: str, export: bool = False, ai_fallback: bool = True):
+    """
+    Highlight every extracted field of a job in one pass.
+
+    Fields are grouped by their stored page and each page is read once.
+    Fields that cannot be matched locally are sent to the LLM together,
+    one request per page, unless ai_fallback=false. Returns overlay
+    rectangles per field (and a single annotated PDF when export=true),
+    the total time taken and the number of LLM fallbacks.
+    """
+    started = time.perf_counter()
+    job, file_path = get_job_pdf_path(job_id)
+
+    fields_by_page = defaultdict(list)
+    for section, field, value, page_number in iter_result_fields(job.get("result")):
+        fields_by_page[page_number].append((section, field, value))
+
+    highlights = []
+    unresolved = []
+    page_sizes = {}
+    llm_calls = 0
+    llm_fallbacks = 0
+
+    # Pass 1: resolve locally, reading each page once
+    pending_by_page = {}
+    with HIGHLIGHT_SECONDS.time(step="local"), document_pool.checkout(file_path) as doc:
+        words_cache = {}
+        for page_number in sorted(fields_by_page):
+            if page_number < 1 or page_number > len(doc):
+                unresolved.extend(
+                    {"section": section, "field": field, "page_number": page_number}
+                    for section, field, _ in fields_by_page[page_number]
+                )
+                continue
+
+            pending = []
+            for section, field, value in fields_by_page[page_number]:
+                matched_page, confidence, coords = find_coords_near_page(doc, page_number, value, words_cache)
+                if confidence >= LOCAL_MATCH_THRESHOLD:
+                    highlights.append((section, field, matched_page, "local", confidence, coords))
+                else:
+                    pending.append((section, field, value))
+            if pending:
+                pending_by_page[page_number] = (doc[page_number - 1].get_text("text"), pending)
+
+    # Pass 2: one LLM request per page for the fields left over (document not held)
+    llm_started = time.perf_counter()
+    passages_by_page = {}
+    with track_llm_usage() as usage, llm_stage("highlight"):
+        for page_number, (page_text, pending) in pending_by_page.items():
+            if ai_fallback:
+                llm_calls += 1
+                llm_fallbacks += len(pending)
+                passages_by_page[page_number] = fetch_passages_with_ai(page_text, [value for _, _, value in pending])
+            else:
+                passages_by_page[page_number] = [None] * len(pending)
+    record_llm_usage(job_id, usage)
 
+    # Pass 3: map the LLM passages to coordinates and build the overlays
+    fields = []
+    with document_pool.checkout(file_path) as doc:
+        for page_number, (_, pending) in pending_by_page.items():
+            page = doc[page_number - 1]
+            for (section, field, value), passage in zip(pending, passages_by_page[page_number]):
+                coords = find_phrase_coords_from_ai(page, passage, value) if passage else None
+                if coords:
+                    highlights.append((section, field, page_number, "ai", None, coords))
+                else:
+                    unresolved.append({"section": section, "field": field, "page_number": page_number})
+        if pending_by_page and ai_fallback:
+            HIGHLIGHT_SECONDS.observe(time.perf_counter() - llm_started, step="llm")
 
-    output_path = file_path.replace(".pdf", "_highlighted.pdf")
-    doc.save(output_path)
+        for section, field, page_number, match_source, confidence, coords in highlights:
+            overlay = build_overlay(doc[page_number - 1], page_number, coords)
+            page_sizes[page_number] = {"page_width": overlay["page_width"], "page_height": overlay["page_height"]}
+            fields.append({
+                "section": section,
+                "field": field,
+                "page_number": page_number,
+                "match_source": match_source,
+                "confidence": confidence,
+                "rects": overlay["rects"],
+            })
 
-    return {"message": "Highlight added", "output_file": output_path}
+    response = {
+        "job_id": job_id,
+        "fields": fields,
+        "pages": page_sizes,
+        "unresolved": unresolved,
+        "llm_calls": llm_calls,
+        "llm_fallbacks": llm_fallbacks,
+    }
+    if export and highlights:
+        merged = defaultdict(list)
+        for _, _, page_number, _, _, coords in highlights:
+            merged[page_number].extend(coords)
+        response["output_file"] = export_highlighted_pdf(file_path, job_id, dict(merged))
+    response["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return response
@@ -0,0 +1,98 @@
+from typing import Optional
+import fitz
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.utils import document_pool, get_cached_tile, store_tile
+from app.utils.response_cache import etag_matches
+from app.api.pdf_highlight import get_job_pdf_path
+
+router = APIRouter()
+
+MIN_ZOOM = 0.25
+MAX_ZOOM = 4.0
+MAX_PAGES_PER_REQUEST = 50
+
+IMAGE_FORMATS = {
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+# Pages are addressed by job, but cached by file content, so a re-uploaded
+# PDF never serves stale tiles. The URL stays the same after a re-upload, so
+# clients must revalidate; the ETag is the tile name (content digest, pages,
+# zoom, format) and an unchanged tile costs a 304.
+CACHE_CONTROL = "no-cache"
+
+
+def tile_headers(name: str) -> dict:
+    return {"Cache-Control": CACHE_CONTROL, "ETag": f'"{name}"'}
+
+
+def render_sub_pdf(doc, start: int, end: int) -> bytes:
+    """Copy pages start..end (1-based, inclusive) into a new, compact PDF."""
+    sub_doc = fitz.open()
+    try:
+        sub_doc.insert_pdf(doc, from_page=start - 1, to_page=end - 1)
+        return sub_doc.tobytes(garbage=3, deflate=True)
+    finally:
+        sub_doc.close()
+
+
+def render_page_image(page, zoom: float, image_format: str) -> bytes:
+    """Render a page to PNG or WebP at the given zoom."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    if image_format == "png":
+        return pix.tobytes("png")
+    return pix.pil_tobytes(format="WEBP", quality=80)
+
+
+@router.get("/jobs/{job_id}/pages")
+def get_page_range(request: Request, job_id: str, start: int = 1, end: Optional[int] = None):
+    """
+    Serve pages start..end of a job's PDF as a small standalone PDF,
+    so the viewer can show a cited page without downloading the whole file.
+    """
+    _, file_path = get_job_pdf_path(job_id)
+    end = start if end is None else end
+    if end - start + 1 > MAX_PAGES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGES_PER_REQUEST} pages per request")
+
+    name = f"{document_pool.digest(file_path)}_{start}-{end}.pdf"
+    if etag_matches(request.headers.get("if-none-match"), name):
+        return Response(status_code=304, headers=tile_headers(name))
+    path = get_cached_tile(name)
+    if path is None:
+        with document_pool.checkout(file_path) as doc:
+            if start < 1 or end < start or end > len(doc):
+                raise HTTPException(status_code=400, detail="Invalid page range")
+            data = render_sub_pdf(doc, start, end)
+        path = store_tile(name, data)
+
+    return FileResponse(path, media_type="application/pdf", headers=tile_headers(name))
+
+
+@router.get("/jobs/{job_id}/pages/{page_number}/image")
+def get_page_image(request: Request, job_id: str, page_number: int, zoom: float = 1.0, format: str = "png"):
+    """
+    Serve one page of a job's PDF as a rendered PNG or WebP tile.
+    Tiles are cached on disk by file content, page, zoom and format.
+    """
+    if format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Use one of: {', '.join(IMAGE_FORMATS)}")
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise HTTPException(status_code=400, detail=f"Zoom must be between {MIN_ZOOM} and {MAX_ZOOM}")
+    zoom = round(zoom, 2)
+
+    _, file_path = get_job_pdf_path(job_id)
+    name = f"{document_pool.digest(file_path)}_p{page_number}_z{zoom}.{format}"
+    if etag_matches(request.headers.get("if-none-match"), name):
+        return Response(status_code=304, headers=tile_headers(name))
+    path = get_cached_tile(name)
+    if path is None:
+        with document_pool.checkout(file_path) as doc:
+            if page_number < 1 or page_number > len(doc):
+                raise HTTPException(status_code=400, detail="Invalid page number")
+            data = render_page_image(doc[page_number - 1], zoom, format)
+        path = store_tile(name, data)
+
+    return FileResponse(path, media_type=IMAGE_FORMATS[format], headers=tile_headers(name))
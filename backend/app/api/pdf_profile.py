@@ -0,0 +1,60 @@
+import os, hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+from app.utils import load_jobs_from_file
+from app.utils.config import PROFILE_ADMIN_TOKEN
+from app.utils.profiler import StackSampler, profile_path, save_profile
+
+router = APIRouter()
+
+class RequestProfile:
+    """Sampler of a profiled request; the endpoint sets job_id once it knows the job."""
+
+    def __init__(self):
+        self.sampler = StackSampler()
+        self.job_id: Optional[str] = None
+
+def require_admin(request: Request):
+    """Reject the request unless X-Admin-Token matches PROFILE_ADMIN_TOKEN."""
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (PROFILE_ADMIN_TOKEN is not set)")
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode("utf-8"), PROFILE_ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+
+async def request_profile(request: Request, profile: bool = False):
+    """
+    Dependency of endpoints that can be profiled.
+
+    When an admin asks for it (?profile=true or an "X-Profile: 1" header),
+    samples every thread until the request has been handled and stores the
+    stacks as the profile of the job set on the yielded RequestProfile.
+    Yields None for ordinary requests.
+    """
+    if not (profile or request.headers.get("X-Profile", "").lower() in ("1", "true", "yes")):
+        yield None
+        return
+    require_admin(request)
+    current = RequestProfile()
+    current.sampler.start()
+    try:
+        yield current
+    finally:
+        current.sampler.stop()
+        if current.job_id:
+            save_profile(current.job_id, current.sampler)
+
+@router.get("/jobs/{job_id}/profile")
+async def download_profile(job_id: str, request: Request):
+    """
+    Download the profile of the last profiled request of a job, in
+    collapsed-stack format (open it in speedscope or flamegraph.pl). Admins only.
+    """
+    require_admin(request)
+    if job_id not in load_jobs_from_file():
+        raise HTTPException(status_code=404, detail="Job not found")
+    path = profile_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No profile recorded for this job")
+    return FileResponse(path, media_type="text/plain", filename=f"{job_id}.collapsed.txt")
@@ -0,0 +1,104 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from app.utils import query_fields, refresh_job_index, search_pages
+from app.utils.job_index import parse_field_spec
+
+router = APIRouter()
+
+MAX_SEARCH_LIMIT = 100
+MAX_FIELDS_LIMIT = 1000
+
+
+class SearchHit(BaseModel):
+    job_id: str
+    filename: Optional[str] = None
+    page_number: int
+    snippet: str
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[SearchHit]
+
+
+class FieldRow(BaseModel):
+    job_id: str
+    filename: Optional[str] = None
+    section: str
+    field: str
+    value: Optional[str] = None
+    page_number: Optional[int] = None
+    extracted_at: Optional[str] = None
+
+
+class FieldsResponse(BaseModel):
+    total: int
+    total_jobs: int
+    limit: int
+    offset: int
+    results: List[FieldRow]
+
+
+# Route: /search
+@router.get("/search", response_model=SearchResponse)
+async def search_agreements(
+    q: str,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Full-text search across the page texts of all processed agreements.
+    Words must all appear on a page; use double quotes for exact phrases,
+    e.g. "snooze and lose".
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+
+    total, results = search_pages(refresh_job_index(), q, limit=limit, offset=offset)
+    return SearchResponse(query=q, total=total, limit=limit, offset=offset, results=results)
+
+
+def parse_where(spec: str):
+    """Parse a "[section.]field:pattern" condition."""
+    field_spec, sep, pattern = spec.partition(":")
+    section, field = parse_field_spec(field_spec)
+    if not sep or not field:
+        raise HTTPException(status_code=400, detail=f"Invalid condition '{spec}', expected [section.]field:pattern")
+    return section, field, pattern or None
+
+
+# Route: /fields
+@router.get("/fields", response_model=FieldsResponse)
+async def query_extracted_fields(
+    section: Optional[str] = None,
+    field: Optional[str] = None,
+    value: Optional[str] = None,
+    where: List[str] = Query([]),
+    select: List[str] = Query([]),
+    limit: int = Query(100, ge=1, le=MAX_FIELDS_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Query extracted fields across all completed jobs.
+
+    section/field/value filter the flattened results; value is matched
+    case-insensitively anywhere in the field value, "*" is a wildcard.
+    Each where=[section.]field:pattern adds a condition the job must also
+    meet, e.g. where=governing_law:english&where=equity_cure_provision:*
+    select=[section.]field returns those fields for the matching jobs
+    instead of the matching rows.
+    """
+    conditions = [parse_where(spec) for spec in where]
+    if section or field or value:
+        conditions.insert(0, (section, field, value))
+    projection = [parse_field_spec(spec) for spec in select if spec.strip()]
+
+    total, total_jobs, results = query_fields(
+        refresh_job_index(), conditions, select=projection, limit=limit, offset=offset
+    )
+    return FieldsResponse(total=total, total_jobs=total_jobs, limit=limit, offset=offset, results=results)
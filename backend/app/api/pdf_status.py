@@ -1,10 +1,19 @@
-from typing import Dict, List, Optional
-from app.utils import load_jobs_from_file
+import gzip
+import json
+import base64
+import binascii
+import orjson
+from typing import Any, Dict, List, Literal, Optional, Union
+from app.utils import get_indexed_job, list_jobs, load_jobs_from_file, refresh_job_index, response_cache
+from app.utils.job_index import job_signature
+from app.utils.response_cache import accepts_gzip, etag_matches
 from pydantic import BaseModel, RootModel
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 router = APIRouter()
 
+MAX_STATUS_LIMIT = 200
+
 
 class ExtractedField(BaseModel):
     value: Optional[str] = None
@@ -18,47 +27,184 @@ class JobStatusResponse(BaseModel):
     status: str
     filename: str
     file_path: str
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
     result: Optional[JobResult] = None
     pages: Optional[Dict[int, str]] = None
+    llm_usage: Optional[Dict[str, Any]] = None  # LLM calls, tokens and latency of the job, by stage
+    prompt_stats: Optional[Dict[str, Any]] = None  # fixed prompt tokens (instructions, schema) per LLM request
+
+class JobSummary(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+def select_pages(pages, page_start: Optional[int], page_end: Optional[int]):
+    """Keep the pages within [page_start, page_end] (both optional, inclusive)."""
+    if page_start is None and page_end is None:
+        return pages
+    return {
+        number: text
+        for number, text in pages.items()
+        if (page_start is None or int(number) >= page_start) and (page_end is None or int(number) <= page_end)
+    }
+
+def build_job_status(job_id: str, job: dict, include_pages: bool, page_start, page_end, sections) -> JobStatusResponse:
+    result = job.get("result")
+    if sections and isinstance(result, dict):
+        result = {section: result[section] for section in sections if section in result}
+    pages = job.get("pages") if include_pages else None
+    if pages:
+        pages = select_pages(pages, page_start, page_end)
+
+    return JobStatusResponse(
+        job_id=job_id,
+        status=job.get("status", "unknown"),
+        filename=job.get("filename", ""),
+        file_path=job.get("file_path", ""),
+        created_at=job.get("created_at"),
+        updated_at=job.get("updated_at"),
+        result=result,
+        pages=pages,
+        llm_usage=job.get("llm_usage"),
+        prompt_stats=job.get("prompt_stats"),
+    )
+
+def cached_json_response(request: Request, cached) -> Response:
+    """Serve a cached body as gzip (or plain JSON), or 304 if the client's copy is current."""
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    etag = cached.etag[:-1] + '-gzip"' if use_gzip else cached.etag
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(cached.body), media_type="application/json", headers=headers)
 
 # Route: /jobs/{job_id}
-@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+@router.get("/jobs/{job_id}", response_model=Union[JobStatusResponse, JobSummary])
+async def get_job_status(
+    request: Request,
+    job_id: str,
+    view: Literal["full", "status"] = "full",
+    include_pages: bool = True,
+    page_start: Optional[int] = Query(None, ge=1),
+    page_end: Optional[int] = Query(None, ge=1),
+    sections: List[str] = Query([]),
+):
     """
     Get the status and details of a specific job.
+
+    view=status returns only the job's status and timestamps from the job
+    index, without reading the job file (use it for polling).
+    include_pages=false leaves out the page texts, page_start/page_end
+    return only that page range and sections limits the result to the
+    given sections.
+
+    Responses of completed jobs are serialized once, cached gzip-compressed
+    and carry a strong ETag; send it back in If-None-Match to get a 304.
     """
+    if page_start is not None and page_end is not None and page_start > page_end:
+        raise HTTPException(status_code=400, detail="page_start must not be after page_end")
+
+    indexed = get_indexed_job(refresh_job_index(), job_id)
+    if view == "status":
+        if not indexed:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobSummary(
+            job_id=job_id,
+            status=indexed["status"] or "unknown",
+            filename=indexed["filename"] or "",
+            created_at=indexed["created_at"],
+            updated_at=indexed["updated_at"],
+        )
+
+    variant = (include_pages, page_start, page_end, tuple(sections))
+    if indexed and indexed["status"] == "completed":
+        cached = response_cache.get((job_id, indexed["signature"], variant))
+        if cached is not None:
+            return cached_json_response(request, cached)
+
     data = load_jobs_from_file()
     job = data.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return JobStatusResponse(
-        job_id=job_id,
-        status=job.get("status", "unknown"),
-        filename=job.get("filename", ""),
-        file_path=job.get("file_path", ""),
-        result=job.get("result"),
-        pages=job.get("pages"),
+    response = build_job_status(job_id, job, include_pages, page_start, page_end, sections)
+    if job.get("status") != "completed":
+        return response
+
+    cached = response_cache.put(
+        (job_id, job_signature(job), variant), orjson.dumps(response.model_dump(mode="json"))
     )
+    return cached_json_response(request, cached)
 
 
-class JobSummary(BaseModel):
-    job_id: str
-    status: str
-    filename: str
+class JobListResponse(BaseModel):
+    total: int
+    limit: int
+    next_cursor: Optional[str] = None
+    jobs: List[JobSummary]
+
+
+def encode_cursor(after) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(sort_value), str(job_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # Route: /status
-@router.get("/status", response_model=List[JobSummary])
-async def get_all_jobs():
+@router.get("/status", response_model=JobListResponse)
+async def get_all_jobs(
+    status: Optional[str] = None,
+    filename: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    sort: Literal["created_at", "updated_at"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_STATUS_LIMIT),
+):
     """
-    Get statuses of all jobs.
+    List jobs, newest first by default, one page at a time.
+
+    Filters: status, filename (substring), since/until (ISO timestamps,
+    applied to the sort field). Pass next_cursor back as cursor (with the
+    same filters and sort) to get the next page; it is null on the last page.
+    Served from the job index, so pages cost the same regardless of job count.
     """
-    data = load_jobs_from_file()
-    return [
-        JobSummary(
-            job_id=job_id,
-            status=job["status"],
-            filename=job["filename"]
-        )
-        for job_id, job in data.items()
-    ]
+    after = decode_cursor(cursor) if cursor else None
+    total, jobs, next_after = list_jobs(
+        refresh_job_index(),
+        status=status,
+        filename=filename,
+        since=since,
+        until=until,
+        sort=sort,
+        descending=order == "desc",
+        after=after,
+        limit=limit,
+    )
+    return JobListResponse(
+        total=total,
+        limit=limit,
+        next_cursor=encode_cursor(next_after) if next_after else None,
+        jobs=[
+            JobSummary(
+                job_id=job["job_id"],
+                status=job["status"] or "unknown",
+                filename=job["filename"] or "",
+                created_at=job["created_at"],
+                updated_at=job["updated_at"],
+            )
+            for job in jobs
+        ],
+    )
@@ -1,15 +1,47 @@
 from .file_utils import sanitize_filename
-from .jobs import save_jobs_to_file, load_jobs_from_file
+from .jobs import save_jobs_to_file, load_jobs_from_file, refresh_job_index, utc_now
+from .job_index import get_indexed_job, list_jobs, query_fields, search_pages
 from .storage import save_file_permanent, delete_temp_file
-from .config import client, MAX_FILE_SIZE_MB, MAX_FILE_SIZE_BYTES
+from .config import MAX_FILE_SIZE_MB, MAX_FILE_SIZE_BYTES
+from .llm import LLMProvider, LLMError, GeminiProvider, CassetteProvider, SyntheticProvider, create_provider, llm
+from .pdf_cache import DocumentPool, document_pool
+from .tile_cache import get_cached_tile, store_tile
+from .response_cache import ResponseCache, response_cache
+from .text_normalizer import TextNormalizer, NormalizedText, MATCH_NORMALIZER
+from .schema import MASTER_SCHEMA
+from .schema_prompt import SchemaPrompt, compile_schema
 
 __all__ = [
-    "client",
+    "llm",
+    "LLMProvider",
+    "LLMError",
+    "GeminiProvider",
+    "CassetteProvider",
+    "SyntheticProvider",
+    "create_provider",
     "MAX_FILE_SIZE_MB",
     "sanitize_filename",
     "save_jobs_to_file",
     "MAX_FILE_SIZE_BYTES",
     "load_jobs_from_file",
+    "refresh_job_index",
+    "utc_now",
+    "search_pages",
+    "query_fields",
+    "list_jobs",
+    "get_indexed_job",
     "save_file_permanent",
-    "delete_temp_file"
+    "delete_temp_file",
+    "DocumentPool",
+    "document_pool",
+    "get_cached_tile",
+    "store_tile",
+    "ResponseCache",
+    "response_cache",
+    "TextNormalizer",
+    "NormalizedText",
+    "MATCH_NORMALIZER",
+    "MASTER_SCHEMA",
+    "SchemaPrompt",
+    "compile_schema",
 ]
@@ -1,7 +1,6 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from google import genai
 
 # Load environment variables from .env
 env_path = Path(__file__).parent.parent.parent / ".env"
@@ -10,5 +9,30 @@ load_dotenv(env_path)
 MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
-# Configure Gemini API
-client = genai.Client(api_key=os.getenv("LLM_API"))
+# Open PDF handles kept in memory across requests
+DOCUMENT_POOL_MAX_DOCUMENTS = int(os.getenv("DOCUMENT_POOL_MAX_DOCUMENTS", 8))
+DOCUMENT_POOL_MAX_BYTES = int(os.getenv("DOCUMENT_POOL_MAX_MB", 256)) * 1024 * 1024
+
+# Rendered page tiles and sub-PDFs served to the viewer
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", os.path.join("cache", "tiles"))
+TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+# Serialized, compressed responses of completed jobs
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_MB", 64)) * 1024 * 1024
+
+# LLM provider: gemini | cassette (replay only) | record (Gemini, recorded) | synthetic (offline)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+# Gemini API key, only required by the gemini / record providers and checked on the first call
+LLM_API = os.getenv("LLM_API")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join("cassettes", "llm.jsonl"))
+LLM_SYNTHETIC_LATENCY_MS = float(os.getenv("LLM_SYNTHETIC_LATENCY_MS", 0))
+LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS = float(os.getenv("LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS", 0))
+LLM_SYNTHETIC_ERROR_RATE = float(os.getenv("LLM_SYNTHETIC_ERROR_RATE", 0))
+LLM_SYNTHETIC_FILL_RATIO = float(os.getenv("LLM_SYNTHETIC_FILL_RATIO", 0.3))
+LLM_SYNTHETIC_SEED = int(os.getenv("LLM_SYNTHETIC_SEED", 0))
+
+# Admins profile a request with ?profile=true or "X-Profile: 1" plus this token
+# in X-Admin-Token; profiling is disabled while it is unset
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
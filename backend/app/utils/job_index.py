@@ -0,0 +1,494 @@
+# app/utils/job_index.py
+"""
+SQLite index derived from the job store (jobs.json).
+
+jobs.json stays the source of truth. The index is kept next to it and is
+updated incrementally whenever the jobs are saved: only jobs whose
+status, update time or page count changed are re-indexed.
+
+Tables:
+- indexed_jobs: one row of metadata per job
+- indexed_pages: one row per indexed page; its id is the page_text rowid
+- page_text: FTS5 full-text index of each completed job's page texts
+- job_fields: one row per (job, section, field) of each completed job's
+  result, clustered by field so that all values of a field are stored
+  together and a filter on a field reads only that field's rows
+- index_meta: bookkeeping (schema version, mtime of the jobs file the index
+  was built from)
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_jobs (
+    job_id TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    status TEXT,
+    filename TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS indexed_jobs_created ON indexed_jobs (created_at, job_id);
+CREATE INDEX IF NOT EXISTS indexed_jobs_updated ON indexed_jobs (updated_at, job_id);
+CREATE INDEX IF NOT EXISTS indexed_jobs_status_created ON indexed_jobs (status, created_at, job_id);
+CREATE INDEX IF NOT EXISTS indexed_jobs_status_updated ON indexed_jobs (status, updated_at, job_id);
+CREATE TABLE IF NOT EXISTS indexed_pages (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    page_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS indexed_pages_job ON indexed_pages (job_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS job_fields (
+    job_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    page_number INTEGER,
+    extracted_at TEXT,
+    PRIMARY KEY (field, section, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_fields_job ON job_fields (job_id);
+CREATE INDEX IF NOT EXISTS job_fields_section ON job_fields (section);
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Bump when the tables change so existing indexes are rebuilt from jobs.json
+SCHEMA_VERSION = "3"
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+_WORD_RE = re.compile(r"\w+")
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open the index database, creating its tables on first use."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    if db_path not in _initialized:
+        with _init_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            row = conn.execute("SELECT value FROM index_meta WHERE key = 'schema_version'").fetchone()
+            if not row or row[0] != SCHEMA_VERSION:
+                with conn:
+                    for table in ("indexed_jobs", "indexed_pages", "page_text", "job_fields", "index_meta"):
+                        conn.execute(f"DELETE FROM {table}")
+                    conn.execute(
+                        "INSERT INTO index_meta (key, value) VALUES ('schema_version', ?)", (SCHEMA_VERSION,)
+                    )
+            _initialized.add(db_path)
+    return conn
+
+
+def job_signature(job: Dict[str, Any]) -> str:
+    """
+    Cheap fingerprint of a job; the job is re-indexed when it changes. LLM
+    usage recorded after extraction (usage_updated_at) only changes its last
+    part, which renews the signature without re-indexing pages and fields.
+    """
+    signature = f"{job.get('status')}|{job.get('updated_at')}|{len(job.get('pages') or {})}"
+    usage_updated_at = job.get("usage_updated_at")
+    return f"{signature}|{usage_updated_at}" if usage_updated_at else signature
+
+
+def _content_signature(signature: str) -> str:
+    return "|".join(signature.split("|")[:3])
+
+
+def _drop_pages(conn: sqlite3.Connection, job_id: str) -> None:
+    conn.execute("DELETE FROM page_text WHERE rowid IN (SELECT id FROM indexed_pages WHERE job_id = ?)", (job_id,))
+    conn.execute("DELETE FROM indexed_pages WHERE job_id = ?", (job_id,))
+    conn.execute("DELETE FROM job_fields WHERE job_id = ?", (job_id,))
+
+
+def _index_pages(conn: sqlite3.Connection, job_id: str, job: Dict[str, Any]) -> None:
+    if job.get("status") != "completed":
+        return
+    for page_number, text in (job.get("pages") or {}).items():
+        if not text:
+            continue
+        rowid = conn.execute(
+            "INSERT INTO indexed_pages (job_id, page_number) VALUES (?, ?)", (job_id, int(page_number))
+        ).lastrowid
+        conn.execute("INSERT INTO page_text (rowid, text) VALUES (?, ?)", (rowid, text))
+
+
+def _field_rows(job_id: str, job: Dict[str, Any]):
+    """Flatten a job result into (job_id, section, field, value, page_number, extracted_at) rows."""
+    result = job.get("result")
+    if not isinstance(result, dict):
+        return
+    extracted_at = job.get("updated_at")
+    for section, fields in result.items():
+        if not isinstance(fields, dict):
+            continue
+        for field, obj in fields.items():
+            if not isinstance(obj, dict):
+                continue
+            value, page_number = obj.get("value"), obj.get("page_number")
+            if value is not None and not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            if isinstance(page_number, str) and page_number.isdigit():
+                page_number = int(page_number)
+            if not isinstance(page_number, int):
+                page_number = None
+            yield job_id, section, field, value, page_number, extracted_at
+
+
+def _index_fields(conn: sqlite3.Connection, job_id: str, job: Dict[str, Any]) -> None:
+    if job.get("status") != "completed":
+        return
+    conn.executemany(
+        "INSERT OR REPLACE INTO job_fields "
+        "(job_id, section, field, value, page_number, extracted_at) VALUES (?, ?, ?, ?, ?, ?)",
+        _field_rows(job_id, job),
+    )
+
+
+def sync_job_index(jobs: Dict[str, Any], db_path: str, source_mtime: Optional[int] = None) -> int:
+    """
+    Bring the index in line with the given jobs dict.
+    Returns the number of jobs that were (re-)indexed.
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            known = dict(conn.execute("SELECT job_id, signature FROM indexed_jobs"))
+            changed = 0
+            for job_id, job in jobs.items():
+                if not isinstance(job, dict):
+                    continue
+                signature = job_signature(job)
+                previous = known.pop(job_id, None)
+                if previous == signature:
+                    continue
+                if previous is not None and _content_signature(previous) == _content_signature(signature):
+                    conn.execute("UPDATE indexed_jobs SET signature = ? WHERE job_id = ?", (signature, job_id))
+                    continue
+                if previous is not None:
+                    _drop_pages(conn, job_id)
+                _index_pages(conn, job_id, job)
+                _index_fields(conn, job_id, job)
+                conn.execute(
+                    "INSERT OR REPLACE INTO indexed_jobs "
+                    "(job_id, signature, status, filename, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        signature,
+                        job.get("status"),
+                        job.get("filename"),
+                        # Stored as "" when missing so they can be used as sort keys
+                        job.get("created_at") or "",
+                        job.get("updated_at") or "",
+                    ),
+                )
+                changed += 1
+
+            # Jobs that disappeared from the store
+            for job_id in known:
+                _drop_pages(conn, job_id)
+                conn.execute("DELETE FROM indexed_jobs WHERE job_id = ?", (job_id,))
+
+            if source_mtime is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('source_mtime', ?)",
+                    (str(source_mtime),),
+                )
+        return changed
+    finally:
+        conn.close()
+
+
+JOB_SORT_FIELDS = ("created_at", "updated_at")
+
+
+def get_indexed_job(db_path: str, job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the indexed metadata (no result, no page texts) of one job."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT job_id, signature, status, filename, created_at, updated_at FROM indexed_jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    job_id, signature, status, filename, created_at, updated_at = row
+    return {
+        "job_id": job_id,
+        "signature": signature,
+        "status": status,
+        "filename": filename,
+        "created_at": created_at or None,
+        "updated_at": updated_at or None,
+    }
+
+
+def list_jobs(
+    db_path: str,
+    status: Optional[str] = None,
+    filename: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    sort: str = "created_at",
+    descending: bool = True,
+    after: Optional[Tuple[str, str]] = None,
+    limit: int = 50,
+) -> Tuple[int, List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+    """
+    List job metadata ordered by created_at or updated_at (ties by job_id).
+
+    since/until bound the sort field (ISO timestamps, inclusive/exclusive),
+    filename is a case-insensitive substring. after is the (sort value, job_id)
+    of the last job of the previous page; the page is read from the index
+    starting right after it, so its cost does not depend on the job count.
+    Returns (total, jobs, next_after), next_after is None on the last page.
+    """
+    if sort not in JOB_SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort}")
+
+    clauses, params = [], []
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if filename:
+        clauses.append("filename LIKE ? ESCAPE '\\'")
+        params.append(build_like_pattern(filename))
+    if since:
+        clauses.append(f"{sort} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{sort} < ?")
+        params.append(until)
+
+    page_clauses, page_params = list(clauses), list(params)
+    if after is not None:
+        page_clauses.append(f"({sort}, job_id) {'<' if descending else '>'} (?, ?)")
+        page_params.extend(after)
+    direction = "DESC" if descending else "ASC"
+
+    conn = connect(db_path)
+    try:
+        total = conn.execute(
+            f"SELECT count(*) FROM indexed_jobs WHERE {' AND '.join(clauses) or '1'}", params
+        ).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT job_id, status, filename, created_at, updated_at FROM indexed_jobs "
+            f"WHERE {' AND '.join(page_clauses) or '1'} "
+            f"ORDER BY {sort} {direction}, job_id {direction} LIMIT ?",
+            (*page_params, limit + 1),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    jobs = [
+        {
+            "job_id": job_id,
+            "status": status,
+            "filename": filename,
+            "created_at": created_at or None,
+            "updated_at": updated_at or None,
+        }
+        for job_id, status, filename, created_at, updated_at in rows[:limit]
+    ]
+    next_after = None
+    if len(rows) > limit:
+        last = jobs[-1]
+        next_after = (last[sort] or "", last["job_id"])
+    return total, jobs, next_after
+
+
+def get_source_mtime(db_path: str) -> Optional[int]:
+    """Return the jobs file mtime the index was last synced from, if any."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT value FROM index_meta WHERE key = 'source_mtime'").fetchone()
+        return int(row[0]) if row else None
+    finally:
+        conn.close()
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Quoted parts are kept as phrases, other words must all appear on the page.
+    """
+    terms = []
+    for phrase in _PHRASE_RE.findall(query):
+        words = _WORD_RE.findall(phrase)
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+    for word in _WORD_RE.findall(_PHRASE_RE.sub(" ", query)):
+        terms.append(f'"{word}"')
+    return " ".join(terms)
+
+
+def search_pages(db_path: str, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Full-text search over indexed page texts, best matches first.
+    Returns (total_matches, results).
+    """
+    match = build_match_query(query)
+    if not match:
+        return 0, []
+
+    conn = connect(db_path)
+    try:
+        total = conn.execute("SELECT count(*) FROM page_text WHERE page_text MATCH ?", (match,)).fetchone()[0]
+        # Rank first and build snippets only for the requested page of results
+        top = conn.execute(
+            "SELECT rowid, rank FROM page_text WHERE page_text MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            (match, limit, offset),
+        ).fetchall()
+        scores = dict(top)
+        rows = conn.execute(
+            "SELECT p.id, p.job_id, j.filename, p.page_number, "
+            "snippet(page_text, 0, '[', ']', '...', 24) "
+            "FROM page_text JOIN indexed_pages p ON p.id = page_text.rowid "
+            "LEFT JOIN indexed_jobs j ON j.job_id = p.job_id "
+            f"WHERE page_text MATCH ? AND page_text.rowid IN ({','.join('?' * len(top))})",
+            (match, *scores),
+        ).fetchall() if top else []
+    finally:
+        conn.close()
+
+    rows.sort(key=lambda row: scores[row[0]])
+    return total, [
+        {
+            "job_id": job_id,
+            "filename": filename,
+            "page_number": int(page_number),
+            "snippet": snippet,
+            "rank": round(-scores[rowid], 4),
+        }
+        for rowid, job_id, filename, page_number, snippet in rows
+    ]
+
+
+def parse_field_spec(spec: str) -> Tuple[Optional[str], str]:
+    """Split "section.field" (or a bare "field") into (section, field)."""
+    section, _, field = spec.strip().rpartition(".")
+    return section or None, field
+
+
+def build_like_pattern(pattern: str) -> str:
+    """
+    Turn a value pattern into a LIKE pattern (case-insensitive for ASCII).
+    "*" matches any text; a pattern without "*" matches anywhere in the value.
+    """
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if "*" not in escaped:
+        return f"%{escaped}%"
+    return escaped.replace("*", "%")
+
+
+def _condition_sql(section: Optional[str], field: Optional[str], pattern: Optional[str]):
+    clauses, params = [], []
+    if section:
+        clauses.append("section = ?")
+        params.append(section)
+    if field:
+        clauses.append("field = ?")
+        params.append(field)
+    if pattern:
+        clauses.append("value LIKE ? ESCAPE '\\'")
+        params.append(build_like_pattern(pattern))
+    return " AND ".join(clauses) or "1", params
+
+
+def query_fields(
+    db_path: str,
+    conditions: List[Tuple[Optional[str], Optional[str], Optional[str]]],
+    select: Optional[List[Tuple[Optional[str], str]]] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """
+    Query extracted fields across all completed jobs.
+
+    conditions is a list of (section, field, value_pattern); a job matches when
+    it satisfies every condition. Without select, the rows matching any of the
+    conditions are returned for the matching jobs; with select, the listed
+    (section, field) columns of the matching jobs are returned instead.
+
+    Each condition is a range scan over the rows of one field. Rows are sorted
+    and paginated on their keys; values are only read for the returned rows.
+    Returns (total_rows, matching_jobs, rows), rows ordered by job, section, field.
+    """
+    compiled = [_condition_sql(*condition) for condition in conditions]
+    wanted = [_condition_sql(section, field, None) for section, field in select] if select else compiled
+
+    prefix, params = "", []
+    if len(compiled) > 1 or (compiled and select):
+        # Jobs meeting every condition. A single condition without select needs
+        # no such filter: every row it matches belongs to a matching job.
+        prefix = "WITH matching AS MATERIALIZED ({}) ".format(
+            " INTERSECT ".join(f"SELECT job_id FROM job_fields WHERE {sql}" for sql, _ in compiled)
+        )
+        params = [p for _, condition_params in compiled for p in condition_params]
+    prefix_params = list(params)
+
+    # One range scan per wanted field; rows already returned by an earlier
+    # branch are skipped so that overlapping selections are not duplicated
+    branches = []
+    for n, (sql, wanted_params) in enumerate(wanted or [("1", [])]):
+        branch = f"SELECT job_id, section, field FROM job_fields WHERE ({sql})"
+        params.extend(wanted_params)
+        if n:
+            earlier = " OR ".join(f"({earlier_sql})" for earlier_sql, _ in wanted[:n])
+            branch += f" AND NOT coalesce({earlier}, 0)"
+            params.extend(p for _, earlier_params in wanted[:n] for p in earlier_params)
+        if prefix:
+            branch += " AND job_id IN matching"
+        branches.append(branch)
+    keys = " UNION ALL ".join(branches)
+
+    conn = connect(db_path)
+    try:
+        if prefix:
+            total_rows = conn.execute(f"{prefix}SELECT count(*) FROM ({keys})", params).fetchone()[0]
+            total_jobs = conn.execute(f"{prefix}SELECT count(*) FROM matching", prefix_params).fetchone()[0]
+        elif select:
+            total_rows = conn.execute(f"SELECT count(*) FROM ({keys})", params).fetchone()[0]
+            total_jobs = conn.execute("SELECT count(*) FROM indexed_jobs WHERE status = 'completed'").fetchone()[0]
+        else:
+            total_rows, total_jobs = conn.execute(
+                f"SELECT count(*), count(DISTINCT job_id) FROM ({keys})", params
+            ).fetchone()
+        rows = conn.execute(
+            f"{prefix}SELECT f.job_id, j.filename, f.section, f.field, f.value, f.page_number, f.extracted_at "
+            f"FROM ({keys} ORDER BY 1, 2, 3 LIMIT ? OFFSET ?) AS k "
+            "JOIN job_fields f ON f.field = k.field AND f.section = k.section AND f.job_id = k.job_id "
+            "LEFT JOIN indexed_jobs j ON j.job_id = f.job_id "
+            "ORDER BY f.job_id, f.section, f.field",
+            (*params, limit, offset),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return total_rows, total_jobs, [
+        {
+            "job_id": job_id,
+            "filename": filename,
+            "section": section,
+            "field": field,
+            "value": value,
+            "page_number": page_number,
+            "extracted_at": extracted_at,
+        }
+        for job_id, filename, section, field, value, page_number, extracted_at in rows
+    ]
@@ -1,16 +1,33 @@
 import json
 import os
+from datetime import datetime, timezone
+
+from .job_index import get_source_mtime, sync_job_index
+from .metrics import JOB_STORE_BYTES, JOB_STORE_SECONDS
 
 job_file = "jobs.json"
 
+def index_db_path():
+    """The job index lives next to the job file, e.g. jobs.json -> jobs.index.db."""
+    return os.path.splitext(job_file)[0] + ".index.db"
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
 def save_jobs_to_file(processing_jobs):
-    with open(job_file, "w", encoding="utf-8") as f:
-        json.dump(processing_jobs, f, ensure_ascii=False, indent=2)
+    with JOB_STORE_SECONDS.time(op="write"):
+        with open(job_file, "w", encoding="utf-8") as f:
+            json.dump(processing_jobs, f, ensure_ascii=False, indent=2)
+    stat = os.stat(job_file)
+    JOB_STORE_BYTES.set(stat.st_size)
+    with JOB_STORE_SECONDS.time(op="index"):
+        sync_job_index(processing_jobs, index_db_path(), source_mtime=stat.st_mtime_ns)
 
 def load_jobs_from_file():
     if os.path.exists(job_file):
         try:
-            with open(job_file, "r", encoding="utf-8") as f:
+            with JOB_STORE_SECONDS.time(op="read"), open(job_file, "r", encoding="utf-8") as f:
+                JOB_STORE_BYTES.set(os.fstat(f.fileno()).st_size)
                 content = f.read().strip()
                 if not content:
                     return {}
@@ -18,3 +35,16 @@ def load_jobs_from_file():
         except (json.JSONDecodeError, OSError):
             return {}
     return {}
+
+def refresh_job_index():
+    """
+    Make sure the job index reflects the job file, e.g. after a deploy or a
+    manual edit of jobs.json. Only re-reads the job file when its mtime differs
+    from the one recorded at the last sync. Returns the index path.
+    """
+    db_path = index_db_path()
+    if os.path.exists(job_file):
+        mtime = os.stat(job_file).st_mtime_ns
+        if get_source_mtime(db_path) != mtime:
+            sync_job_index(load_jobs_from_file(), db_path, source_mtime=mtime)
+    return db_path
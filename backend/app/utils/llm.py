@@ -0,0 +1,384 @@
+# app/utils/llm.py
+"""
+LLM provider layer.
+
+Every LLM call goes through an LLMProvider: generate(prompt) returns the
+response text, agenerate(prompt) is the async form. Implementations:
+
+- GeminiProvider: Google Gemini through google-genai; the client is only
+  created on the first call, so the app starts without an API key
+- CassetteProvider: replays responses recorded in a JSONL cassette, keyed
+  by model and prompt; in record mode it forwards misses to another
+  provider and appends them to the cassette
+- SyntheticProvider: offline stand-in that answers in the shape of the
+  schema given in the prompt, with configurable latency and error rate
+
+Subclasses implement _generate / _agenerate; the base class counts the
+call and records its latency and estimated tokens in the LLM metrics, and
+in the per-job usage ledger when one is active (see llm_usage.py).
+
+The provider used by the app (llm) is chosen with LLM_PROVIDER
+(gemini | cassette | record | synthetic, see config.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import (
+    LLM_API,
+    LLM_CASSETTE_PATH,
+    LLM_PROVIDER,
+    LLM_SYNTHETIC_ERROR_RATE,
+    LLM_SYNTHETIC_FILL_RATIO,
+    LLM_SYNTHETIC_LATENCY_MS,
+    LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS,
+    LLM_SYNTHETIC_SEED,
+)
+from .llm_usage import current_call, estimate_tokens, record_call
+from .metrics import LLM_PROMPT_TOKENS, LLM_REQUEST_SECONDS, LLM_RESPONSE_TOKENS
+from .schema_prompt import FIELDS_HEADER
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class LLMError(RuntimeError):
+    """An LLM call failed (provider error, missing key, no recorded response)."""
+
+
+class LLMProvider:
+    """Base class: counts calls and characters sent and received, and times each call."""
+
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self._lock = threading.Lock()
+
+    def _count(self, prompt: str, text: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            self.response_chars += len(text)
+        LLM_PROMPT_TOKENS.inc(estimate_tokens(prompt), provider=self.name)
+        LLM_RESPONSE_TOKENS.inc(estimate_tokens(text), provider=self.name)
+        return text
+
+    def _observe(self, started: float, outcome: str) -> None:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, provider=self.name, outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "calls": self.calls,
+            "prompt_chars": self.prompt_chars,
+            "response_chars": self.response_chars,
+        }
+
+    def generate(self, prompt: str, model: str = DEFAULT_MODEL) -> str:
+        with record_call(self.name, model, prompt) as call:
+            started = time.perf_counter()
+            try:
+                text = self._generate(prompt, model)
+            except Exception:
+                self._observe(started, "error")
+                raise
+            self._observe(started, "ok")
+            if call is not None:
+                call.set_response(text)
+            return self._count(prompt, text)
+
+    async def agenerate(self, prompt: str, model: str = DEFAULT_MODEL) -> str:
+        with record_call(self.name, model, prompt) as call:
+            started = time.perf_counter()
+            try:
+                text = await self._agenerate(prompt, model)
+            except Exception:
+                self._observe(started, "error")
+                raise
+            self._observe(started, "ok")
+            if call is not None:
+                call.set_response(text)
+            return self._count(prompt, text)
+
+    def _generate(self, prompt: str, model: str) -> str:
+        raise NotImplementedError
+
+    async def _agenerate(self, prompt: str, model: str) -> str:
+        return await asyncio.to_thread(self._generate, prompt, model)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], key_name: str = "LLM_API"):
+        super().__init__()
+        self.api_key = api_key
+        self.key_name = key_name
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            if not self.api_key:
+                raise LLMError(f"{self.key_name} environment variable not set in .env")
+            from google import genai  # Google Gemini API client
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    @staticmethod
+    def _report_usage(response) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        call = current_call()
+        if usage is not None and call is not None:
+            call.report_usage(
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None),
+            )
+
+    def _generate(self, prompt: str, model: str) -> str:
+        response = self.client.models.generate_content(model=model, contents=[prompt])
+        self._report_usage(response)
+        return response.text or ""
+
+    async def _agenerate(self, prompt: str, model: str) -> str:
+        response = await self.client.aio.models.generate_content(model=model, contents=[prompt])
+        self._report_usage(response)
+        return response.text or ""
+
+
+def cassette_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class CassetteProvider(LLMProvider):
+    """
+    Deterministic replay of recorded responses.
+
+    The cassette is a JSONL file of {"key", "model", "prompt_chars",
+    "response"} lines. With record=True, prompts missing from it are sent
+    to inner and the responses appended; otherwise a miss raises LLMError.
+    """
+
+    name = "cassette"
+
+    def __init__(self, path: str, inner: Optional[LLMProvider] = None, record: bool = False):
+        super().__init__()
+        if record and inner is None:
+            raise ValueError("record mode needs a provider to record from")
+        self.path = path
+        self.inner = inner
+        self.record = record
+        self.responses: Dict[str, str] = {}
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["response"]
+
+    def _lookup(self, prompt: str, model: str) -> Optional[str]:
+        text = self.responses.get(cassette_key(model, prompt))
+        if text is None:
+            with self._lock:
+                self.misses += 1
+            if not self.record:
+                raise LLMError(f"No recorded response in {self.path} for this prompt ({len(prompt)} chars)")
+        elif current_call() is not None:
+            current_call().cached = True
+        return text
+
+    def _store(self, prompt: str, model: str, text: str):
+        key = cassette_key(model, prompt)
+        entry = {"key": key, "model": model, "prompt_chars": len(prompt), "response": text}
+        with self._lock:
+            self.responses[key] = text
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _generate(self, prompt: str, model: str) -> str:
+        text = self._lookup(prompt, model)
+        if text is None:
+            text = self.inner._generate(prompt, model)  # only the outer call is instrumented
+            self._store(prompt, model, text)
+        return text
+
+    async def _agenerate(self, prompt: str, model: str) -> str:
+        text = self._lookup(prompt, model)
+        if text is None:
+            text = await self.inner._agenerate(prompt, model)
+            self._store(prompt, model, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "recorded": len(self.responses), "misses": self.misses}
+
+
+# Schema fields as written in prompts: one "section: field, field" line per
+# section after FIELDS_HEADER (compile_schema), or written out as JSON
+# ("field": {"value": ...) or in quoted form ('field': { 'value': ...)
+_COMPACT_LINE_RE = re.compile(r"^(\w+): (\w+(?:, \w+)*)$")
+_SECTION_RE = re.compile(r"""["'](\w+)["']\s*:\s*\{\s*["'](?=\w+["']\s*:\s*\{\s*["']value["'])""")
+_FIELD_RE = re.compile(r"""["'](\w+)["']\s*:\s*\{\s*["']value["']""")
+_PAGE_RE = re.compile(r"^--- PAGE (\d+) ---$", re.MULTILINE)
+_PER_PAGE_RE = re.compile(r"keyed by (?:the )?page number", re.IGNORECASE)
+_QUOTED_RE = re.compile(r'"([^"\n]{3,})"')
+
+
+def schema_from_prompt(prompt: str) -> Dict[str, List[str]]:
+    """{section: [field, ...]} of the schema described in a prompt (empty if none)."""
+    schema: Dict[str, List[str]] = {}
+    start = prompt.find(FIELDS_HEADER)
+    if start >= 0:
+        for line in prompt[start + len(FIELDS_HEADER):].strip().splitlines():
+            match = _COMPACT_LINE_RE.match(line.strip())
+            if not match:
+                break
+            schema[match.group(1)] = match.group(2).split(", ")
+        return schema
+    sections = [(m.start(), m.group(1)) for m in _SECTION_RE.finditer(prompt)]
+    for match in _FIELD_RE.finditer(prompt):
+        owner = None
+        for start, section in sections:
+            if start > match.start():
+                break
+            owner = section
+        if owner is not None and match.group(1) != owner:
+            schema.setdefault(owner, [])
+            if match.group(1) not in schema[owner]:
+                schema[owner].append(match.group(1))
+    return schema
+
+
+def pages_from_prompt(prompt: str) -> Dict[int, str]:
+    """Page texts of a prompt built with "--- PAGE n ---" markers."""
+    matches = list(_PAGE_RE.finditer(prompt))
+    pages = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt)
+        pages[int(match.group(1))] = prompt[match.end():end].strip()
+    return pages
+
+
+def synthetic_response(prompt: str, fill_ratio: float = 0.3, seed: int = 0) -> str:
+    """
+    Deterministic schema-shaped answer to a prompt.
+
+    Each schema field gets, with probability fill_ratio, a value taken from
+    the text of one of the prompt's pages (so it can be located again) and
+    that page number; otherwise nulls. Prompts asking for results keyed by
+    page number get one such object per page. Prompts without a schema get
+    back their last quoted phrase (the query of a passage lookup).
+    """
+    rng = random.Random(f"{seed}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}")
+    schema = schema_from_prompt(prompt)
+    if not schema:
+        quoted = _QUOTED_RE.findall(prompt)
+        return quoted[-1] if quoted else ""
+
+    pages = pages_from_prompt(prompt) or {1: prompt}
+
+    def fill(page_numbers: List[int]) -> Dict[str, Any]:
+        result = {}
+        for section, fields in schema.items():
+            result[section] = {}
+            for field in fields:
+                if rng.random() < fill_ratio:
+                    page = rng.choice(page_numbers)
+                    words = pages[page].split()
+                    start = rng.randrange(max(1, len(words) - 12))
+                    value = " ".join(words[start:start + 12]) or f"synthetic {field}"
+                    result[section][field] = {"value": value, "page_number": page}
+                else:
+                    result[section][field] = {"value": None, "page_number": None}
+        return result
+
+    if _PER_PAGE_RE.search(prompt):
+        return json.dumps({str(page): fill([page]) for page in pages})
+    return json.dumps(fill(sorted(pages)))
+
+
+class SyntheticProvider(LLMProvider):
+    """
+    Offline LLM stand-in for tests and benchmarks.
+
+    Each call waits latency_ms plus latency_per_kchar_ms for every 1000
+    prompt characters, then fails with LLMError with probability error_rate
+    (drawn from a seeded generator, so failures repeat run to run) or
+    returns responder(prompt) (synthetic_response by default).
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        latency_per_kchar_ms: float = 0.0,
+        fill_ratio: float = 0.3,
+        seed: int = 0,
+        responder: Optional[Callable[[str], str]] = None,
+    ):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.latency_per_kchar_ms = latency_per_kchar_ms
+        self.error_rate = error_rate
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self.responder = responder or (lambda prompt: synthetic_response(prompt, fill_ratio, seed))
+
+    def _delay(self, prompt: str) -> float:
+        return (self.latency_ms + self.latency_per_kchar_ms * len(prompt) / 1000) / 1000
+
+    def _respond(self, prompt: str) -> str:
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            raise LLMError("synthetic provider error")
+        return self.responder(prompt)
+
+    def _generate(self, prompt: str, model: str) -> str:
+        time.sleep(self._delay(prompt))
+        return self._respond(prompt)
+
+    async def _agenerate(self, prompt: str, model: str) -> str:
+        await asyncio.sleep(self._delay(prompt))
+        return self._respond(prompt)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "errors": self.errors}
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """Build the provider named by LLM_PROVIDER (or name)."""
+    name = (name or LLM_PROVIDER).lower()
+    if name == "gemini":
+        return GeminiProvider(LLM_API, "LLM_API")
+    if name == "cassette":
+        return CassetteProvider(LLM_CASSETTE_PATH)
+    if name == "record":
+        return CassetteProvider(LLM_CASSETTE_PATH, inner=GeminiProvider(LLM_API, "LLM_API"), record=True)
+    if name == "synthetic":
+        return SyntheticProvider(
+            latency_ms=LLM_SYNTHETIC_LATENCY_MS,
+            error_rate=LLM_SYNTHETIC_ERROR_RATE,
+            latency_per_kchar_ms=LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS,
+            fill_ratio=LLM_SYNTHETIC_FILL_RATIO,
+            seed=LLM_SYNTHETIC_SEED,
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER {name!r} (use gemini, cassette, record or synthetic)")
+
+
+llm = create_provider()
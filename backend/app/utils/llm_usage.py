@@ -0,0 +1,184 @@
+# app/utils/llm_usage.py
+"""
+Per-job accounting of LLM calls.
+
+Calls made through an LLMProvider are recorded in the LLMUsageLedger that
+is active in the current context (track_llm_usage), under the stage set
+with llm_stage() ("extraction", "refill", "repair", "highlight", ...).
+Context variables are inherited by asyncio tasks and asyncio.to_thread, so
+the batch tasks of a pipeline run are counted in the ledger of the request
+that started them.
+
+Each call records its stage, provider and model, prompt and response
+tokens (as reported by the provider, otherwise estimated at 4 characters
+per token), latency, whether it was served from a cache (cassette replay)
+and whether it failed. merge_usage() adds a ledger to the totals stored on
+a job.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# Per-call entries kept on a job (the most recent ones); totals count every call
+MAX_RECORDED_CALLS = 500
+
+_TOTAL_KEYS = ("calls", "errors", "cached", "prompt_tokens", "response_tokens", "latency_ms")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about 4 characters per token for English prose)."""
+    return (len(text or "") + 3) // 4
+
+
+class LLMCall:
+    """One provider call; providers fill in reported token counts and cache hits."""
+
+    def __init__(self, stage: str, provider: str, model: str, prompt: str):
+        self.stage = stage
+        self.provider = provider
+        self.model = model
+        self.prompt_chars = len(prompt)
+        self.prompt_tokens = estimate_tokens(prompt)
+        self.response_tokens = 0
+        self.tokens_estimated = True
+        self.cached = False
+        self.ok = True
+        self.latency_ms = 0.0
+        self._response_reported = False
+
+    def report_usage(self, prompt_tokens: Optional[int], response_tokens: Optional[int]) -> None:
+        """Token counts from the provider's usage metadata (None keeps the estimate)."""
+        if prompt_tokens is not None:
+            self.prompt_tokens = prompt_tokens
+            self.tokens_estimated = False
+        if response_tokens is not None:
+            self.response_tokens = response_tokens
+            self._response_reported = True
+
+    def set_response(self, text: str) -> None:
+        if not self._response_reported:
+            self.response_tokens = estimate_tokens(text)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "provider": self.provider,
+            "model": self.model,
+            "prompt_chars": self.prompt_chars,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "latency_ms": round(self.latency_ms, 1),
+            "cached": self.cached,
+            "ok": self.ok,
+        }
+
+
+class LLMUsageLedger:
+    """The LLM calls of one request."""
+
+    def __init__(self):
+        self.calls: List[LLMCall] = []
+        self._lock = threading.Lock()
+
+    def record(self, call: LLMCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def totals(self) -> Dict[str, Any]:
+        """{"calls", "errors", "cached", "prompt_tokens", "response_tokens", "latency_ms", "by_stage"}."""
+        with self._lock:
+            calls = list(self.calls)
+        totals: Dict[str, Any] = {key: 0 for key in _TOTAL_KEYS}
+        totals["by_stage"] = {}
+        for call in calls:
+            values = {
+                "calls": 1,
+                "errors": 0 if call.ok else 1,
+                "cached": 1 if call.cached else 0,
+                "prompt_tokens": call.prompt_tokens,
+                "response_tokens": call.response_tokens,
+                "latency_ms": call.latency_ms,
+            }
+            _add(totals, values)
+            _add(totals["by_stage"].setdefault(call.stage, {}), values)
+        return totals
+
+
+def _add(bucket: Dict[str, Any], values: Dict[str, Any]) -> None:
+    for key in _TOTAL_KEYS:
+        total = bucket.get(key, 0) + values.get(key, 0)
+        bucket[key] = round(total, 1) if key == "latency_ms" else total
+
+
+def merge_usage(stored: Optional[Dict[str, Any]], ledger: LLMUsageLedger) -> Dict[str, Any]:
+    """Add a ledger's calls to the llm_usage totals stored on a job (None if there are none yet)."""
+    stored = stored or {}
+    merged: Dict[str, Any] = {key: stored.get(key, 0) for key in _TOTAL_KEYS}
+    merged["by_stage"] = {stage: dict(values) for stage, values in (stored.get("by_stage") or {}).items()}
+    added = ledger.totals()
+    _add(merged, added)
+    for stage, values in added["by_stage"].items():
+        _add(merged["by_stage"].setdefault(stage, {}), values)
+    requests = list(stored.get("requests") or []) + [call.as_dict() for call in ledger.calls]
+    merged["requests"] = requests[-MAX_RECORDED_CALLS:]
+    return merged
+
+
+_ledger: ContextVar[Optional[LLMUsageLedger]] = ContextVar("llm_usage_ledger", default=None)
+_stage: ContextVar[str] = ContextVar("llm_usage_stage", default="other")
+_call: ContextVar[Optional[LLMCall]] = ContextVar("llm_usage_call", default=None)
+
+
+@contextmanager
+def track_llm_usage(ledger: Optional[LLMUsageLedger] = None) -> Iterator[LLMUsageLedger]:
+    """Record the LLM calls made in this block (and the tasks it starts) in ledger."""
+    ledger = ledger if ledger is not None else LLMUsageLedger()
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
+
+
+@contextmanager
+def llm_stage(stage: str) -> Iterator[None]:
+    """Attribute the LLM calls made in this block to stage."""
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def current_call() -> Optional[LLMCall]:
+    """The call being recorded, for providers to report token usage or cache hits."""
+    return _call.get()
+
+
+@contextmanager
+def record_call(provider: str, model: str, prompt: str) -> Iterator[Optional[LLMCall]]:
+    """
+    Record one provider call in the active ledger. Yields None when no
+    ledger is active, or for a provider called by another provider (a
+    recording cassette calling Gemini), which is part of the outer call.
+    """
+    ledger = _ledger.get()
+    if ledger is None or _call.get() is not None:
+        yield None
+        return
+    call = LLMCall(_stage.get(), provider, model, prompt)
+    token = _call.set(call)
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.ok = False
+        raise
+    finally:
+        _call.reset(token)
+        call.latency_ms = (time.perf_counter() - started) * 1000
+        ledger.record(call)
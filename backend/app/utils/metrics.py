@@ -0,0 +1,225 @@
+# app/utils/metrics.py
+"""
+Process-wide counters, gauges and histograms, rendered in the Prometheus
+text exposition format by GET /metrics.
+
+A small stand-in for prometheus_client: metrics are created once at import
+time in REGISTRY and updated with label values as keyword arguments:
+
+    PIPELINE_STAGE_SECONDS.observe(0.8, stage="llm")
+    with PIPELINE_STAGE_SECONDS.time(stage="extract"):
+        ...
+
+Values live in this process only; with several workers each one has to be
+scraped on its own.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers page-level work (ms) up to whole-document LLM calls (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0.0  # exported as 0 before the first update
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels_text(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Count something as in progress for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if not self.labelnames:
+            self._values[()] = [[0] * len(self.buckets), 0.0, 0]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the block in seconds (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def total(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[1] if state else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels_text(names, key + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels_text(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of this process, in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------------- Application metrics ---------------- #
+JOBS_IN_FLIGHT = REGISTRY.gauge("loanbook_jobs_in_flight", "Extraction requests currently being processed")
+JOBS_TOTAL = REGISTRY.counter("loanbook_jobs_total", "Finished extraction requests by outcome", ["outcome"])
+PAGES_PROCESSED = REGISTRY.counter("loanbook_pages_processed_total", "Pages read from uploaded PDFs by extraction mode", ["mode"])
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram("loanbook_pipeline_stage_seconds", "Time spent per extraction stage", ["stage"])
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram("loanbook_llm_request_seconds", "LLM request latency", ["provider", "outcome"])
+LLM_PROMPT_TOKENS = REGISTRY.counter("loanbook_llm_prompt_tokens_total", "Estimated prompt tokens sent to the LLM (4 characters per token)", ["provider"])
+LLM_RESPONSE_TOKENS = REGISTRY.counter("loanbook_llm_response_tokens_total", "Estimated response tokens received from the LLM (4 characters per token)", ["provider"])
+LLM_JSON_REPAIRS = REGISTRY.counter("loanbook_llm_json_repairs_total", "LLM requests made to repair invalid JSON output")
+
+JOB_STORE_SECONDS = REGISTRY.histogram("loanbook_job_store_seconds", "Job store access time", ["op"])
+JOB_STORE_BYTES = REGISTRY.gauge("loanbook_job_store_bytes", "Size of the job file at the last read or write")
+
+HIGHLIGHT_SECONDS = REGISTRY.histogram("loanbook_highlight_seconds", "Highlight time by step (local matching or LLM fallback)", ["step"])
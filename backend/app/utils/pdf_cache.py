@@ -0,0 +1,139 @@
+# app/utils/pdf_cache.py
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz
+
+from .config import DOCUMENT_POOL_MAX_DOCUMENTS, DOCUMENT_POOL_MAX_BYTES
+
+
+def file_digest(file_path: str) -> str:
+    """Return the sha256 hex digest of a file's content."""
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class _PooledDocument:
+    def __init__(self, file_path: str, size: int):
+        self.file_path = file_path
+        self.size = size
+        self.doc = None
+        self.lock = threading.Lock()
+        self.users = 0
+        self.evicted = False
+
+
+class DocumentPool:
+    """
+    Process-wide LRU cache of open fitz.Document handles, keyed by file hash.
+
+    - Bounded by document count and by approximate memory (the PDF file size
+      is used as the estimate of a parsed document's footprint).
+    - PyMuPDF documents are not safe for concurrent use, so each handle is
+      checked out by one caller at a time; other callers wait for it. The
+      wait blocks the thread, so never check out on the event loop: use it
+      from sync endpoints (run in the threadpool) or asyncio.to_thread.
+    - Files are re-hashed when their size or mtime changes, so an updated
+      file gets a fresh handle and the stale one is evicted.
+    """
+
+    def __init__(self, max_documents: int = DOCUMENT_POOL_MAX_DOCUMENTS, max_bytes: int = DOCUMENT_POOL_MAX_BYTES):
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _PooledDocument]" = OrderedDict()
+        self._digests = {}  # path -> ((mtime_ns, size), digest)
+
+    def digest(self, file_path: str) -> str:
+        """Return the content hash of a file, re-hashing only when it changed on disk."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = file_digest(path)
+        with self._lock:
+            self._digests[path] = (signature, digest)
+            if cached and cached[1] != digest and cached[1] not in {d for _, d in self._digests.values()}:
+                # The file changed: nobody else maps to the old content any more
+                self._discard(cached[1])
+        return digest
+
+    @contextmanager
+    def checkout(self, file_path: str):
+        """Yield an open fitz.Document for file_path, holding it exclusively until the block exits."""
+        digest = self.digest(file_path)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                entry = _PooledDocument(os.path.abspath(file_path), os.path.getsize(file_path))
+                self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            entry.users += 1
+
+        try:
+            with entry.lock:
+                if entry.doc is None:
+                    entry.doc = fitz.open(entry.file_path)
+                yield entry.doc
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.evicted and entry.users == 0:
+                    self._close(entry)
+                self._evict()
+
+    def clear(self) -> None:
+        """Close every idle document and forget all cached hashes."""
+        with self._lock:
+            for digest in list(self._entries):
+                self._discard(digest)
+            self._digests.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "bytes": sum(e.size for e in self._entries.values()),
+                "max_documents": self.max_documents,
+                "max_bytes": self.max_bytes,
+            }
+
+    # Callers of the helpers below must hold self._lock
+
+    def _evict(self) -> None:
+        total = sum(e.size for e in self._entries.values())
+        for digest in list(self._entries):
+            if len(self._entries) <= self.max_documents and total <= self.max_bytes:
+                break
+            entry = self._entries[digest]
+            if entry.users:
+                continue
+            total -= entry.size
+            self._discard(digest)
+
+    def _discard(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        entry.evicted = True
+        if entry.users == 0:
+            self._close(entry)
+
+    @staticmethod
+    def _close(entry: _PooledDocument) -> None:
+        if entry.doc is not None:
+            entry.doc.close()
+            entry.doc = None
+
+
+document_pool = DocumentPool()
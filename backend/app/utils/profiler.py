@@ -0,0 +1,132 @@
+# app/utils/profiler.py
+"""
+Sampling profiler for single requests.
+
+A StackSampler runs a daemon thread that records the Python stack of every
+other thread of the process at a fixed interval. Because it samples all
+threads, the event loop (the request and the asyncio tasks it starts) and
+worker threads (asyncio.to_thread, thread pools) are covered; requests
+handled at the same time show up as well.
+
+Profiles are written in the collapsed-stack format, one
+"thread;outer frame;...;inner frame count" line per distinct stack, which
+speedscope (https://www.speedscope.app), flamegraph.pl and most flame graph
+tools open as is.
+
+Functions:
+- profile_path(): where the profile of a job is stored
+- save_profile(): write a sampler's stacks as a job's profile
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from .config import PROFILE_DIR, PROFILE_INTERVAL_MS
+
+
+def _short_path(filename: str) -> str:
+    """File name relative to the app or site-packages, for readable frames."""
+    cwd = os.getcwd() + os.sep
+    if filename.startswith(cwd):
+        return filename[len(cwd):]
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+class StackSampler:
+    """
+    Samples the stacks of all threads every interval_ms while running.
+
+    Use as a context manager or with start() / stop(). stacks counts how
+    often each stack (outermost frame first, thread name at the root) was
+    seen; stacks deeper than max_depth keep their innermost frames.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, max_depth: int = 256):
+        self.interval = interval_ms / 1000
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+            self._labels[code] = label
+        return label
+
+    def sample(self) -> None:
+        """Record the current stack of every thread except the sampler's."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "StackSampler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.duration = time.perf_counter() - self._started
+        return self
+
+    def __enter__(self) -> "StackSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def collapsed(self) -> str:
+        """The stacks in collapsed-stack format, most frequent first."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "interval_ms": round(self.interval * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 1),
+        }
+
+
+def profile_path(job_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{os.path.basename(job_id)}.collapsed.txt")
+
+
+def save_profile(job_id: str, sampler: StackSampler) -> Tuple[str, Dict[str, Any]]:
+    """Write the sampler's stacks as the profile of job_id (replacing an older one)."""
+    path = profile_path(job_id)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed())
+    return path, sampler.summary()
@@ -0,0 +1,95 @@
+# app/utils/response_cache.py
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+from .config import RESPONSE_CACHE_MAX_BYTES
+
+
+class CachedResponse(NamedTuple):
+    etag: str  # strong ETag of the uncompressed body
+    body: bytes  # gzip-compressed JSON
+
+
+class ResponseCache:
+    """
+    Process-wide LRU cache of serialized, gzip-compressed JSON responses.
+
+    - Bodies are compressed once when stored; clients that do not accept
+      gzip get them decompressed on the fly.
+    - The ETag is the sha256 of the uncompressed body, so equal content always
+      gets the same tag, across restarts and workers.
+    - Bounded by the total size of the compressed bodies.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, body: bytes) -> CachedResponse:
+        """Compress and store an uncompressed JSON body."""
+        entry = CachedResponse(
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            body=gzip.compress(body, compresslevel=6, mtime=0),
+        )
+        if len(entry.body) > self.max_bytes:
+            return entry
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"responses": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if an Accept-Encoding header allows gzip (and does not give it q=0)."""
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip() in ("gzip", "*"):
+            q = params.strip()
+            return not (q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compare an If-None-Match header against a strong ETag (or its gzip variant)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') in (base, f"{base}-gzip"):
+            return True
+    return False
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,199 @@
+# app/utils/text_normalizer.py
+"""
+Single-pass text normalization with an offset map back to the original.
+
+A TextNormalizer compiles its rules (drop patterns, non-ASCII replacement,
+whitespace collapsing, lowercasing) into one regex that only matches the
+runs that actually change. Plain words and single separators are copied in
+bulk, so a page is scanned once instead of once per rule.
+
+normalize() returns the normalized string. normalize_with_offsets() also
+returns offsets[i] = index in the original text of normalized character i,
+so a span found in the normalized text can be mapped back to the original.
+
+Instances:
+- OCR_CLEANER: the OCR text cleaning rules (line breaks, page numbers,
+  non-ASCII junk, whitespace runs)
+- MATCH_NORMALIZER: lowercase and collapse all whitespace, for comparing
+  passages with page and block text
+"""
+
+import re
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional, Tuple
+
+_NEWLINES_RE = re.compile(r"[\r\n]{2,}")
+MAX_CACHED_REWRITES = 4096
+
+
+class NormalizedText(NamedTuple):
+    text: str
+    offsets: List[int]  # one entry per character of text, plus len(original) at the end
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a [start, end) span of the normalized text to the original text."""
+        if end <= start:
+            return self.offsets[start], self.offsets[start]
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+    def normalized_index(self, original_index: int) -> int:
+        """First normalized character that comes from original_index or later."""
+        return bisect_left(self.offsets, original_index, 0, len(self.text))
+
+
+class TextNormalizer:
+    """
+    Compiled normalization rules.
+
+    - drop: regex of text to remove (e.g. page numbers)
+    - drop_first_chars: regex class body of the characters a drop match can
+      start with (e.g. r"\dPp"); lets the scanner skip plain text quickly
+    - replace_non_ascii: every run of non-ASCII characters becomes one space
+    - keep_single_whitespace: a lone whitespace character is kept ("\\r"
+      becomes "\\n") and consecutive line breaks count as one; otherwise
+      every whitespace run becomes a single space
+    - lowercase: lowercase the remaining text
+
+    Whitespace runs (including removed text and replaced junk between them)
+    longer than one character become a single space; leading and trailing
+    whitespace is stripped.
+    """
+
+    def __init__(
+        self,
+        drop: Optional[str] = None,
+        drop_first_chars: Optional[str] = None,
+        replace_non_ascii: bool = False,
+        keep_single_whitespace: bool = False,
+        lowercase: bool = False,
+    ):
+        self.lowercase = lowercase
+        self.keep_single_whitespace = keep_single_whitespace
+        # Only whitespace collapsing: str.split() gives the same result in C
+        self._split_only = not drop and not replace_non_ascii and not keep_single_whitespace
+        # Runs repeat a lot (" \n", "  ", curly quotes), remember their rewrites
+        self._rewrites = {}
+
+        # Pieces of a run, in the order the rules apply
+        pieces = []
+        if drop:
+            pieces.append(("drop", drop))
+        if replace_non_ascii:
+            pieces.append(("junk", r"[^\x00-\x7F]+"))
+            pieces.append(("space", r"[\t\n\x0b\x0c\r\x1c-\x1f ]+"))
+        else:
+            pieces.append(("space", r"\s+"))
+        self._piece_re = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in pieces))
+
+        # A run is only worth rewriting when it contains removed or replaced
+        # text, two or more whitespace characters, or a whitespace character
+        # that is not kept as is. Single spaces between words never match.
+        alternatives = [r"\s{2,}", r"\r" if keep_single_whitespace else r"[^\S ]"]
+        special = "|".join(pattern for name, pattern in pieces if name != "space")
+        if special:
+            alternatives.insert(0, rf"\s*(?:{special})(?:\s|{special})*")
+        run = "|".join(alternatives)
+        if not drop or drop_first_chars:
+            # Runs can only start at these characters; checking them first is
+            # much cheaper than trying every alternative at every position
+            first = r"\s" + (drop_first_chars or "") + (r"\x80-\U0010ffff" if replace_non_ascii else "")
+            run = f"(?=[{first}])(?:{run})"
+        self._run_re = re.compile(run)
+
+    def _rewrite(self, run: str) -> str:
+        """Replacement for one run of whitespace / dropped text / junk."""
+        replacement = self._rewrites.get(run)
+        if replacement is None:
+            replacement = self._compute_rewrite(run)
+            if len(self._rewrites) < MAX_CACHED_REWRITES:
+                self._rewrites[run] = replacement
+        return replacement
+
+    def _compute_rewrite(self, run: str) -> str:
+        width, single = 0, ""
+        for match in self._piece_re.finditer(run):
+            kind = match.lastgroup
+            if kind == "drop":
+                continue
+            if kind == "junk":
+                width, single = width + 1, " "
+                continue
+            piece = match.group()
+            if self.keep_single_whitespace:
+                # Consecutive line breaks collapse to one before runs are measured
+                piece = _NEWLINES_RE.sub("\n", piece.replace("\r", "\n"))
+            width, single = width + len(piece), piece
+        if width == 0:
+            return ""
+        if width == 1 and self.keep_single_whitespace:
+            return single
+        return " "
+
+    def _lower_segment(self, segment: str, start: int, offsets: Optional[List[int]]) -> str:
+        lowered = segment.lower()
+        if offsets is not None:
+            if len(lowered) == len(segment):
+                offsets.extend(range(start, start + len(segment)))
+            else:
+                # A few characters lowercase to more than one character
+                for index, char in enumerate(segment):
+                    offsets.extend([start + index] * len(char.lower()))
+        return lowered
+
+    def _run(self, text: str, offsets: Optional[List[int]]) -> str:
+        parts = []
+        position = 0
+        for match in self._run_re.finditer(text):
+            start, end = match.span()
+            if start > position:
+                segment = text[position:start]
+                if self.lowercase:
+                    segment = self._lower_segment(segment, position, offsets)
+                elif offsets is not None:
+                    offsets.extend(range(position, start))
+                parts.append(segment)
+            replacement = self._rewrite(match.group())
+            if replacement:
+                parts.append(replacement)
+                if offsets is not None:
+                    offsets.extend([start] * len(replacement))
+            position = end
+        if position < len(text):
+            segment = text[position:]
+            if self.lowercase:
+                segment = self._lower_segment(segment, position, offsets)
+            elif offsets is not None:
+                offsets.extend(range(position, len(text)))
+            parts.append(segment)
+        return "".join(parts)
+
+    def normalize(self, text: str) -> str:
+        if not text:
+            return ""
+        if self._split_only:
+            return " ".join((text.lower() if self.lowercase else text).split())
+        if self.lowercase:
+            text = text.lower()
+        return self._run_re.sub(lambda match: self._rewrite(match.group()), text).strip()
+
+    def normalize_with_offsets(self, text: str) -> NormalizedText:
+        if not text:
+            return NormalizedText("", [0])
+        offsets: List[int] = []
+        normalized = self._run(text, offsets)
+        stripped = normalized.strip()
+        if len(stripped) != len(normalized):
+            lead = len(normalized) - len(normalized.lstrip())
+            offsets = offsets[lead:lead + len(stripped)]
+        offsets.append(len(text))
+        return NormalizedText(stripped, offsets)
+
+
+OCR_CLEANER = TextNormalizer(
+    drop=r"(?i:Page\s*\d+)|\d+\s*/\s*\d+",
+    drop_first_chars=r"\dPp",
+    replace_non_ascii=True,
+    keep_single_whitespace=True,
+)
+
+MATCH_NORMALIZER = TextNormalizer(lowercase=True)
@@ -0,0 +1,60 @@
+# app/utils/tile_cache.py
+import os
+import threading
+from typing import Optional
+
+from .config import TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES
+
+_lock = threading.Lock()
+
+
+def get_cached_tile(name: str) -> Optional[str]:
+    """
+    Return the path of a cached tile, or None if it is not cached.
+    A hit refreshes the file's mtime so eviction stays least-recently-used.
+    """
+    path = os.path.join(TILE_CACHE_DIR, name)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store_tile(name: str, data: bytes) -> str:
+    """Write a rendered tile into the cache and evict old tiles beyond the size budget."""
+    os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+    path = os.path.join(TILE_CACHE_DIR, name)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    evict_tiles(keep=name)
+    return path
+
+
+def evict_tiles(max_bytes: Optional[int] = None, keep: Optional[str] = None) -> int:
+    """Delete least-recently-used tiles until the cache fits max_bytes. Returns bytes freed."""
+    if max_bytes is None:
+        max_bytes = TILE_CACHE_MAX_BYTES
+    with _lock:
+        try:
+            entries = [e for e in os.scandir(TILE_CACHE_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+        except FileNotFoundError:
+            return 0
+
+        stats = [(e.stat().st_mtime_ns, e.stat().st_size, e.path, e.name) for e in entries]
+        total = sum(size for _, size, _, _ in stats)
+        freed = 0
+        for _, size, path, name in sorted(stats):
+            if total <= max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            freed += size
+        return freed
@@ -0,0 +1,205 @@
+"""
+End-to-end /pdf/extract-and-format benchmark.
+
+Uploads each PDF through the real endpoint with the synthetic LLM provider
+(LLM_PROVIDER=synthetic, deterministic, no network) and reports per-stage
+wall time, peak RSS, LLM calls and prompt characters. Documents are the
+PDFs in uploads/ plus synthetic ones of --pages pages built by repeating
+them.
+
+Each document runs in its own process and working directory (fresh
+jobs.json, index and uploads), twice:
+- "new": first upload (ingest, text extraction, LLM, parse, persist)
+- "refill": same file again, which re-asks the LLM for the null fields
+  and merges them into the stored result
+
+Stage times come from timing wrappers around the endpoint's
+collaborators; "other" is the rest of the request.
+
+    python -m benchmarks.bench_extract --pages 1000 2000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STAGES = ("ingest", "extract", "llm", "parse", "persist")
+
+
+def build_scaled_pdf(sources, pages: int, output: str):
+    """Repeat the source PDFs until the document has the given number of pages."""
+    import fitz
+
+    doc = fitz.open()
+    try:
+        while len(doc) < pages:
+            for source in sources:
+                with fitz.open(source) as src:
+                    needed = pages - len(doc)
+                    doc.insert_pdf(src, to_page=min(len(src), needed) - 1)
+                if len(doc) >= pages:
+                    break
+        doc.save(output, garbage=1, deflate=True)
+    finally:
+        doc.close()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_child(pdf_path: str):
+    """Upload one PDF twice in this process and return the measurements."""
+    sys.path.insert(0, BACKEND_DIR)
+    from fastapi.testclient import TestClient
+    import app.api.pdf_extract as pdf_extract
+    from app.utils import llm
+    from main import app
+
+    timings = {}
+
+    @contextmanager
+    def stage(name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def timed(name, func):
+        if hasattr(func, "__code__") and func.__code__.co_flags & 0x80:  # coroutine function
+            async def wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with stage(name):
+                    return func(*args, **kwargs)
+        return wrapper
+
+    pool_checkout = pdf_extract.document_pool.checkout
+
+    @contextmanager
+    def timed_checkout(*args, **kwargs):
+        with stage("extract"), pool_checkout(*args, **kwargs) as doc:
+            yield doc
+
+    pdf_extract.save_file_permanent = timed("ingest", pdf_extract.save_file_permanent)
+    pdf_extract.save_jobs_to_file = timed("persist", pdf_extract.save_jobs_to_file)
+    pdf_extract.safe_json_parse = timed("parse", pdf_extract.safe_json_parse)
+    pdf_extract.document_pool.checkout = timed_checkout
+    llm.generate = timed("llm", llm.generate)
+
+    client = TestClient(app)
+    with open(pdf_path, "rb") as f:
+        content = f.read()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    runs = []
+    for label in ("new", "refill"):
+        timings.clear()
+        calls, prompt_chars = llm.calls, llm.prompt_chars
+        started = time.perf_counter()
+        response = client.post(
+            "/pdf/extract-and-format/",
+            files={"file": (os.path.basename(pdf_path), content, "application/pdf")},
+        )
+        total_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise SystemExit(f"{label}: HTTP {response.status_code} {response.text[:200]}")
+        stages = {name: round(timings.get(name, 0.0), 1) for name in STAGES}
+        stages["other"] = round(total_ms - sum(stages.values()), 1)
+        runs.append({
+            "run": label,
+            "total_ms": round(total_ms, 1),
+            "stages_ms": stages,
+            "llm_calls": llm.calls - calls,
+            "prompt_chars": llm.prompt_chars - prompt_chars,
+        })
+
+    return {
+        "pages": len(response.json()["pages"]),
+        "file_mb": round(len(content) / 1024 / 1024, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024, 1),
+        "runs": runs,
+    }
+
+
+def run_document(pdf_path: str, llm_latency_ms: float):
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "LLM_PROVIDER": "synthetic",
+            "LLM_SYNTHETIC_LATENCY_MS": str(llm_latency_ms),
+            "TILE_CACHE_DIR": os.path.join(workdir, "tiles"),
+        }
+        out = subprocess.run(
+            [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "bench_extract.py"), "--child", os.path.abspath(pdf_path)],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            raise SystemExit(f"{pdf_path} failed:\n{out.stderr[-2000:]}")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=os.path.join(BACKEND_DIR, "uploads"))
+    parser.add_argument("--pages", type=int, nargs="*", default=[1000], help="sizes of the synthetic documents")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child)))
+        return
+
+    sources = sorted(
+        os.path.join(args.uploads, name) for name in os.listdir(args.uploads)
+        if name.endswith(".pdf") and "_highlighted" not in name
+    )
+    if not sources:
+        raise SystemExit(f"No PDFs found in {args.uploads}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        documents = [(os.path.basename(path), path) for path in sources]
+        for pages in args.pages:
+            scaled = os.path.join(tmp, f"synthetic-{pages}-pages.pdf")
+            build_scaled_pdf(sources, pages, scaled)
+            documents.append((os.path.basename(scaled), scaled))
+
+        for name, path in documents:
+            result = {"document": name, **run_document(path, args.llm_latency_ms)}
+            results.append(result)
+            for run in result["runs"]:
+                stages = " ".join(f"{k}={v}" for k, v in run["stages_ms"].items())
+                print(
+                    f"{name} pages={result['pages']} run={run['run']} total_ms={run['total_ms']} {stages} "
+                    f"llm_calls={run['llm_calls']} prompt_chars={run['prompt_chars']} "
+                    f"peak_rss_mb={result['peak_rss_mb']}",
+                    flush=True,
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"revision": git_revision(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Field query benchmark.
+
+Indexes synthetic jobs whose results are sampled from the results stored in
+jobs.json (no page texts, so only the field table is exercised) and reports
+query latency percentiles for typical /pdf/fields queries.
+
+    python -m benchmarks.bench_fields --docs 1000 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.job_index import query_fields, sync_job_index  # noqa: E402
+from benchmarks.bench_search import percentile  # noqa: E402
+
+QUERIES = [
+    ([(None, "governing_law", "english")], None),
+    ([(None, "governing_law", "english"), (None, "equity_cure_provision", "*")], None),
+    ([("general", None, None)], None),
+    ([], [(None, "borrower"), (None, "agent"), ("dates", "agreement_date")]),
+    ([(None, "borrower", "*bank*")], [(None, "governing_law")]),
+]
+
+
+def load_sample_results(job_file: str):
+    with open(job_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    results = [job["result"] for job in jobs.values() if isinstance(job.get("result"), dict)]
+    if not results:
+        raise SystemExit(f"No job results found in {job_file}")
+    return results
+
+
+def make_jobs(sample_results, docs: int, seed: int = 7):
+    rng = random.Random(seed)
+    laws = ["English law", "the laws of Ontario", "New York law", "the laws of Scotland"]
+    jobs = {}
+    for n in range(docs):
+        result = json.loads(json.dumps(rng.choice(sample_results)))
+        result.setdefault("general", {})["governing_law"] = {"value": rng.choice(laws), "page_number": 90}
+        jobs[f"bench-{n}"] = {
+            "status": "completed",
+            "filename": f"agreement-{n}.pdf",
+            "updated_at": "bench",
+            "result": result,
+        }
+    return jobs
+
+
+def run(docs: int, sample_results, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.index.db")
+        jobs = make_jobs(sample_results, docs)
+
+        started = time.perf_counter()
+        sync_job_index(jobs, db_path)
+        index_seconds = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(repeat):
+            for conditions, select in QUERIES:
+                started = time.perf_counter()
+                query_fields(db_path, conditions, select=select, limit=100)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "docs": docs,
+            "index_s": round(index_seconds, 3),
+            "query_p50_ms": round(statistics.median(latencies), 2),
+            "query_p95_ms": round(percentile(latencies, 95), 2),
+            "query_max_ms": round(max(latencies), 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs-file", default="jobs.json")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    sample_results = load_sample_results(args.jobs_file)
+    results = []
+    for docs in args.docs:
+        result = run(docs, sample_results, args.repeat)
+        results.append(result)
+        print(" ".join(f"{k}={v}" for k, v in result.items()), flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
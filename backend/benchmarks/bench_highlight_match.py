@@ -0,0 +1,140 @@
+"""
+Highlight block matching benchmark.
+
+For every page of a PDF, takes a passage from the page text (as the LLM
+returns it) plus a reworded copy, and times find_phrase_coords_from_ai
+against the per-block matcher it replaced. Also reports how many pages
+resolve to a superset of the old blocks (passages spanning several blocks
+are now matched as a whole).
+
+    python -m benchmarks.bench_highlight_match --pdf uploads/Senior-Facilities-Agreement-Ares-Management-Limited-1.pdf
+"""
+
+import argparse
+import difflib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # noqa: E402
+
+from app.api.pdf_highlight import find_phrase_coords_from_ai  # noqa: E402
+from app.utils import MATCH_NORMALIZER  # noqa: E402
+
+
+def legacy_find_phrase_coords(page, ai_passage: str, query: str, threshold: float = 0.6):
+    """The per-block matcher before the single-pass normalizer, kept for comparison."""
+    def normalize(text):
+        return " ".join(text.lower().split())
+
+    blocks = page.get_text("blocks")
+    ai_norm = normalize(ai_passage)
+    query_norm = normalize(query)
+    matched_coords = []
+    for b in blocks:
+        if len(b) < 5:
+            continue
+        block_norm = normalize(b[4])
+        score = difflib.SequenceMatcher(None, ai_norm, block_norm).ratio()
+        if score > threshold or ai_norm in block_norm or block_norm in ai_norm:
+            matched_coords.append((b[0], b[1], b[2], b[3]))
+    if not matched_coords:
+        for b in blocks:
+            if len(b) < 5:
+                continue
+            if query_norm and query_norm in normalize(b[4]):
+                matched_coords.append((b[0], b[1], b[2], b[3]))
+    if not matched_coords:
+        return None
+    return sorted(matched_coords, key=lambda r: (r[1], r[0]))
+
+
+def make_cases(doc, passage_chars: int, seed: int = 7):
+    rng = random.Random(seed)
+    cases = []
+    for page in doc:
+        words = page.get_text("text").split()
+        if len(words) < 12:
+            continue
+        passage_words = max(8, passage_chars // 6)
+        start = rng.randrange(max(1, len(words) - passage_words))
+        passage = words[start:start + passage_words]
+        reworded = [w for i, w in enumerate(passage) if i % 7 != 3]
+        query = " ".join(passage[:4])
+        cases.append((page.number, " ".join(passage), query))
+        cases.append((page.number, " ".join(reworded), query))
+    return cases
+
+
+def time_matcher(doc, cases, matcher):
+    latencies, results = [], []
+    for page_number, passage, query in cases:
+        page = doc[page_number]
+        page.get_text("blocks")  # text extraction is cached per page; time only the matching
+        started = time.perf_counter()
+        results.append(matcher(page, passage, query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", default="uploads/Senior-Facilities-Agreement-Ares-Management-Limited-1.pdf")
+    parser.add_argument("--passage-chars", type=int, default=300)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    doc = fitz.open(args.pdf)
+    try:
+        cases = make_cases(doc, args.passage_chars)
+        texts = [page.get_text("text") for page in doc]
+
+        started = time.perf_counter()
+        for text in texts:
+            " ".join(text.lower().split())
+        split_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for text in texts:
+            MATCH_NORMALIZER.normalize_with_offsets(text)
+        offsets_ms = (time.perf_counter() - started) * 1000
+
+        old_ms, old_results = time_matcher(doc, cases, legacy_find_phrase_coords)
+        new_ms, new_results = time_matcher(doc, cases, find_phrase_coords_from_ai)
+    finally:
+        doc.close()
+
+    same = superset = other = 0
+    for old, new in zip(old_results, new_results):
+        if old == new:
+            same += 1
+        elif set(old or []) <= set(new or []):
+            superset += 1
+        else:
+            other += 1
+
+    result = {
+        "pages": len(texts),
+        "cases": len(cases),
+        "normalize_split_ms": round(split_ms, 1),
+        "normalize_offsets_ms": round(offsets_ms, 1),
+        "old_match_p50_ms": round(statistics.median(old_ms), 3),
+        "new_match_p50_ms": round(statistics.median(new_ms), 3),
+        "old_match_total_ms": round(sum(old_ms), 1),
+        "new_match_total_ms": round(sum(new_ms), 1),
+        "same_blocks": same,
+        "more_blocks": superset,
+        "different_blocks": other,
+    }
+    print(" ".join(f"{k}={v}" for k, v in result.items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
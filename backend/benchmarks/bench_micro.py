@@ -0,0 +1,161 @@
+"""
+Microbenchmarks for the extraction and highlight hot paths, with
+regression budgets.
+
+Fixtures come from the completed jobs in jobs.json: the stored result is
+scanned for null fields, its field values are located again on their
+pages of the uploaded PDF, and the raw page text of that PDF is
+normalized for matching.
+
+Each case reports its best time per item over several rounds. Budgets
+are in calibration units (cu): the best time of a fixed pure-Python
+workload measured in the same run, so they hold on faster or slower
+machines. A case over budget is reported as "slow" and the script exits
+with status 1. Budgets sit at about twice the times measured when they
+were set; lower them when a change makes a case faster.
+
+    python -m benchmarks.bench_micro
+    python -m benchmarks.bench_micro --filter highlight --output micro.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # noqa: E402
+
+from app.api.pdf_extract import find_null_fields  # noqa: E402
+from app.api.pdf_highlight import (  # noqa: E402
+    LOCAL_MATCH_SLACK,
+    find_passage_coords_locally,
+    find_phrase_coords_from_ai,
+    load_page_words,
+    normalize_text,
+)
+from app.utils import MATCH_NORMALIZER  # noqa: E402
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], Any]
+    items: int  # items handled by one call of func; times are reported per item
+    budget_cu: float
+
+
+def calibration_workload():
+    """Fixed dict / string work in the style of the code under test."""
+    rows = [{"value": str(i), "page_number": i} for i in range(200)]
+    return "|".join(row["value"] for row in rows if row["page_number"] % 3)
+
+
+def measure(func: Callable[[], Any], repeat: int = 7, min_round_s: float = 0.02) -> float:
+    """Seconds per call: best of repeat rounds of at least min_round_s each."""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_round_s:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def local_path(file_path: str, uploads: str) -> str:
+    # Stored paths may use Windows separators
+    return os.path.join(uploads, os.path.basename(file_path.replace("\\", "/")))
+
+
+def load_fixture(job_file: str, uploads: str) -> Dict[str, Any]:
+    """The first completed job with a result whose PDF is in uploads/."""
+    with open(job_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    for job in jobs.values():
+        if job.get("status") != "completed" or not isinstance(job.get("result"), dict):
+            continue
+        pdf_path = local_path(job.get("file_path") or job["filename"], uploads)
+        if os.path.exists(pdf_path):
+            return {"filename": job["filename"], "result": job["result"], "pdf_path": pdf_path}
+    raise SystemExit(f"No completed job in {job_file} with its PDF in {uploads}")
+
+
+def build_cases(fixture: Dict[str, Any]) -> Tuple[List[Case], fitz.Document]:
+    doc = fitz.open(fixture["pdf_path"])
+    raw_pages = [page.get_text("text") for page in doc]
+
+    located = []
+    for section in fixture["result"].values():
+        for obj in (section or {}).values():
+            if isinstance(obj, dict) and obj.get("value") and isinstance(obj.get("page_number"), int):
+                if 1 <= obj["page_number"] <= len(doc):
+                    page = doc[obj["page_number"] - 1]
+                    page.get_text("blocks")
+                    located.append((page, str(obj["value"]), " ".join(str(obj["value"]).split()[:4])))
+    if not located:
+        raise SystemExit(f"No stored values to locate in {fixture['filename']}")
+
+    words = {page.number: load_page_words(page) for page, _, _ in located}
+    local = [(page, passage, LOCAL_MATCH_SLACK, words[page.number]) for page, passage, _ in located]
+    result = fixture["result"]
+
+    def run_each(func, args_list):
+        def run():
+            for args in args_list:
+                func(*args)
+        return run
+
+    return [
+        Case("pdf_extract.find_null_fields", lambda: find_null_fields(result), 1, 2.5),
+        Case("pdf_highlight.normalize_text", run_each(normalize_text, [(t,) for t in raw_pages]), len(raw_pages), 1.6),
+        Case("text_normalizer.normalize_with_offsets", run_each(MATCH_NORMALIZER.normalize_with_offsets, [(t,) for t in raw_pages]), len(raw_pages), 6.5),
+        Case("pdf_highlight.find_phrase_coords_from_ai", run_each(find_phrase_coords_from_ai, located), len(located), 120.0),
+        Case("pdf_highlight.find_passage_coords_locally", run_each(find_passage_coords_locally, local), len(local), 5.0),
+    ], doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", default="jobs.json")
+    parser.add_argument("--uploads", default="uploads")
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.jobs, args.uploads)
+    cases, doc = build_cases(fixture)
+    try:
+        calibration_s = measure(calibration_workload, args.repeat)
+        print(f"fixture={fixture['filename']} calibration_us={calibration_s * 1e6:.1f}", flush=True)
+
+        results, slow = [], []
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            per_item_s = measure(case.func, args.repeat) / case.items
+            units = per_item_s / calibration_s
+            status = "ok" if units <= case.budget_cu else "slow"
+            if status == "slow":
+                slow.append(case.name)
+            results.append({
+                "case": case.name,
+                "items": case.items,
+                "us_per_item": round(per_item_s * 1e6, 3),
+                "cu_per_item": round(units, 4),
+                "budget_cu": case.budget_cu,
+                "status": status,
+            })
+            print(" ".join(f"{k}={v}" for k, v in results[-1].items()), flush=True)
+    finally:
+        doc.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"calibration_us": round(calibration_s * 1e6, 3), "results": results}, f, indent=2)
+    if slow:
+        raise SystemExit(f"Over budget: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
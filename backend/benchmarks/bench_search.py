@@ -0,0 +1,118 @@
+"""
+Full-text search benchmark.
+
+Builds job indexes of increasing size from the page texts stored in
+jobs.json (sampled into synthetic agreements) and reports indexing time
+and query latency percentiles.
+
+    python -m benchmarks.bench_search --docs 100 1000 5000 --pages-per-doc 50
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.job_index import search_pages, sync_job_index  # noqa: E402
+
+QUERIES = [
+    '"snooze and lose"',
+    "equity cure",
+    "governing law english",
+    '"material adverse effect"',
+    "interest cover ratio",
+    "permitted disposal",
+    "lender",
+]
+
+
+def load_sample_pages(job_file: str):
+    with open(job_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    pages = [text for job in jobs.values() for text in (job.get("pages") or {}).values() if text]
+    if not pages:
+        raise SystemExit(f"No page texts found in {job_file}")
+    return pages
+
+
+def make_jobs(sample_pages, docs: int, pages_per_doc: int, seed: int = 7):
+    rng = random.Random(seed)
+    jobs = {}
+    for n in range(docs):
+        pages = rng.sample(sample_pages, min(pages_per_doc, len(sample_pages)))
+        jobs[f"bench-{n}"] = {
+            "status": "completed",
+            "filename": f"agreement-{n}.pdf",
+            "updated_at": "bench",
+            "pages": {str(i + 1): text for i, text in enumerate(pages)},
+        }
+    return jobs
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(docs: int, pages_per_doc: int, sample_pages, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.index.db")
+        jobs = make_jobs(sample_pages, docs, pages_per_doc)
+
+        started = time.perf_counter()
+        sync_job_index(jobs, db_path)
+        index_seconds = time.perf_counter() - started
+
+        # An unchanged re-sync (what every save_jobs_to_file costs) should be cheap
+        started = time.perf_counter()
+        sync_job_index(jobs, db_path)
+        resync_seconds = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                started = time.perf_counter()
+                search_pages(db_path, query, limit=20)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "docs": docs,
+            "pages": docs * pages_per_doc,
+            "index_s": round(index_seconds, 3),
+            "resync_ms": round(resync_seconds * 1000, 2),
+            "db_mb": round(os.path.getsize(db_path) / 1024 / 1024, 1),
+            "query_p50_ms": round(statistics.median(latencies), 2),
+            "query_p95_ms": round(percentile(latencies, 95), 2),
+            "query_max_ms": round(max(latencies), 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--pages-per-doc", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs-file", default="jobs.json")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    sample_pages = load_sample_pages(args.jobs_file)
+    results = []
+    for docs in args.docs:
+        result = run(docs, args.pages_per_doc, sample_pages, args.repeat)
+        results.append(result)
+        print(" ".join(f"{k}={v}" for k, v in result.items()), flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
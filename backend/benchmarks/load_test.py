@@ -0,0 +1,268 @@
+"""
+API load test against a locally started app with the synthetic LLM.
+
+Starts one uvicorn worker in a fresh working directory (empty jobs.json,
+index and uploads) with LLM_PROVIDER=synthetic, seeds it by uploading the
+PDFs in uploads/, then lets --users virtual users send requests for
+--duration seconds each. Every user picks its next request from the
+--mix weights and sends it as soon as the previous one has answered:
+
+- extract:   POST /pdf/extract-and-format/ (a new job under a new file
+             name, or with --repeat-uploads the seeded file again)
+- status:    GET /pdf/status
+- job:       GET /pdf/jobs/{id} of a seeded job
+- highlight: GET /pdf/highlight/ for a stored field value of a seeded job
+
+Reports per endpoint and in total: requests, throughput, p50/p95/p99/max
+latency, error rate (HTTP status >= 500 or no response) and the share of
+4xx answers (e.g. a highlight whose passage is not found). Several
+--users levels are run one after the other against the same server, so
+the level where latency collapses shows up in one run.
+
+    python -m benchmarks.load_test --users 1 4 16 64 --duration 20 --llm-latency-ms 800
+    python -m benchmarks.load_test --mix extract=0,status=5,job=5,highlight=1 --output load.json
+    python -m benchmarks.load_test --url http://127.0.0.1:8000   # an app that is already running
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENDPOINTS = ("extract", "status", "job", "highlight")
+DEFAULT_MIX = "extract=1,status=4,job=4,highlight=2"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS or not weight:
+            raise SystemExit(f"Invalid --mix entry {part!r} (use {', '.join(ENDPOINTS)} with =weight)")
+        mix[name.strip()] = float(weight)
+    if not any(mix.values()):
+        raise SystemExit("--mix needs at least one positive weight")
+    return mix
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: str, port: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "synthetic",
+        "LLM_SYNTHETIC_LATENCY_MS": str(args.llm_latency_ms),
+        "LLM_SYNTHETIC_LATENCY_PER_KCHAR_MS": str(args.llm_latency_per_kchar_ms),
+        "LLM_SYNTHETIC_ERROR_RATE": str(args.llm_error_rate),
+        "TILE_CACHE_DIR": os.path.join(workdir, "tiles"),
+    }
+    os.makedirs(os.path.join(workdir, "uploads", "temp"), exist_ok=True)
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+            "--host", "127.0.0.1", "--port", str(port), "--workers", "1", "--log-level", "warning",
+        ],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: Optional[subprocess.Popen], timeout_s: float = 60.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"The server exited with status {server.returncode}")
+        try:
+            if (await client.get("/pdf/status", params={"limit": 1})).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"The server did not answer within {timeout_s:.0f} s")
+
+
+async def upload(client: httpx.AsyncClient, filename: str, content: bytes) -> httpx.Response:
+    return await client.post(
+        "/pdf/extract-and-format/",
+        files={"file": (filename, content, "application/pdf")},
+    )
+
+
+async def seed(client: httpx.AsyncClient, documents: List[Tuple[str, bytes]]):
+    """Upload each document once; return the job ids and (job_id, page, value) highlight targets."""
+    job_ids, targets = [], []
+    for filename, content in documents:
+        response = await upload(client, filename, content)
+        if response.status_code != 200:
+            raise SystemExit(f"Seeding {filename} failed: HTTP {response.status_code} {response.text[:200]}")
+        job_id = response.json()["job_id"]
+        job_ids.append(job_id)
+        job = (await client.get(f"/pdf/jobs/{job_id}", params={"include_pages": "false"})).json()
+        for fields in (job.get("result") or {}).values():
+            for obj in (fields or {}).values():
+                if isinstance(obj, dict) and obj.get("value") and isinstance(obj.get("page_number"), int):
+                    targets.append((job_id, obj["page_number"], obj["value"]))
+    return job_ids, targets
+
+
+class LoadRun:
+    """Virtual users sending the request mix for a fixed time; collects (endpoint, status, seconds) samples."""
+
+    def __init__(self, client, mix, documents, job_ids, targets, repeat_uploads: bool, seed: int):
+        self.client = client
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.documents = documents
+        self.job_ids = job_ids
+        self.targets = targets
+        self.repeat_uploads = repeat_uploads
+        self.rng = random.Random(seed)
+        self.uploads = 0
+        self.samples: List[Tuple[str, int, float]] = []  # status 0: no response
+
+    def request(self, name: str):
+        if name == "extract":
+            filename, content = self.rng.choice(self.documents)
+            if not self.repeat_uploads:
+                self.uploads += 1
+                filename = f"load-{self.uploads}-{filename}"
+            return upload(self.client, filename, content)
+        if name == "status":
+            return self.client.get("/pdf/status")
+        if name == "job":
+            return self.client.get(f"/pdf/jobs/{self.rng.choice(self.job_ids)}")
+        job_id, page_number, value = self.rng.choice(self.targets)
+        return self.client.get(
+            "/pdf/highlight/",
+            params={"job_id": job_id, "page_number": page_number, "query": value, "mode": "local"},
+        )
+
+    async def user(self, deadline: float):
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                status = (await self.request(name)).status_code
+            except httpx.HTTPError:
+                status = 0
+            self.samples.append((name, status, time.perf_counter() - started))
+
+    async def run(self, users: int, duration_s: float) -> Dict[str, Any]:
+        self.samples = []
+        started = time.perf_counter()
+        await asyncio.gather(*(self.user(started + duration_s) for _ in range(users)))
+        elapsed = time.perf_counter() - started
+
+        report = {"users": users, "duration_s": round(elapsed, 2), "endpoints": {}}
+        groups = {name: [s for s in self.samples if s[0] == name] for name in self.names}
+        groups["total"] = self.samples
+        for name, samples in groups.items():
+            if not samples:
+                continue
+            latencies = [seconds * 1000 for _, _, seconds in samples]
+            errors = sum(1 for _, status, _ in samples if status == 0 or status >= 500)
+            rejected = sum(1 for _, status, _ in samples if 400 <= status < 500)
+            report["endpoints"][name] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+                "max_ms": round(max(latencies), 1),
+                "error_rate": round(errors / len(samples), 4),
+                "4xx_rate": round(rejected / len(samples), 4),
+            }
+        return report
+
+
+async def main_async(args):
+    mix = parse_mix(args.mix)
+    sources = sorted(
+        os.path.join(args.uploads, name) for name in os.listdir(args.uploads)
+        if name.endswith(".pdf") and "_highlighted" not in name
+    )
+    if not sources:
+        raise SystemExit(f"No PDFs found in {args.uploads}")
+    documents = []
+    for path in sources:
+        with open(path, "rb") as f:
+            documents.append((os.path.basename(path), f.read()))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            port = free_port()
+            server = start_server(workdir, port, args)
+            base_url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=max(args.users), max_keepalive_connections=max(args.users))
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+                await wait_until_ready(client, server)
+                job_ids, targets = await seed(client, documents)
+                if mix.get("highlight") and not targets:
+                    raise SystemExit("The seeded jobs have no located field values to highlight")
+                print(f"url={base_url} documents={len(documents)} highlight_targets={len(targets)}", flush=True)
+
+                load = LoadRun(client, mix, documents, job_ids, targets, args.repeat_uploads, args.seed)
+                reports = []
+                for users in args.users:
+                    report = await load.run(users, args.duration)
+                    reports.append(report)
+                    for name, stats in report["endpoints"].items():
+                        print(
+                            f"users={users} endpoint={name} " + " ".join(f"{k}={v}" for k, v in stats.items()),
+                            flush=True,
+                        )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "mix": mix,
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_error_rate": args.llm_error_rate,
+                "runs": reports,
+            }, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", default=os.path.join(BACKEND_DIR, "uploads"))
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16], help="concurrent virtual users, one run per level")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="request weights per endpoint")
+    parser.add_argument("--repeat-uploads", action="store_true", help="upload the seeded files again instead of new ones")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-latency-per-kchar-ms", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--url", help="load an app that is already running instead of starting one")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a request counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
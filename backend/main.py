@@ -4,7 +4,7 @@ from fastapi import FastAPI
 from dotenv import load_dotenv
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import authentication, pdf_extract, pdf_highlight, pdf_status
+from app.api import authentication, metrics, pdf_extract, pdf_highlight, pdf_pages, pdf_profile, pdf_search, pdf_status
 
 # Load environment variables
 load_dotenv(dotenv_path=".env")
@@ -31,7 +31,10 @@ app = FastAPI(
     openapi_tags=[
         {"name": "PDF Extraction", "description": "Extract and format content from PDFs"},
         {"name": "PDF Highlight", "description": "Highlight text in PDF files"},
+        {"name": "PDF Pages", "description": "Serve single pages, page ranges and rendered tiles"},
+        {"name": "PDF Search", "description": "Full-text search across processed agreements"},
         {"name": "PDF Status", "description": "Check status of PDF extraction jobs"},
+        {"name": "Monitoring", "description": "Prometheus metrics and request profiles of the extraction pipeline"},
     ],
     components={   # ✅ fixed: previously openapi_components
         "securitySchemes": security_scheme
@@ -58,7 +61,11 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 # Register PDF routes
 app.include_router(pdf_extract.router, prefix="/pdf", tags=["PDF Extraction"])
 app.include_router(pdf_highlight.router, prefix="/pdf", tags=["PDF Highlight"])
+app.include_router(pdf_pages.router, prefix="/pdf", tags=["PDF Pages"])
+app.include_router(pdf_search.router, prefix="/pdf", tags=["PDF Search"])
 app.include_router(pdf_status.router, prefix="/pdf", tags=["PDF Status"])
+app.include_router(pdf_profile.router, prefix="/pdf", tags=["Monitoring"])
+app.include_router(metrics.router, tags=["Monitoring"])
 
 if __name__ == "__main__":
     PORT = int(os.getenv("PORT", 8000))
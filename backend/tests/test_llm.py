@@ -0,0 +1,65 @@
+import json
+import pytest
+from app.utils.llm import CassetteProvider, GeminiProvider, LLMError, SyntheticProvider, schema_from_prompt
+from app.utils.schema_prompt import compile_schema
+
+FORMAT_INSTRUCTIONS = compile_schema().text
+
+def _prompt(pages):
+    text = "\n".join(f"--- PAGE {n} ---\n{body}" for n, body in pages.items())
+    return f"Return ONLY valid JSON.\n{FORMAT_INSTRUCTIONS}\nDocument text with page numbers:\n{text}"
+
+def test_schema_is_read_from_format_instructions():
+    schema = schema_from_prompt(f"Intro\n{FORMAT_INSTRUCTIONS}\nDocument text:\nBorrower: Acme")
+    assert "governing_law" in schema["miscellaneous"]
+    assert "agreement_date" in schema["dates"]
+    assert "Borrower" not in schema
+
+def test_schema_is_read_from_quoted_instructions():
+    instructions = "{ 'dates': {  'agreement_date': { 'value': str, 'page_number': int } } }"
+    assert schema_from_prompt(instructions) == {"dates": ["agreement_date"]}
+
+def test_synthetic_answers_in_schema_shape():
+    provider = SyntheticProvider(fill_ratio=1.0)
+    prompt = _prompt({1: "This Agreement is dated 18 April 2017 between the parties.", 2: "Governed by English law."})
+    result = json.loads(provider.generate(prompt))
+    field = result["miscellaneous"]["governing_law"]
+    assert field["page_number"] in (1, 2)
+    assert field["value"]
+    assert provider.generate(prompt) == provider.generate(prompt)
+    assert provider.stats()["calls"] == 3
+
+def test_synthetic_error_rate():
+    provider = SyntheticProvider(error_rate=1.0)
+    with pytest.raises(LLMError):
+        provider.generate("anything")
+    assert provider.stats()["errors"] == 1
+
+def test_cassette_records_and_replays(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = CassetteProvider(path, inner=SyntheticProvider(fill_ratio=0.5), record=True)
+    prompt = _prompt({1: "The Borrower shall repay each Loan on the Termination Date."})
+    recorded = recorder.generate(prompt)
+
+    replay = CassetteProvider(path)
+    assert replay.generate(prompt) == recorded
+    with pytest.raises(LLMError):
+        replay.generate("a prompt that was never recorded")
+
+def test_recorded_calls_are_counted_once(tmp_path):
+    from app.utils.metrics import LLM_PROMPT_TOKENS, LLM_REQUEST_SECONDS
+
+    inner = SyntheticProvider()
+    recorder = CassetteProvider(str(tmp_path / "llm.jsonl"), inner=inner, record=True)
+    requests = lambda: LLM_REQUEST_SECONDS.count(provider="cassette", outcome="ok") + LLM_REQUEST_SECONDS.count(provider="synthetic", outcome="ok")
+    before, tokens = requests(), LLM_PROMPT_TOKENS.value(provider="synthetic")
+    recorder.generate("a" * 400)
+
+    assert requests() - before == 1
+    assert LLM_PROMPT_TOKENS.value(provider="synthetic") == tokens
+    assert inner.calls == 0
+
+def test_gemini_key_is_only_needed_on_first_call():
+    provider = GeminiProvider(None)
+    with pytest.raises(LLMError):
+        provider.generate("hello")
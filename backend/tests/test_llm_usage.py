@@ -0,0 +1,129 @@
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+import app.api.pdf_extract as pdf_extract
+from app.utils import CassetteProvider, SyntheticProvider
+from app.utils.llm_usage import LLMUsageLedger, llm_stage, merge_usage, track_llm_usage
+
+client = TestClient(app)
+
+def _pdf_bytes():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "This Agreement is governed by English law.")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads" / "temp").mkdir(parents=True)
+    monkeypatch.setattr("app.utils.jobs.job_file", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr(pdf_extract, "processing_jobs", {})
+    monkeypatch.setattr(pdf_extract, "llm", SyntheticProvider(fill_ratio=1.0))
+    return tmp_path
+
+def test_calls_are_recorded_by_stage():
+    provider = SyntheticProvider(responder=lambda prompt: "x" * 40)
+    provider.generate("not tracked")
+    with track_llm_usage() as usage:
+        with llm_stage("extraction"):
+            provider.generate("a" * 400)
+        with llm_stage("highlight"):
+            provider.generate("b" * 40)
+            provider.generate("c" * 40)
+
+    totals = usage.totals()
+    assert totals["calls"] == 3
+    assert totals["prompt_tokens"] == 120
+    assert totals["response_tokens"] == 30
+    assert totals["by_stage"]["extraction"]["calls"] == 1
+    assert totals["by_stage"]["highlight"]["calls"] == 2
+
+def test_errors_and_repairs_are_counted(monkeypatch):
+    answers = iter(["{not json", '{"fixed": true}'])
+    monkeypatch.setattr(pdf_extract, "llm", SyntheticProvider(responder=lambda prompt: next(answers)))
+    failing = SyntheticProvider(error_rate=1.0)
+    with track_llm_usage() as usage, llm_stage("extraction"):
+        raw = pdf_extract.llm.generate("extract")
+        assert pdf_extract.safe_json_parse(raw) == {"fixed": True}
+        with pytest.raises(Exception):
+            failing.generate("extract")
+
+    totals = usage.totals()
+    assert totals["by_stage"]["repair"]["calls"] == 1
+    assert totals["by_stage"]["extraction"]["calls"] == 2
+    assert totals["by_stage"]["extraction"]["errors"] == 1
+
+def test_cassette_replays_are_marked_cached(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = CassetteProvider(path, inner=SyntheticProvider(responder=lambda prompt: "recorded"), record=True)
+    with track_llm_usage() as usage:
+        recorder.generate("prompt")
+        CassetteProvider(path).generate("prompt")
+
+    assert [call.cached for call in usage.calls] == [False, True]
+    assert [call.provider for call in usage.calls] == ["cassette", "cassette"]
+
+def test_merge_usage_accumulates():
+    ledger = LLMUsageLedger()
+    with track_llm_usage(ledger), llm_stage("refill"):
+        SyntheticProvider().generate("prompt")
+    stored = merge_usage(merge_usage(None, ledger), ledger)
+    assert stored["calls"] == 2
+    assert stored["by_stage"]["refill"]["calls"] == 2
+    assert len(stored["requests"]) == 2
+
+def test_job_status_reports_usage(workspace):
+    upload = lambda: client.post(
+        "/pdf/extract-and-format/",
+        files={"file": ("usage.pdf", _pdf_bytes(), "application/pdf")},
+    )
+    job_id = upload().json()["job_id"]
+
+    usage = client.get(f"/pdf/jobs/{job_id}", params={"include_pages": "false"}).json()["llm_usage"]
+    assert usage["calls"] == 1
+    assert usage["prompt_tokens"] > 0
+    assert list(usage["by_stage"]) == ["extraction"]
+    assert usage["requests"][0]["provider"] == "synthetic"
+
+    # A refill for the null fields is added to the same job
+    section = next(iter(pdf_extract.processing_jobs[job_id]["result"].values()))
+    next(iter(section.values()))["value"] = None
+    assert upload().json()["job_id"] == job_id
+    usage = client.get(f"/pdf/jobs/{job_id}", params={"include_pages": "false"}).json()["llm_usage"]
+    assert usage["calls"] == 2
+    assert usage["by_stage"]["refill"]["calls"] == 1
+
+def test_later_usage_keeps_the_extraction_indexed(workspace, monkeypatch):
+    import app.utils.job_index as job_index
+
+    job_id = client.post(
+        "/pdf/extract-and-format/",
+        files={"file": ("usage.pdf", _pdf_bytes(), "application/pdf")},
+    ).json()["job_id"]
+    before = client.get(f"/pdf/jobs/{job_id}", params={"include_pages": "false"}).json()
+    reindexed = []
+    monkeypatch.setattr(job_index, "_index_pages", lambda conn, job_id, job: reindexed.append(job_id))
+
+    ledger = LLMUsageLedger()
+    with track_llm_usage(ledger), llm_stage("highlight"):
+        SyntheticProvider().generate("find the passage")
+    pdf_extract.record_llm_usage(job_id, ledger)
+
+    after = client.get(f"/pdf/jobs/{job_id}", params={"include_pages": "false"}).json()
+    assert after["updated_at"] == before["updated_at"]
+    assert after["llm_usage"]["by_stage"]["highlight"]["calls"] == 1
+    assert reindexed == []
+
+def test_no_refill_for_fields_outside_the_schema(workspace):
+    upload = lambda: client.post(
+        "/pdf/extract-and-format/",
+        files={"file": ("usage.pdf", _pdf_bytes(), "application/pdf")},
+    )
+    job_id = upload().json()["job_id"]
+    pdf_extract.processing_jobs[job_id]["result"]["retired_section"] = {"old_field": {"value": None, "page_number": None}}
+
+    assert upload().status_code == 200
+    assert pdf_extract.processing_jobs[job_id]["llm_usage"]["calls"] == 1
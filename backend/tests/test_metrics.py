@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.utils.metrics import LLM_REQUEST_SECONDS, MetricsRegistry
+from app.utils.llm import SyntheticProvider, LLMError
+
+client = TestClient(app)
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    pages = registry.counter("pages_total", "Pages", ["mode"])
+    latency = registry.histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1.0))
+    pages.inc(3, mode="native")
+    latency.observe(0.05, stage="llm")
+    latency.observe(0.5, stage="llm")
+    latency.observe(7, stage="llm")
+
+    text = registry.render()
+    assert "# TYPE pages_total counter" in text
+    assert 'pages_total{mode="native"} 3' in text
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'stage_seconds_sum{stage="llm"} 7.55' in text
+    assert 'stage_seconds_count{stage="llm"} 3' in text
+
+def test_labels_must_match():
+    registry = MetricsRegistry()
+    pages = registry.counter("pages_total", "Pages", ["mode"])
+    with pytest.raises(ValueError):
+        pages.inc(stage="llm")
+    with pytest.raises(ValueError):
+        registry.counter("pages_total", "Pages again")
+
+def test_gauge_track():
+    registry = MetricsRegistry()
+    in_flight = registry.gauge("in_flight", "In flight")
+    with in_flight.track():
+        assert in_flight.value() == 1
+    assert in_flight.value() == 0
+
+def test_llm_calls_are_timed_by_outcome():
+    ok = LLM_REQUEST_SECONDS.count(provider="synthetic", outcome="ok")
+    errors = LLM_REQUEST_SECONDS.count(provider="synthetic", outcome="error")
+    SyntheticProvider().generate("hello")
+    with pytest.raises(LLMError):
+        SyntheticProvider(error_rate=1.0).generate("hello")
+    assert LLM_REQUEST_SECONDS.count(provider="synthetic", outcome="ok") == ok + 1
+    assert LLM_REQUEST_SECONDS.count(provider="synthetic", outcome="error") == errors + 1
+
+def test_metrics_endpoint():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE loanbook_pipeline_stage_seconds histogram" in response.text
+    assert "loanbook_jobs_in_flight 0" in response.text
+    assert "\nloanbook_llm_json_repairs_total " in response.text
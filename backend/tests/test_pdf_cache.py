@@ -0,0 +1,88 @@
+import os
+import threading
+import fitz
+from app.utils.pdf_cache import DocumentPool
+
+def _write_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+def test_checkout_reuses_open_document(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    _write_pdf(pdf, "first")
+    pool = DocumentPool(max_documents=2, max_bytes=10 * 1024 * 1024)
+
+    with pool.checkout(str(pdf)) as doc:
+        first = doc
+    with pool.checkout(str(pdf)) as doc:
+        assert doc is first
+    assert pool.stats()["documents"] == 1
+
+def test_pool_evicts_least_recently_used(tmp_path):
+    pool = DocumentPool(max_documents=2, max_bytes=10 * 1024 * 1024)
+    docs = []
+    for name in ("a", "b", "c"):
+        pdf = tmp_path / f"{name}.pdf"
+        _write_pdf(pdf, name)
+        with pool.checkout(str(pdf)) as doc:
+            docs.append(doc)
+
+    assert pool.stats()["documents"] == 2
+    assert docs[0].is_closed
+    assert not docs[2].is_closed
+
+def test_pool_respects_memory_budget(tmp_path):
+    pdf_a, pdf_b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    _write_pdf(pdf_a, "a")
+    _write_pdf(pdf_b, "b")
+    pool = DocumentPool(max_documents=10, max_bytes=os.path.getsize(pdf_a) + 1)
+
+    with pool.checkout(str(pdf_a)):
+        pass
+    with pool.checkout(str(pdf_b)):
+        pass
+    assert pool.stats()["documents"] == 1
+
+def test_changed_file_gets_fresh_document(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    _write_pdf(pdf, "before")
+    pool = DocumentPool()
+
+    with pool.checkout(str(pdf)) as doc:
+        old = doc
+        assert "before" in doc[0].get_text()
+
+    _write_pdf(pdf, "after change")
+    stat = os.stat(pdf)
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    with pool.checkout(str(pdf)) as doc:
+        assert doc is not old
+        assert "after change" in doc[0].get_text()
+    assert old.is_closed
+    assert pool.stats()["documents"] == 1
+
+def test_checkout_is_exclusive(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    _write_pdf(pdf, "shared")
+    pool = DocumentPool()
+    active = []
+    overlaps = []
+
+    def worker():
+        for _ in range(20):
+            with pool.checkout(str(pdf)) as doc:
+                active.append(1)
+                if len(active) > 1:
+                    overlaps.append(1)
+                doc[0].get_text()
+                active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not overlaps
@@ -8,3 +8,193 @@ def test_highlight_text_invalid_job():
     response = client.get("pdf/highlight/", params={"job_id": "fake", "page_number": 1, "query": "test"})
     assert response.status_code == 404
     assert response.json()["detail"] == "Job not found"
+
+def _make_job(tmp_path, monkeypatch, pages, result=None):
+    import json
+    import fitz
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 520, 720), text, fontsize=11)
+    doc.save(str(uploads / "sample.pdf"))
+
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps({"job-1": {"status": "completed", "filename": "sample.pdf", "result": result}}))
+    monkeypatch.setattr("app.utils.jobs.job_file", str(jobs_file))
+    monkeypatch.setattr("app.api.pdf_highlight.UPLOADS_DIR", str(uploads))
+
+def test_highlight_local_match_on_adjacent_page(tmp_path, monkeypatch):
+    _make_job(tmp_path, monkeypatch, [
+        "This Agreement is dated 18 April 2017.",
+        "The Borrower shall repay each Loan on the Termination Date.",
+    ])
+
+    def no_ai(*args, **kwargs):
+        raise AssertionError("LLM should not be called for a local match")
+
+    monkeypatch.setattr("app.api.pdf_highlight.fetch_passage_with_ai", no_ai)
+    response = client.get("pdf/highlight/", params={
+        "job_id": "job-1",
+        "page_number": 1,
+        "query": "The Borrower shall repay each Loan on the Termination Date",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["match_source"] == "local"
+    assert body["page_number"] == 2
+    assert body["confidence"] == 1.0
+
+def test_highlight_falls_back_to_ai(tmp_path, monkeypatch):
+    _make_job(tmp_path, monkeypatch, ["The Borrower shall repay each Loan on the Termination Date."])
+
+    calls = []
+
+    def fake_ai(page_text, query):
+        calls.append(query)
+        return "The Borrower shall repay each Loan on the Termination Date."
+
+    monkeypatch.setattr("app.api.pdf_highlight.fetch_passage_with_ai", fake_ai)
+    response = client.get("pdf/highlight/", params={
+        "job_id": "job-1",
+        "page_number": 1,
+        "query": "Bullet repayment at maturity",
+    })
+    assert response.status_code == 200
+    assert response.json()["match_source"] == "ai"
+    assert len(calls) == 1
+
+def test_highlight_invalid_mode():
+    response = client.get("pdf/highlight/", params={"job_id": "fake", "page_number": 1, "query": "x", "mode": "other"})
+    assert response.status_code == 400
+
+def test_highlight_returns_overlay_without_writing(tmp_path, monkeypatch):
+    _make_job(tmp_path, monkeypatch, ["The Borrower shall repay each Loan on the Termination Date."])
+
+    response = client.get("pdf/highlight/", params={
+        "job_id": "job-1",
+        "page_number": 1,
+        "query": "The Borrower shall repay each Loan",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert "output_file" not in body
+    assert body["page_width"] > 0 and body["page_height"] > 0
+    assert body["rects"]
+    for x0, y0, x1, y1 in body["rects"]:
+        assert 0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1
+    assert sorted(p.name for p in (tmp_path / "uploads").iterdir()) == ["sample.pdf"]
+
+def test_highlight_export_writes_annotated_copy(tmp_path, monkeypatch):
+    import os
+    import fitz
+
+    _make_job(tmp_path, monkeypatch, ["The Borrower shall repay each Loan on the Termination Date."])
+
+    response = client.get("pdf/highlight/", params={
+        "job_id": "job-1",
+        "page_number": 1,
+        "query": "The Borrower shall repay each Loan",
+        "export": True,
+    })
+    assert response.status_code == 200
+    output_file = response.json()["output_file"]
+    assert os.path.exists(output_file)
+    assert os.path.basename(os.path.dirname(output_file)) == "job-1"
+    assert len(list(fitz.open(output_file)[0].annots())) == 1
+
+def test_bulk_highlights_batch_llm_fallbacks_per_page(tmp_path, monkeypatch):
+    _make_job(
+        tmp_path,
+        monkeypatch,
+        [
+            "This Agreement is dated 18 April 2017 and is governed by English law.",
+            "The Borrower shall repay each Loan on the Termination Date.",
+        ],
+        result={
+            "dates": {
+                "agreement_date": {"value": "18 April 2017", "page_number": 1},
+                "maturity_date": {"value": None, "page_number": None},
+            },
+            "miscellaneous": {
+                "governing_law": {"value": "English law", "page_number": 1},
+                "bilateral_or_syndicated": {"value": "Bilateral facility", "page_number": 2},
+                "language_for_client_communication": {"value": "Plain English notices", "page_number": 2},
+            },
+        },
+    )
+
+    calls = []
+
+    def fake_ai(page_text, queries):
+        calls.append(queries)
+        return ["The Borrower shall repay each Loan on the Termination Date.", None]
+
+    monkeypatch.setattr("app.api.pdf_highlight.fetch_passages_with_ai", fake_ai)
+    response = client.get("pdf/jobs/job-1/highlights")
+    assert response.status_code == 200
+    body = response.json()
+
+    assert calls == [["Bilateral facility", "Plain English notices"]]
+    assert body["llm_calls"] == 1
+    assert body["llm_fallbacks"] == 2
+    sources = {f["field"]: f["match_source"] for f in body["fields"]}
+    assert sources == {"agreement_date": "local", "governing_law": "local", "bilateral_or_syndicated": "ai"}
+    assert body["unresolved"] == [
+        {"section": "miscellaneous", "field": "language_for_client_communication", "page_number": 2}
+    ]
+    assert set(body["pages"]) == {"1", "2"}
+    assert body["elapsed_ms"] >= 0
+
+def test_bulk_highlights_export_single_pdf(tmp_path, monkeypatch):
+    import fitz
+
+    _make_job(
+        tmp_path,
+        monkeypatch,
+        ["This Agreement is dated 18 April 2017.", "It is governed by English law."],
+        result={
+            "dates": {"agreement_date": {"value": "18 April 2017", "page_number": 1}},
+            "miscellaneous": {"governing_law": {"value": "English law", "page_number": 2}},
+        },
+    )
+
+    response = client.get("pdf/jobs/job-1/highlights", params={"export": True, "ai_fallback": False})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["llm_calls"] == 0
+    doc = fitz.open(body["output_file"])
+    assert [len(list(page.annots())) for page in doc] == [1, 1]
+
+def test_bulk_highlights_invalid_job():
+    response = client.get("pdf/jobs/fake/highlights")
+    assert response.status_code == 404
+
+def test_normalize_with_offsets_maps_back_to_original():
+    from app.utils import MATCH_NORMALIZER
+
+    original = "  The  BORROWER\n\tshall   repay "
+    norm = MATCH_NORMALIZER.normalize_with_offsets(original)
+    assert norm.text == " ".join(original.lower().split()) == "the borrower shall repay"
+    start = norm.text.index("borrower shall")
+    begin, end = norm.original_span(start, start + len("borrower shall"))
+    assert original[begin:end] == "BORROWER\n\tshall"
+    assert norm.normalized_index(original.index("shall")) == norm.text.index("shall")
+
+def test_find_phrase_coords_spans_blocks():
+    import fitz
+    from app.api.pdf_highlight import find_phrase_coords_from_ai
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "The Borrower shall repay each Loan", fontsize=11)
+    page.insert_text((72, 300), "on the Termination Date.", fontsize=11)
+    page.insert_text((72, 500), "Unrelated clause about notices.", fontsize=11)
+    assert len(page.get_text("blocks")) == 3
+
+    coords = find_phrase_coords_from_ai(page, "each Loan on the Termination", "unused")
+    assert coords is not None and len(coords) == 2
+    assert coords[0][1] < 150 and coords[1][1] > 250
+    doc.close()
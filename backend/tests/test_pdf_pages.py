@@ -0,0 +1,98 @@
+import json
+import os
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.utils.tile_cache import evict_tiles
+
+client = TestClient(app)
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    doc = fitz.open()
+    for number in range(1, 6):
+        doc.new_page().insert_text((72, 72), f"Page {number} of the agreement")
+    doc.save(str(uploads / "sample.pdf"))
+
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps({"job-1": {"status": "completed", "filename": "sample.pdf"}}))
+    monkeypatch.setattr("app.utils.jobs.job_file", str(jobs_file))
+    monkeypatch.setattr("app.api.pdf_highlight.UPLOADS_DIR", str(uploads))
+    monkeypatch.setattr("app.utils.tile_cache.TILE_CACHE_DIR", str(tmp_path / "tiles"))
+    return tmp_path
+
+def test_page_range_returns_sub_pdf(job):
+    response = client.get("/pdf/jobs/job-1/pages", params={"start": 2, "end": 3})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    sub_doc = fitz.open(stream=response.content, filetype="pdf")
+    assert len(sub_doc) == 2
+    assert "Page 2" in sub_doc[0].get_text()
+
+def test_page_range_invalid(job):
+    response = client.get("/pdf/jobs/job-1/pages", params={"start": 4, "end": 9})
+    assert response.status_code == 400
+
+def test_page_image_is_cached(job):
+    response = client.get("/pdf/jobs/job-1/pages/1/image", params={"zoom": 0.5})
+    assert response.status_code == 200
+    assert response.content.startswith(b"\x89PNG")
+    tiles = os.listdir(job / "tiles")
+    assert len(tiles) == 1
+
+    again = client.get("/pdf/jobs/job-1/pages/1/image", params={"zoom": 0.5})
+    assert again.content == response.content
+    assert os.listdir(job / "tiles") == tiles
+
+def test_page_image_revalidates_after_reupload(job):
+    response = client.get("/pdf/jobs/job-1/pages/1/image")
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert client.get("/pdf/jobs/job-1/pages/1/image", headers={"If-None-Match": etag}).status_code == 304
+
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Re-uploaded agreement")
+    doc.save(str(job / "uploads" / "sample.pdf"))
+    fresh = client.get("/pdf/jobs/job-1/pages/1/image", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+def test_page_image_webp(job):
+    response = client.get("/pdf/jobs/job-1/pages/2/image", params={"format": "webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+
+def test_page_image_rejects_bad_zoom(job):
+    response = client.get("/pdf/jobs/job-1/pages/1/image", params={"zoom": 10})
+    assert response.status_code == 400
+
+def test_evict_tiles_removes_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.utils.tile_cache.TILE_CACHE_DIR", str(tmp_path))
+    for age, name in enumerate(["old", "mid", "new"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        os.utime(path, ns=(age * 10**9, age * 10**9))
+
+    freed = evict_tiles(max_bytes=150)
+    assert freed == 200
+    assert os.listdir(tmp_path) == ["new"]
+
+def test_waiting_for_a_document_does_not_block_other_requests(job):
+    import threading
+    from app.utils import document_pool
+
+    with TestClient(app) as shared:  # one event loop for all requests
+        results = {}
+        image = threading.Thread(target=lambda: results.update(image=shared.get("/pdf/jobs/job-1/pages/1/image")))
+        with document_pool.checkout(str(job / "uploads" / "sample.pdf")):
+            image.start()
+            image.join(timeout=0.5)  # waits for the document
+            status = threading.Thread(target=lambda: results.update(status=shared.get("/pdf/status")))
+            status.start()
+            status.join(timeout=5)
+            assert "status" in results
+        image.join(timeout=5)
+        assert results["image"].status_code == 200
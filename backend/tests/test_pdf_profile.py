@@ -0,0 +1,64 @@
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+import app.api.pdf_extract as pdf_extract
+from app.utils import SyntheticProvider
+from app.utils.profiler import StackSampler
+
+client = TestClient(app)
+ADMIN = {"X-Admin-Token": "secret"}
+
+def _pdf_bytes():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "This Agreement is governed by English law.")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads" / "temp").mkdir(parents=True)
+    monkeypatch.setattr("app.utils.jobs.job_file", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr("app.utils.profiler.PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr("app.api.pdf_profile.PROFILE_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(pdf_extract, "processing_jobs", {})
+    monkeypatch.setattr(pdf_extract, "llm", SyntheticProvider(latency_ms=50, fill_ratio=1.0))
+    return tmp_path
+
+def _upload(**kwargs):
+    return client.post(
+        "/pdf/extract-and-format/",
+        files={"file": ("profiled.pdf", _pdf_bytes(), "application/pdf")},
+        **kwargs,
+    )
+
+def test_sampler_sees_other_threads():
+    with StackSampler(interval_ms=1) as sampler:
+        while sampler.samples < 5:  # keep the main thread busy for a few samples
+            sum(range(1000))
+    lines = sampler.collapsed().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("MainThread;") for line in lines)
+
+def test_profiling_is_admin_only(workspace, monkeypatch):
+    assert _upload(params={"profile": "true"}).status_code == 403
+    assert _upload(headers={"X-Profile": "1", "X-Admin-Token": "wrong"}).status_code == 403
+    monkeypatch.setattr("app.api.pdf_profile.PROFILE_ADMIN_TOKEN", None)
+    assert _upload(headers={"X-Profile": "1", **ADMIN}).status_code == 403
+
+def test_profiled_request_stores_collapsed_stacks(workspace):
+    response = _upload(headers={"X-Profile": "1", **ADMIN})
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    assert client.get(f"/pdf/jobs/{job_id}/profile").status_code == 403
+    profile = client.get(f"/pdf/jobs/{job_id}/profile", headers=ADMIN)
+    assert profile.status_code == 200
+    assert "extract_and_format_pdf" in profile.text
+    assert "SyntheticProvider._generate" in profile.text
+
+def test_unprofiled_request_has_no_profile(workspace):
+    job_id = _upload().json()["job_id"]
+    assert client.get(f"/pdf/jobs/{job_id}/profile", headers=ADMIN).status_code == 404
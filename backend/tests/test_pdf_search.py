@@ -0,0 +1,120 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.utils import save_jobs_to_file
+from app.utils.job_index import build_like_pattern, build_match_query, search_pages
+
+client = TestClient(app)
+
+JOBS = {
+    "job-a": {
+        "status": "completed",
+        "filename": "a.pdf",
+        "updated_at": "2025-01-01T00:00:00+00:00",
+        "pages": {
+            "1": "This Agreement is governed by English law.",
+            "2": "If a Lender does not reply within the time period it shall be excluded (snooze and lose).",
+        },
+        "result": {
+            "general": {"governing_law": {"value": "English law", "page_number": 1}},
+            "financial_covenants": {"equity_cure_provision": {"value": "Two cures over the life", "page_number": 2}},
+        },
+    },
+    "job-b": {
+        "status": "completed",
+        "filename": "b.pdf",
+        "updated_at": "2025-01-02T00:00:00+00:00",
+        "pages": {"1": "The laws of the Province of Ontario govern this agreement."},
+        "result": {
+            "general": {"governing_law": {"value": "Ontario", "page_number": 1}},
+            "financial_covenants": {"equity_cure_provision": {"value": None, "page_number": None}},
+        },
+    },
+    "job-c": {"status": "processing", "filename": "c.pdf", "pages": {}},
+}
+
+@pytest.fixture
+def jobs_file(tmp_path, monkeypatch):
+    path = tmp_path / "jobs.json"
+    monkeypatch.setattr("app.utils.jobs.job_file", str(path))
+    return path
+
+def test_build_match_query_is_safe():
+    assert build_match_query('snooze AND "lose it" (x*') == '"lose it" "snooze" "AND" "x"'
+    assert build_match_query('"" ***') == ""
+
+def test_search_endpoint_finds_pages(jobs_file):
+    save_jobs_to_file(json.loads(json.dumps(JOBS)))
+
+    response = client.get("/pdf/search", params={"q": '"snooze and lose"'})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    hit = body["results"][0]
+    assert (hit["job_id"], hit["filename"], hit["page_number"]) == ("job-a", "a.pdf", 2)
+    assert "[snooze and lose]" in hit["snippet"]
+
+def test_search_pagination(jobs_file):
+    save_jobs_to_file(json.loads(json.dumps(JOBS)))
+
+    first = client.get("/pdf/search", params={"q": "agreement", "limit": 1}).json()
+    second = client.get("/pdf/search", params={"q": "agreement", "limit": 1, "offset": 1}).json()
+    assert first["total"] == second["total"] == 2
+    assert first["results"][0]["job_id"] != second["results"][0]["job_id"]
+
+def test_index_updates_incrementally(jobs_file):
+    from app.utils.jobs import index_db_path
+
+    jobs = json.loads(json.dumps(JOBS))
+    save_jobs_to_file(jobs)
+
+    jobs["job-c"].update({
+        "status": "completed",
+        "updated_at": "2025-01-03T00:00:00+00:00",
+        "pages": {"1": "Equity cure rights may be exercised twice."},
+    })
+    del jobs["job-b"]
+    save_jobs_to_file(jobs)
+
+    assert search_pages(index_db_path(), "equity cure")[0] == 1
+    assert search_pages(index_db_path(), "ontario")[0] == 0
+
+def test_search_picks_up_external_job_file_changes(jobs_file):
+    jobs_file.write_text(json.dumps(JOBS))
+    response = client.get("/pdf/search", params={"q": "ontario"})
+    assert response.json()["total"] == 1
+
+def test_search_rejects_empty_query(jobs_file):
+    assert client.get("/pdf/search", params={"q": "  "}).status_code == 400
+
+def test_build_like_pattern():
+    assert build_like_pattern("english") == "%english%"
+    assert build_like_pattern("eng*law") == "eng%law"
+    assert build_like_pattern("100%_x") == "%100\\%\\_x%"
+
+def test_fields_endpoint_filters_rows(jobs_file):
+    save_jobs_to_file(json.loads(json.dumps(JOBS)))
+
+    body = client.get("/pdf/fields", params={"field": "governing_law", "value": "ENGLISH"}).json()
+    assert body["total"] == body["total_jobs"] == 1
+    row = body["results"][0]
+    assert (row["job_id"], row["section"], row["value"], row["page_number"]) == ("job-a", "general", "English law", 1)
+    assert row["extracted_at"] == "2025-01-01T00:00:00+00:00"
+
+    body = client.get("/pdf/fields", params={"section": "general"}).json()
+    assert body["total"] == 2
+
+def test_fields_endpoint_combines_conditions_and_projects(jobs_file):
+    save_jobs_to_file(json.loads(json.dumps(JOBS)))
+
+    params = {"where": ["general.governing_law:*", "equity_cure_provision:*"], "select": ["governing_law"]}
+    body = client.get("/pdf/fields", params=params).json()
+    assert body["total_jobs"] == 1
+    assert [(r["job_id"], r["field"], r["value"]) for r in body["results"]] == [("job-a", "governing_law", "English law")]
+
+    body = client.get("/pdf/fields", params={"select": ["general.governing_law", "equity_cure_provision"]}).json()
+    assert body["total"] == 4 and body["total_jobs"] == 2
+
+def test_fields_endpoint_rejects_bad_condition(jobs_file):
+    assert client.get("/pdf/fields", params={"where": "governing_law"}).status_code == 400
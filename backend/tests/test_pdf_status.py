@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from app.utils import response_cache, save_jobs_to_file
 
 client = TestClient(app)
 
@@ -12,4 +13,125 @@ def test_get_job_status_not_found():
 def test_get_all_jobs():
     response = client.get("/pdf/status")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    assert isinstance(response.json()["jobs"], list)
+
+@pytest.fixture
+def many_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.utils.jobs.job_file", str(tmp_path / "jobs.json"))
+    jobs = {
+        f"job-{n}": {
+            "status": "completed" if n % 2 else "processing",
+            "filename": f"{'facility' if n < 3 else 'loan'}-{n}.pdf",
+            "created_at": f"2025-01-0{n + 1}T00:00:00+00:00",
+            "updated_at": f"2025-02-0{9 - n}T00:00:00+00:00",
+        }
+        for n in range(5)
+    }
+    save_jobs_to_file(jobs)
+    return jobs
+
+def test_get_all_jobs_paginates_with_cursor(many_jobs):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/pdf/status", params=params).json()
+        assert body["total"] == 5
+        seen += [job["job_id"] for job in body["jobs"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["job-4", "job-3", "job-2", "job-1", "job-0"]
+
+def test_get_all_jobs_filters_and_sorts(many_jobs):
+    body = client.get("/pdf/status", params={"status": "completed", "sort": "updated_at", "order": "asc"}).json()
+    assert body["total"] == 2
+    assert [job["job_id"] for job in body["jobs"]] == ["job-3", "job-1"]
+
+    body = client.get("/pdf/status", params={"filename": "FACILITY", "since": "2025-01-02", "until": "2025-01-03"}).json()
+    assert [job["job_id"] for job in body["jobs"]] == ["job-1"]
+    assert body["jobs"][0]["created_at"] == "2025-01-02T00:00:00+00:00"
+
+def test_get_all_jobs_rejects_bad_cursor(many_jobs):
+    assert client.get("/pdf/status", params={"cursor": "not-a-cursor"}).status_code == 400
+
+@pytest.fixture
+def full_job(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.utils.jobs.job_file", str(tmp_path / "jobs.json"))
+    response_cache.clear()
+    save_jobs_to_file({
+        "job-1": {
+            "status": "completed",
+            "filename": "a.pdf",
+            "file_path": "uploads/a.pdf",
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "updated_at": "2025-01-02T00:00:00+00:00",
+            "result": {
+                "general": {"borrower": {"value": "Acme", "page_number": 1}},
+                "dates": {"agreement_date": {"value": "1 May 2020", "page_number": 1}},
+            },
+            "pages": {str(n): f"page {n}" for n in range(1, 6)},
+        }
+    })
+
+def test_get_job_status_selects_pages_and_sections(full_job):
+    body = client.get("/pdf/jobs/job-1", params={"page_start": 2, "page_end": 3, "sections": "dates"}).json()
+    assert body["pages"] == {"2": "page 2", "3": "page 3"}
+    assert list(body["result"]) == ["dates"]
+
+    body = client.get("/pdf/jobs/job-1", params={"include_pages": False}).json()
+    assert body["pages"] is None
+    assert set(body["result"]) == {"general", "dates"}
+
+    assert client.get("/pdf/jobs/job-1", params={"page_start": 3, "page_end": 2}).status_code == 400
+
+def test_get_job_status_view_status_skips_job_file(full_job, monkeypatch):
+    def fail():
+        raise AssertionError("job file should not be read")
+    monkeypatch.setattr("app.api.pdf_status.load_jobs_from_file", fail)
+
+    body = client.get("/pdf/jobs/job-1", params={"view": "status"}).json()
+    assert body == {
+        "job_id": "job-1",
+        "status": "completed",
+        "filename": "a.pdf",
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-02T00:00:00+00:00",
+    }
+    assert client.get("/pdf/jobs/missing", params={"view": "status"}).status_code == 404
+
+def test_get_job_status_serves_cached_gzip_with_etag(full_job, monkeypatch):
+    first = client.get("/pdf/jobs/job-1")
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    etag = first.headers["etag"]
+    assert first.json()["pages"]["1"] == "page 1"
+
+    def fail():
+        raise AssertionError("job file should not be read")
+    monkeypatch.setattr("app.api.pdf_status.load_jobs_from_file", fail)
+
+    again = client.get("/pdf/jobs/job-1")
+    assert again.headers["etag"] == etag and again.json() == first.json()
+
+    not_modified = client.get("/pdf/jobs/job-1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    plain = client.get("/pdf/jobs/job-1", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == first.json()
+    assert plain.headers["etag"] != etag
+
+def test_get_job_status_etag_changes_with_job(full_job):
+    etag = client.get("/pdf/jobs/job-1").headers["etag"]
+    assert client.get("/pdf/jobs/job-1", params={"include_pages": False}).headers["etag"] != etag
+
+    from app.utils import load_jobs_from_file
+    jobs = load_jobs_from_file()
+    jobs["job-1"]["updated_at"] = "2025-01-03T00:00:00+00:00"
+    jobs["job-1"]["result"]["general"]["borrower"]["value"] = "Acme Ltd"
+    save_jobs_to_file(jobs)
+
+    response = client.get("/pdf/jobs/job-1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["result"]["general"]["borrower"]["value"] == "Acme Ltd"
@@ -0,0 +1,16 @@
+import json
+from app.utils.schema import MASTER_SCHEMA
+from app.utils.schema_prompt import compile_schema
+
+def test_compiled_schema_lists_every_field():
+    schema = compile_schema()
+    assert schema.sections == {section: list(fields) for section, fields in MASTER_SCHEMA.items()}
+    assert schema.fields == sum(len(fields) for fields in MASTER_SCHEMA.values())
+    assert schema.tokens < len(json.dumps(MASTER_SCHEMA, indent=2)) // 4 / 2
+    assert compile_schema() is schema
+
+def test_sub_schema():
+    schema = compile_schema(["dates.agreement_date", "general", "dates.unknown", "unknown"])
+    assert schema.sections == {"dates": ["agreement_date"], "general": list(MASTER_SCHEMA["general"])}
+    assert "governing_law" not in schema.text
+    assert schema.tokens < compile_schema().tokens
@@ -7,8 +7,9 @@ import { Label } from "@/components/ui/label";
 import { Button } from "@/components/ui/button";
 import { Textarea } from "@/components/ui/textarea";
 import { LoadingSpinner } from "@/components/custom/LoadingSpinner";
-import { Save, Upload, FileText, Search, Database } from "lucide-react";
+import { Save, Upload, FileText, Search, Database, Download } from "lucide-react";
 import LazyAppPdfViewer from "@/components/custom/pdf-viewer/LazyAppPdfViewer";
+import HighlightedPage, { HighlightRect } from "@/components/custom/pdf-viewer/HighlightedPage";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 
@@ -36,10 +37,26 @@ type RawField = {
     page_number: number
 }
 
+type Highlight = {
+    job_id: string
+    query: string
+    page_number: number
+    rects: HighlightRect[]
+}
+
 type JobSummary = {
     job_id: string
     status: string
     filename: string
+    created_at?: string | null
+    updated_at?: string | null
+}
+
+type JobList = {
+    total: number
+    limit: number
+    next_cursor: string | null
+    jobs: JobSummary[]
 }
 
 export default function Home() {
@@ -49,12 +66,14 @@ export default function Home() {
     const [jobID, setJobID] = useState<string | null>(null);
     const [fetching, setFetching] = useState<boolean>(false);
     const [jobs, setJobs] = useState<JobSummary[] | null>(null);
+    const [jobsCursor, setJobsCursor] = useState<string | null>(null);
     const [status, setStatus] = useState<string | null>(null);
     const [fileUrl, setFileUrl] = useState<string | null>(null);
     const [result, setResult] = useState<JobResult | null>(null);
     const [fetchingPDF, setFetchingPDF] = useState<boolean>(false);
     const [fetchStatus, setFetchStatus] = useState<string | null>(null);
     const [editableData, setEditableData] = useState<RawResult | null>(null);
+    const [highlight, setHighlight] = useState<Highlight | null>(null);
 
     const handleUpload = async () => {
         setStatus("Uploading")
@@ -86,14 +105,16 @@ export default function Home() {
         }
     }
 
-    const fetchJobs = async () => {
+    const fetchJobs = async (cursor?: string) => {
         setFetchStatus("Fetching data...")
 
         try {
-            const result = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/status`)
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""
+            const result = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/status${query}`)
             if (!result.ok) throw new Error("Failed to fetch data")
-            const data = await result.json()
-            setJobs(data)
+            const data: JobList = await result.json()
+            setJobs((previous) => (cursor ? [...(previous ?? []), ...data.jobs] : data.jobs))
+            setJobsCursor(data.next_cursor)
         } catch (error) {
             console.error(error)
             throw error
@@ -107,7 +128,7 @@ export default function Home() {
         if (!id) return
 
         try {
-            const result = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/jobs/${id}`)
+            const result = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/jobs/${id}?include_pages=false`)
             if (!result.ok) throw new Error("Failed to fetch data")
             const data = await result.json()
 
@@ -142,26 +163,47 @@ export default function Home() {
         }
     }
 
+    const highlightUrl = (id: string, page: number, query: string) =>
+        `${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/highlight/?job_id=${encodeURIComponent(id)}&page_number=${page}&query=${encodeURIComponent(query)}`
+
+    const pageImageUrl = (id: string, page: number) =>
+        `${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/jobs/${encodeURIComponent(id)}/pages/${page}/image?zoom=1.5&format=webp`
+
+    // Only the rectangles are fetched; the viewer draws them over the page image
     const fetchHighlights = async (id: string, page: number, query: string) => {
         if (!id || fetchingPDF) return;
 
         setFetching(true);
 
+        try {
+            const result = await fetch(highlightUrl(id, page, query), { method: "GET" });
+            if (!result.ok) throw new Error("Failed to fetch data");
+            const data = await result.json();
+            setHighlight({ job_id: id, query, page_number: data.page_number ?? page, rects: data.rects ?? [] });
+            setPageNumber(data.page_number ?? page);
+        } catch (error) {
+            console.error(error);
+            setHighlight(null);
+            setPageNumber(page);
+        } finally {
+            setFetching(false);
+        }
+    }
+
+    // The annotated PDF is only written for an explicit download
+    const downloadHighlight = async () => {
+        if (!highlight) return;
+
         try {
             const result = await fetch(
-                `${process.env.NEXT_PUBLIC_BACKEND_URL}/pdf/highlight/?job_id=${encodeURIComponent(id)}&page_number=${page}&query=${encodeURIComponent(query)}`,
+                `${highlightUrl(highlight.job_id, highlight.page_number, highlight.query)}&export=true`,
                 { method: "GET" }
             );
             if (!result.ok) throw new Error("Failed to fetch data");
             const data = await result.json();
-            fetchPDF(data.output_file, page);
+            window.open(`${process.env.NEXT_PUBLIC_BACKEND_URL}/${data.output_file.replace(/\\/g, "/")}`, "_blank");
         } catch (error) {
             console.error(error);
-            if (result) {
-                fetchPDF(result.file_path, page);
-            }
-        } finally {
-            setFetching(false);
         }
     }
 
@@ -377,7 +419,7 @@ export default function Home() {
                                     <div className="space-y-4">
                                         {(jobs === null || jobs.length === 0) && (
                                             <Button
-                                                onClick={fetchJobs}
+                                                onClick={() => fetchJobs()}
                                                 variant="outline"
                                                 className="w-full border-accent text-accent hover:bg-accent hover:text-accent-foreground bg-transparent dark:hover:bg-accent"
                                             >
@@ -402,6 +444,16 @@ export default function Home() {
                                                     </option>
                                                 ))}
                                             </select>
+                                            {jobsCursor && (
+                                                <Button
+                                                    onClick={() => fetchJobs(jobsCursor)}
+                                                    variant="ghost"
+                                                    size="sm"
+                                                    className="mt-2 w-full text-accent"
+                                                >
+                                                    Load more jobs
+                                                </Button>
+                                            )}
                                         </div>
                                         <Button
                                             onClick={() => jobID && getData(jobID)}
@@ -514,6 +566,7 @@ export default function Home() {
                                                 setResult(null)
                                                 setEditableData(null)
                                                 setIsEditing(false)
+                                                setHighlight(null)
                                             }}
                                             variant="destructive"
                                             size="sm"
@@ -588,6 +641,28 @@ export default function Home() {
                                                     <p className="text-sm text-muted-foreground">Please wait...</p>
                                                 </div>
                                             </div>
+                                        ) : highlight ? (
+                                            <div>
+                                                <div className="flex items-center justify-between gap-2 px-4 py-2 border-b border-border/20">
+                                                    <Badge variant="outline" className="text-xs">
+                                                        Page {highlight.page_number}
+                                                    </Badge>
+                                                    <div className="flex gap-2">
+                                                        <Button onClick={downloadHighlight} variant="outline" size="sm">
+                                                            <Download className="w-4 h-4 mr-2" />
+                                                            Download highlighted PDF
+                                                        </Button>
+                                                        <Button onClick={() => setHighlight(null)} variant="outline" size="sm">
+                                                            Full document
+                                                        </Button>
+                                                    </div>
+                                                </div>
+                                                <HighlightedPage
+                                                    imageUrl={pageImageUrl(highlight.job_id, highlight.page_number)}
+                                                    pageNumber={highlight.page_number}
+                                                    rects={highlight.rects}
+                                                />
+                                            </div>
                                         ) : (
                                             <LazyAppPdfViewer fileUrl={fileUrl} initialPage={pageNumber} />
                                         )}
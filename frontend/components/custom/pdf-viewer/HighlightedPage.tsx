@@ -0,0 +1,35 @@
+'use client'
+
+// [x0, y0, x1, y1] as fractions of the page width / height
+export type HighlightRect = [number, number, number, number]
+
+interface HighlightedPageProps {
+  imageUrl: string;
+  pageNumber: number;
+  rects: HighlightRect[];
+}
+
+// One rendered page with the highlight rectangles drawn over it, so a
+// highlight needs neither an annotated PDF nor a re-download of the file
+const HighlightedPage = ({ imageUrl, pageNumber, rects }: HighlightedPageProps) => {
+  return (
+    <div className="relative w-full">
+      {/* eslint-disable-next-line @next/next/no-img-element -- tile served by the backend at any size */}
+      <img src={imageUrl} alt={`Page ${pageNumber}`} className="block w-full h-auto" />
+      {rects.map(([x0, y0, x1, y1], idx) => (
+        <div
+          key={idx}
+          className="absolute bg-yellow-300/40 border border-yellow-500/60 pointer-events-none"
+          style={{
+            left: `${x0 * 100}%`,
+            top: `${y0 * 100}%`,
+            width: `${(x1 - x0) * 100}%`,
+            height: `${(y1 - y0) * 100}%`,
+          }}
+        />
+      ))}
+    </div>
+  )
+}
+
+export default HighlightedPage